@@ -8,7 +8,7 @@
 
 
 from userge.core import (
-    Userge, Filters, Message, get_collection)
+    Userge, Filters, Message, Job, get_collection)
 
 from userge.utils import Config, logging
 
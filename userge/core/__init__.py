@@ -7,5 +7,5 @@
 # All rights reserved.
 
 
-from ._userge import Userge, Filters, Message
+from ._userge import Userge, Filters, Message, Job
 from ._database import get_collection
\ No newline at end of file
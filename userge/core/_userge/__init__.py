@@ -8,4 +8,5 @@
 
 
 from .client import Userge, Filters
-from .message import Message
\ No newline at end of file
+from .message import Message
+from .jobs import Job
\ No newline at end of file
@@ -7,6 +7,8 @@
 # All rights reserved.
 
 
+from typing import List
+
 from pyrogram import Client, Message
 
 
@@ -31,6 +33,12 @@ class BaseCLogger:
                       remove_caption: bool = False) -> None:
         pass
 
+    async def fwd_msgs(self,
+                       messages: List[BaseMessage],
+                       as_copy: bool = False,
+                       remove_caption: bool = False) -> None:
+        pass
+
 
 class BaseClient(Client):
     """
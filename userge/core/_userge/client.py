@@ -7,6 +7,7 @@
 # All rights reserved.
 
 
+import os
 import re
 import asyncio
 import importlib
@@ -19,15 +20,23 @@ import nest_asyncio
 from pyrogram import (
     Filters, MessageHandler, InlineKeyboardMarkup,
     ReplyKeyboardMarkup, ReplyKeyboardRemove, ForceReply)
+from pyrogram import Message as RawMessage
 
 from userge.utils import Config, logging
 from userge.plugins import get_all_plugins
 from .base import BaseClient
 from .message import Message
 from .logger import CLogger
+from .jobs import JobQueue
+from .files import FileRegistry
+from .streamer import MediaStreamer
+from .store import DownloadStore
 
 PYROFUNC = Callable[[Message], Any]
 PLUGINS_PATH = "userge.plugins.{}"
+DEFAULT_DOWNLOAD_DIR = "downloads/"
+# smaller files are downloaded by pyrogram in one stream
+PARALLEL_MIN_SIZE = 10 * 1024 * 1024
 
 LOG = logging.getLogger(__name__)
 LOG_STR = "<<<!  #####  ___{}___  #####  !>>>"
@@ -50,6 +59,43 @@ class Userge(BaseClient):
                          api_id=Config.API_ID,
                          api_hash=Config.API_HASH)
 
+        self.__jobs = JobQueue(self)
+        self.__files = FileRegistry(self)
+        self.__streamer = MediaStreamer(self)
+        self.__store = DownloadStore()
+
+    @property
+    def jobs(self) -> JobQueue:
+        """
+        Returns job queue of Userge.
+        """
+
+        return self.__jobs
+
+    @property
+    def files(self) -> FileRegistry:
+        """
+        Returns registry of sent files.
+        """
+
+        return self.__files
+
+    @property
+    def streamer(self) -> MediaStreamer:
+        """
+        Returns media streamer of Userge.
+        """
+
+        return self.__streamer
+
+    @property
+    def store(self) -> DownloadStore:
+        """
+        Returns store of downloaded files.
+        """
+
+        return self.__store
+
     @staticmethod
     def getLogger(name: str) -> logging.Logger:
         """
@@ -184,6 +230,82 @@ class Userge(BaseClient):
 
         return Message(self, msg)
 
+    async def download_media(self,
+                             message: Union[RawMessage, str],
+                             file_ref: Optional[str] = None,
+                             file_name: str = DEFAULT_DOWNLOAD_DIR,
+                             block: bool = True,
+                             progress: Optional[Callable[..., Any]] = None,
+                             progress_args: Tuple[Any, ...] = ()) -> Optional[str]:
+        """
+        Download media from a message.
+        Large files are downloaded with parallel part requests,
+        others work the same as `pyrogram.Client.download_media`.
+
+        Parameters:
+            message (:obj:`Message` | ``str``):
+                Pass a Message containing the media or the file id.
+            file_ref (``str``, *optional*):
+                A valid file reference obtained by a recently fetched media message.
+            file_name (``str``, *optional*):
+                A custom *file_name* to be used instead of the one provided by Telegram.
+                End with "/" to set a directory.
+            block (``bool``, *optional*):
+                Blocks the code execution until the file has been downloaded.
+            progress (``callable``, *optional*):
+                Pass a callback function to view the file transmission progress.
+            progress_args (``tuple``, *optional*):
+                Extra custom arguments for the progress callback function.
+        Returns:
+            ``str`` | ``None``: On success, the absolute path of the downloaded file is returned,
+            otherwise, in case the download failed or was deliberately stopped, None is returned.
+        """
+
+        info = None
+
+        if isinstance(message, RawMessage) and block:
+            try:
+                info = self.__streamer.get_file_info(message)
+
+            except ValueError:
+                pass
+
+        if info is None or info.file_size < PARALLEL_MIN_SIZE:
+            return await super().download_media(message=message,
+                                                file_ref=file_ref,
+                                                file_name=file_name,
+                                                block=block,
+                                                progress=progress,
+                                                progress_args=progress_args)
+
+        directory, name = os.path.split(file_name)
+        directory = os.path.join(self.PARENT_DIR, directory or DEFAULT_DOWNLOAD_DIR)
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        file_path = os.path.abspath(os.path.join(directory, name or info.file_name))
+
+        try:
+            return await self.__streamer.download(message, file_path,
+                                                  progress=progress,
+                                                  progress_args=progress_args)
+
+        except self.StopTransmission:
+            return None
+
+        except ValueError as v_e:
+            # cdn files are handled by pyrogram
+            LOG.info(
+                LOG_STR.format(f"Parallel Download Failed => {v_e}"))
+
+            return await super().download_media(message=message,
+                                                file_ref=file_ref,
+                                                file_name=file_name,
+                                                block=block,
+                                                progress=progress,
+                                                progress_args=progress_args)
+
     def on_cmd(self,
                command: str,
                about: str,
@@ -398,6 +520,16 @@ class Userge(BaseClient):
 
         return len(reloaded)
 
+    async def start(self) -> 'Userge':
+        """
+        Start the client and continue saved jobs.
+        """
+
+        await super().start()
+        self.__jobs.restore()
+
+        return self
+
     async def restart(self) -> None:
         """
         Restart the Userge.
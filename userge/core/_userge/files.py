@@ -0,0 +1,184 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import asyncio
+from typing import Dict, Optional, Union, Any
+
+from pyrogram.errors.exceptions import (
+    FileIdInvalid, FileReferenceEmpty, FileReferenceExpired, MediaEmpty)
+
+from userge.utils import logging, hash_file
+from .._database import get_collection
+from .base import BaseClient, BaseMessage
+
+LOG = logging.getLogger(__name__)
+LOG_STR = "<<<!  *****  ___{}___  *****  !>>>"
+
+MEDIA_TYPES = ("audio", "document", "photo", "sticker",
+               "animation", "video", "voice", "video_note")
+
+
+class FileRegistry:
+    """
+    Persistent registry of sent files, to send them again without uploading.
+
+    Files are saved by a key, which is the sha256 of the content for local files
+    (see `get_key`) or any unique string (ex: url) for other files.
+    """
+
+    def __init__(self, client: BaseClient) -> None:
+        self.__client = client
+        self.__collection = get_collection("files")
+
+    async def get_key(self, path: str) -> str:
+        """
+        Returns sha256 of the local file.
+        Hash is only calculated once for the same (path, size, mtime).
+        """
+
+        stat = os.stat(path)
+        stat_key = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+        doc = self.__collection.find_one({'stat': stat_key}, {'_id': 1})
+
+        if doc:
+            return doc['_id']
+
+        LOG.info(
+            LOG_STR.format(f"Hashing File => {path}"))
+
+        return await asyncio.get_event_loop().run_in_executor(None, hash_file, path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns saved file of the key or None.
+        """
+
+        return self.__collection.find_one({'_id': key})
+
+    def save(self, key: str, message: BaseMessage, path: str = '') -> bool:
+        """
+        Save media of the message by the key.
+
+        Parameters:
+            key (``str``):
+                key of the file.
+            message (`pyrogram.Message`):
+                message which contains the media.
+            path (``str``, *optional*):
+                path of the local file, to skip hashing next time.
+        Returns:
+            True if the message has media.
+        """
+
+        media = _get_media(message)
+
+        if media is None:
+            return False
+
+        doc = {'file_id': media.file_id,
+               'file_ref': media.file_ref,
+               'chat_id': message.chat.username or message.chat.id,
+               'message_id': message.message_id}
+
+        if path:
+            stat = os.stat(path)
+            doc['stat'] = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+        LOG.info(
+            LOG_STR.format(f"Saving File => {key} : {media.file_id}"))
+
+        self.__collection.update_one({'_id': key}, {"$set": doc}, upsert=True)
+
+        return True
+
+    def delete(self, key: str) -> None:
+        """
+        Delete saved file of the key.
+        """
+
+        self.__collection.delete_one({'_id': key})
+
+    async def refresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get new file reference from the saved message.
+        Deletes the key and returns None if the message is not available.
+        """
+
+        doc = self.get(key)
+
+        if doc is None:
+            return None
+
+        LOG.info(
+            LOG_STR.format(f"Refreshing File => {key}"))
+
+        try:
+            message = await self.__client.get_messages(doc['chat_id'], doc['message_id'])
+
+        except Exception as f_e:
+            LOG.error(f_e)
+            message = None
+
+        if message is None or message.empty or not self.save(key, message):
+            self.delete(key)
+            return None
+
+        return self.get(key)
+
+    async def send(self,
+                   chat_id: Union[int, str],
+                   key: str,
+                   **kwargs: Any) -> Optional[BaseMessage]:
+        """
+        Send saved file of the key, refreshes expired file references.
+
+        Parameters:
+            chat_id (``int`` | ``str``):
+                Unique identifier (int) or username (str) of the target chat.
+            key (``str``):
+                key of the file.
+            kwargs:
+                other arguments for `send_cached_media`.
+        Returns:
+            :obj:`Message` or None if the file is not saved or not available anymore.
+        """
+
+        doc = self.get(key)
+
+        for _ in range(2):
+            if doc is None:
+                return None
+
+            try:
+                return await self.__client.send_cached_media(chat_id,
+                                                             doc['file_id'],
+                                                             file_ref=doc['file_ref'],
+                                                             **kwargs)
+
+            except (FileReferenceExpired, FileReferenceEmpty):
+                doc = await self.refresh(key)
+
+            except (FileIdInvalid, MediaEmpty) as f_e:
+                LOG.error(f_e)
+                self.delete(key)
+                return None
+
+        return None
+
+
+def _get_media(message: BaseMessage) -> Optional[object]:
+    for media_type in MEDIA_TYPES:
+        media = getattr(message, media_type, None)
+
+        if media is not None:
+            return media
+
+    return None
@@ -0,0 +1,378 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import asyncio
+from typing import Dict, List, Tuple, Optional, Any, Callable
+
+from userge.utils import logging
+from .._database import get_collection
+from .base import BaseClient
+from .message import Message, CANCEL_LIST
+
+LOG = logging.getLogger(__name__)
+LOG_STR = "<<<!  |||||  ___{}___  |||||  !>>>"
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELED = "canceled"
+# restored jobs wait for the client before giving up
+RETRY_DELAY = 30
+MAX_RETRIES = 10
+
+
+class Job:
+    """
+    Transfer Job for Userge.
+    """
+
+    def __init__(self,
+                 id_: int,
+                 type_: str,
+                 args: Dict[str, Any],
+                 chat_id: int,
+                 message_id: int,
+                 priority: int = 0,
+                 status: str = QUEUED) -> None:
+
+        self.id = id_
+        self.type = type_
+        self.args = args
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.priority = priority
+        self.status = status
+        self.message: Optional[Message] = None
+        self.progress: Optional[float] = None
+        self.retries = 0
+
+    @property
+    def is_paused(self) -> bool:
+        """
+        Returns True if paused, runners can keep unfinished work to continue on resume.
+        """
+
+        return self.status == PAUSED
+
+    def set_progress(self, current: int, total: int) -> None:
+        """
+        Set progress percentage of job from done and total units (ex: bytes or files).
+        """
+
+        self.progress = current * 100 / total if total else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns `Dict` to save in database.
+        """
+
+        return {'_id': self.id,
+                'type': self.type,
+                'args': self.args,
+                'chat_id': self.chat_id,
+                'message_id': self.message_id,
+                'priority': self.priority,
+                'status': self.status}
+
+    @classmethod
+    def from_dict(cls, doc: Dict[str, Any]) -> 'Job':
+        """
+        Returns `Job` from database `Dict`.
+        """
+
+        return cls(doc['_id'], doc['type'], doc['args'], doc['chat_id'],
+                   doc['message_id'], doc['priority'], doc['status'])
+
+
+JOBFUNC = Callable[[Job, Message], Any]
+
+
+class JobQueue:
+    """
+    Persistent job queue with concurrency limits per job type.
+    """
+
+    def __init__(self, client: BaseClient) -> None:
+        self.__client = client
+        self.__collection = get_collection("jobs")
+        self.__runners: Dict[str, Tuple[JOBFUNC, int]] = {}
+        self.__jobs: Dict[int, Job] = {}
+        self.__started = False
+
+        last = self.__collection.find_one(sort=[('_id', -1)])
+        self.__next_id = last['_id'] + 1 if last else 1
+
+    def runner(self, type_: str, limit: int = 1) -> Callable[[JOBFUNC], JOBFUNC]:
+        """
+        Decorator for registering job runner.
+        Saved jobs of this type will be continued after the client is started.
+
+        Example:
+                @userge.jobs.runner('download', limit=2)
+
+        Parameters:
+            type_ (``str``):
+                type of job.
+            limit (``int``, *optional*):
+                max number of jobs of this type running at the same time.
+        """
+
+        def decorator(func: JOBFUNC) -> JOBFUNC:
+            LOG.info(
+                LOG_STR.format(f"Registering Job Runner => [ {type_} : {limit} ]"))
+
+            self.__runners[type_] = (func, limit)
+
+            if self.__started:
+                # plugin is loaded or reloaded after start
+                self.__restore({'type': type_})
+
+            return func
+
+        return decorator
+
+    def restore(self) -> None:
+        """
+        Continue saved jobs of registered runners. Called after the client is started.
+        """
+
+        self.__started = True
+        self.__restore({'type': {'$in': list(self.__runners)}})
+
+    def __restore(self, query: Dict[str, Any]) -> None:
+        for doc in self.__collection.find(query):
+            if doc['_id'] not in self.__jobs:
+                job = Job.from_dict(doc)
+
+                if job.status == RUNNING:
+                    job.status = QUEUED
+
+                LOG.info(
+                    LOG_STR.format(f"Restoring Job => [ #{job.id} : {job.type} ]"))
+
+                self.__jobs[job.id] = job
+
+        self.__schedule()
+
+    async def submit(self,
+                     type_: str,
+                     message: Message,
+                     args: Dict[str, Any],
+                     priority: int = 0) -> Job:
+        """
+        Add new job to the queue.
+
+        Parameters:
+            type_ (``str``):
+                type of job.
+            message (`Message`):
+                status message of this job.
+            args (``dict``):
+                arguments for job runner.
+            priority (``int``, *optional*):
+                jobs with higher priority run first.
+        Returns:
+            :obj:`Job`
+        """
+
+        job = Job(self.__next_id, type_, args, message.chat.id, message.message_id, priority)
+        job.message = message
+        self.__next_id += 1
+
+        self.__collection.insert_one(job.to_dict())
+        self.__jobs[job.id] = job
+
+        LOG.info(
+            LOG_STR.format(f"New Job => [ #{job.id} : {job.type} : {job.args} ]"))
+
+        self.__schedule()
+
+        if job.status == QUEUED:
+            await message.try_to_edit(
+                f"`Job #{job.id} ({job.type}) queued`\n\n__check__ `.jobs` __for status__")
+
+        return job
+
+    def get_jobs(self) -> List[Job]:
+        """
+        Returns all jobs.
+        """
+
+        return sorted(self.__jobs.values(), key=lambda x: (x.status != RUNNING,
+                                                           -x.priority, x.id))
+
+    def cancel(self, id_: int) -> bool:
+        """
+        Cancel job.
+        """
+
+        job = self.__jobs.get(id_)
+
+        if job is None:
+            return False
+
+        if job.status == RUNNING:
+            job.status = CANCELED
+
+            # message is None until a restored job loads it, runner is not called then
+            if job.message is not None:
+                job.message.cancel_the_process()
+
+        else:
+            self.__remove(job)
+
+        return True
+
+    def pause(self, id_: int) -> bool:
+        """
+        Pause job, running job will be stopped and started again when resumed.
+        """
+
+        job = self.__jobs.get(id_)
+
+        if job is None or job.status not in (QUEUED, RUNNING):
+            return False
+
+        if job.status == RUNNING and job.message is not None:
+            job.message.cancel_the_process()
+
+        job.status = PAUSED
+        self.__update(job)
+
+        return True
+
+    def resume(self, id_: int) -> bool:
+        """
+        Resume paused job.
+        """
+
+        job = self.__jobs.get(id_)
+
+        if job is None or job.status != PAUSED:
+            return False
+
+        if job.message is not None:
+            _pop_cancel(job.message)
+
+        job.status = QUEUED
+        self.__update(job)
+        self.__schedule()
+
+        return True
+
+    def set_priority(self, id_: int, priority: int) -> bool:
+        """
+        Change priority of job.
+        """
+
+        job = self.__jobs.get(id_)
+
+        if job is None:
+            return False
+
+        job.priority = priority
+        self.__update(job)
+        self.__schedule()
+
+        return True
+
+    def __update(self, job: Job) -> None:
+        self.__collection.update_one({'_id': job.id},
+                                     {"$set": {'priority': job.priority, 'status': job.status}})
+
+    def __remove(self, job: Job) -> None:
+        self.__jobs.pop(job.id, None)
+        self.__collection.delete_one({'_id': job.id})
+
+    def __schedule(self) -> None:
+        for type_, (func, limit) in self.__runners.items():
+            jobs = [job for job in self.__jobs.values() if job.type == type_]
+            running = len([job for job in jobs if job.status in (RUNNING, CANCELED)])
+            queued = sorted([job for job in jobs if job.status == QUEUED],
+                            key=lambda x: (-x.priority, x.id))
+
+            for job in queued[:max(limit - running, 0)]:
+                job.status = RUNNING
+                self.__update(job)
+
+                asyncio.ensure_future(self.__run(job, func))
+
+    async def __get_message(self, job: Job) -> Message:
+        msg = await self.__client.get_messages(job.chat_id, job.message_id)
+
+        if msg.empty:
+            return await self.__client.send_message(
+                job.chat_id, f"`Continuing Job #{job.id} ({job.type})...`")
+
+        return Message(self.__client, msg)
+
+    async def __run(self, job: Job, func: JOBFUNC) -> None:
+        LOG.info(
+            LOG_STR.format(f"Starting Job => [ #{job.id} : {job.type} ]"))
+
+        completed = False
+
+        try:
+            if job.message is None:
+                job.message = await self.__get_message(job)
+
+        except Exception as j_e:
+            LOG.exception(j_e)
+            job.retries += 1
+
+            # the job is not started yet, so keep it unless it can't be loaded at all
+            if job.retries < MAX_RETRIES:
+                await asyncio.sleep(RETRY_DELAY)
+
+                if job.status == RUNNING:
+                    job.status = QUEUED
+
+        else:
+            try:
+                # may be paused or canceled while loading the message
+                if job.status == RUNNING:
+                    await func(job, job.message)
+                    completed = True
+
+            except Exception as j_e:
+                LOG.exception(j_e)
+                await job.message.try_to_edit(f"**ERROR** in Job #{job.id} : `{j_e}`")
+
+        finally:
+            # cancel requests the runner didn't read would stop the next run
+            unread = job.message is not None and _pop_cancel(job.message)
+
+            if completed and unread:
+                # paused after the last check of the runner, so its work is done
+                self.__remove(job)
+
+            elif job.status in (PAUSED, QUEUED):
+                # canceled flag of the old message is set, so load it again on resume
+                job.message = None
+                job.progress = None
+                self.__update(job)
+
+            else:
+                self.__remove(job)
+
+            LOG.info(
+                LOG_STR.format(f"Finished Job => [ #{job.id} : {job.type} : {job.status} ]"))
+
+            self.__schedule()
+
+
+def _pop_cancel(message: Message) -> bool:
+    # returns True if there was a cancel request which was not read
+    found = False
+
+    while message.message_id in CANCEL_LIST:
+        CANCEL_LIST.remove(message.message_id)
+        found = True
+
+    return found
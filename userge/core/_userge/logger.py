@@ -7,6 +7,8 @@
 # All rights reserved.
 
 
+from typing import List
+
 from userge.utils import Config, logging
 from .base import BaseCLogger, BaseClient, BaseMessage
 
@@ -72,3 +74,33 @@ class CLogger(BaseCLogger):
                                                  message_ids=(message.message_id),
                                                  as_copy=as_copy,
                                                  remove_caption=remove_caption)
+
+    async def fwd_msgs(self,
+                       messages: List[BaseMessage],
+                       as_copy: bool = False,
+                       remove_caption: bool = False) -> None:
+        """
+        forward messages of the same chat (ex: album) to log channel with a single request.
+
+        Parameters:
+            messages (`List[pyrogram.Message]`):
+                pass list of pyrogram.Message objects which want to forward.
+            as_copy (`bool`, *optional*):
+                Pass True to forward messages without the forward header.
+                Defaults to False.
+            remove_caption (`bool`, *optional*):
+                If set to True and *as_copy* is enabled as well, media captions are not preserved.
+                Defaults to False.
+        Returns:
+            None
+        """
+
+        LOG.info(
+            LOG_STR.format(f"logging {len(messages)} msgs to channel : {Config.LOG_CHANNEL_ID}"))
+
+        if Config.LOG_CHANNEL_ID and messages:
+            await self.__client.forward_messages(chat_id=Config.LOG_CHANNEL_ID,
+                                                 from_chat_id=messages[0].chat.id,
+                                                 message_ids=[i.message_id for i in messages],
+                                                 as_copy=as_copy,
+                                                 remove_caption=remove_caption)
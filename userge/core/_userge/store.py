@@ -0,0 +1,219 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import shutil
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from userge.utils import Config, logging, hash_file
+from .._database import get_collection
+
+LOG = logging.getLogger(__name__)
+LOG_STR = "<<<!  %%%%%  ___{}___  %%%%%  !>>>"
+
+# next to DOWN_PATH, so folder uploads don't send the blobs again
+STORE_PATH = os.path.join(os.path.dirname(os.path.normpath(Config.DOWN_PATH)), ".store")
+
+
+class DownloadStore:
+    """
+    Content addressed store of downloaded files.
+
+    Every file is kept once as a blob named by its sha256, and downloaded
+    files are links to it. Blobs are found by keys (ex: file_unique_id or url)
+    and removed when the last link is released.
+    """
+
+    def __init__(self) -> None:
+        self.__collection = get_collection("store")
+
+    @staticmethod
+    def __blob_path(sha256: str) -> str:
+        return os.path.join(STORE_PATH, sha256[:2], sha256)
+
+    def get(self, key: str, file_path: str = '') -> Optional[str]:
+        """
+        Returns path of a link to the stored file of the key or None.
+
+        Parameters:
+            key (``str``):
+                key of the file.
+            file_path (``str``, *optional*):
+                path of the link, defaults to the stored name in Config.DOWN_PATH.
+        """
+
+        doc = self.__collection.find_one({'keys': key})
+
+        if doc is None:
+            return None
+
+        blob = self.__blob_path(doc['_id'])
+
+        if not os.path.isfile(blob):
+            self.__collection.delete_one({'_id': doc['_id']})
+            return None
+
+        file_path = os.path.abspath(file_path or os.path.join(Config.DOWN_PATH, doc['name']))
+
+        if os.path.exists(file_path):
+            if not os.path.samefile(file_path, blob):
+                # a different file has this name, download it again.
+                # downloaders replace the name, so the linked blob is not touched
+                return None
+
+        else:
+            _link(blob, file_path)
+
+        self.__collection.update_one({'_id': doc['_id']}, {"$addToSet": {'links': file_path}})
+
+        LOG.info(
+            LOG_STR.format(f"Found In Store => {key} : {file_path}"))
+
+        return file_path
+
+    async def add(self, file_path: str, key: str = '') -> str:
+        """
+        Move downloaded file to the store and replace it with a link.
+        If the same content is already stored, the file is removed and linked to it.
+
+        Parameters:
+            file_path (``str``):
+                path of the downloaded file.
+            key (``str``, *optional*):
+                key to find the file later.
+        Returns:
+            sha256 of the file.
+        """
+
+        file_path = os.path.abspath(file_path)
+        sha256 = await asyncio.get_event_loop().run_in_executor(None, hash_file, file_path)
+        blob = self.__blob_path(sha256)
+
+        if os.path.isfile(blob):
+            if not os.path.samefile(file_path, blob):
+                LOG.info(
+                    LOG_STR.format(f"Deduplicating File => {file_path} : {sha256}"))
+
+                os.remove(file_path)
+                _link(blob, file_path)
+
+        else:
+            if not os.path.isdir(os.path.dirname(blob)):
+                os.makedirs(os.path.dirname(blob))
+
+            try:
+                os.link(file_path, blob)
+
+            except OSError:
+                shutil.move(file_path, blob)
+                os.symlink(blob, file_path)
+
+        # the name may have linked other content before
+        self.__collection.update_many({'_id': {'$ne': sha256}, 'links': file_path},
+                                      {"$pull": {'links': file_path}})
+
+        update: Dict[str, Dict[str, object]] = {
+            "$setOnInsert": {'size': os.path.getsize(blob),
+                             'name': os.path.basename(file_path)},
+            "$addToSet": {'links': file_path}}
+
+        if key:
+            update["$addToSet"]['keys'] = key
+
+        self.__collection.update_one({'_id': sha256}, update, upsert=True)
+
+        return sha256
+
+    def release(self, file_path: str) -> bool:
+        """
+        Remove the link and the blob if nothing else links to it.
+        Returns False if the file is not in the store.
+        """
+
+        file_path = os.path.abspath(file_path)
+        doc = self.__collection.find_one_and_update({'links': file_path},
+                                                    {"$pull": {'links': file_path}},
+                                                    return_document=ReturnDocument.AFTER)
+
+        if doc is None:
+            return False
+
+        if os.path.lexists(file_path):
+            os.remove(file_path)
+
+        if not doc['links']:
+            self.__remove(doc['_id'])
+
+        return True
+
+    def prune(self) -> Tuple[int, int]:
+        """
+        Forget links which were removed or replaced on disk and remove unused blobs.
+        Returns number of removed blobs and freed bytes.
+        """
+
+        removed, freed = 0, 0
+
+        for doc in self.__collection.find():
+            blob = self.__blob_path(doc['_id'])
+            links = [i for i in doc['links']
+                     if os.path.isfile(blob) and os.path.exists(i) and os.path.samefile(i, blob)]
+
+            if links:
+                if links != doc['links']:
+                    self.__collection.update_one({'_id': doc['_id']}, {"$set": {'links': links}})
+
+                continue
+
+            self.__remove(doc['_id'])
+            removed += 1
+            freed += doc['size']
+
+        return removed, freed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns number of blobs and links, stored bytes and bytes saved by deduplication.
+        """
+
+        stats = {'blobs': 0, 'links': 0, 'size': 0, 'saved': 0}
+
+        for doc in self.__collection.find({}, {'size': 1, 'links': 1}):
+            stats['blobs'] += 1
+            stats['links'] += len(doc['links'])
+            stats['size'] += doc['size']
+            stats['saved'] += doc['size'] * max(len(doc['links']) - 1, 0)
+
+        return stats
+
+    def __remove(self, sha256: str) -> None:
+        blob = self.__blob_path(sha256)
+
+        LOG.info(
+            LOG_STR.format(f"Removing From Store => {sha256}"))
+
+        if os.path.isfile(blob):
+            os.remove(blob)
+
+        self.__collection.delete_one({'_id': sha256})
+
+
+def _link(blob: str, file_path: str) -> None:
+    if not os.path.isdir(os.path.dirname(file_path)):
+        os.makedirs(os.path.dirname(file_path))
+
+    try:
+        os.link(blob, file_path)
+
+    except OSError:
+        # hard links don't work across file systems
+        os.symlink(blob, file_path)
@@ -0,0 +1,298 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import time
+import struct
+import asyncio
+from mimetypes import guess_extension
+from typing import Any, AsyncGenerator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pyrogram.api import functions, types
+from pyrogram.client.ext import utils
+from pyrogram.errors import AuthBytesInvalid
+from pyrogram.session import Session, Auth
+
+from userge.utils import logging
+from .base import BaseClient, BaseMessage
+
+LOG = logging.getLogger(__name__)
+LOG_STR = "<<<!  :::::  ___{}___  :::::  !>>>"
+
+MEDIA_TYPES = ("audio", "document", "photo", "sticker",
+               "animation", "video", "voice", "video_note")
+# offset and limit of upload.GetFile must stay inside one 1 MB block
+PART_SIZE = 1024 * 1024
+PARALLEL_PARTS = 8
+EXTRA_SESSIONS = 1
+
+
+class FileInfo(NamedTuple):
+    """
+    Location and details of media file in Telegram.
+    """
+
+    dc_id: int
+    location: object
+    file_size: int
+    file_name: str
+    mime_type: str
+
+
+async def _maybe_await(value: Any) -> Any:
+    # storage methods are coroutines in newer pyrogram versions
+    if asyncio.iscoroutine(value):
+        return await value
+
+    return value
+
+
+class MediaStreamer:
+    """
+    Streams media of messages in parts, without saving it to a file.
+    """
+
+    def __init__(self, client: BaseClient) -> None:
+        self.__client = client
+        self.__extra_sessions: Dict[int, List[Session]] = {}
+        self.__lock = asyncio.Lock()
+
+    @staticmethod
+    def get_file_info(message: BaseMessage) -> FileInfo:
+        """
+        Returns :obj:`FileInfo` of media in the message.
+        Raises ValueError if there is no media to stream.
+        """
+
+        for media_type in MEDIA_TYPES:
+            media = getattr(message, media_type, None)
+
+            if media is not None:
+                break
+
+        else:
+            raise ValueError("This message doesn't contain any downloadable media")
+
+        decoded = utils.decode_file_id(media.file_id)
+        file_ref = utils.decode_file_ref(media.file_ref)
+
+        if decoded[0] == 2:
+            dc_id, file_id, access_hash, _, _, _, thumb_size, _ = \
+                struct.unpack("<iiqqqiiii", decoded)[1:]
+
+            location = types.InputPhotoFileLocation(id=file_id,
+                                                    access_hash=access_hash,
+                                                    file_reference=file_ref,
+                                                    thumb_size=chr(thumb_size))
+
+        elif decoded[0] in (3, 4, 5, 8, 9, 10, 13):
+            dc_id, file_id, access_hash = struct.unpack("<iiqq", decoded)[1:]
+
+            location = types.InputDocumentFileLocation(id=file_id,
+                                                       access_hash=access_hash,
+                                                       file_reference=file_ref,
+                                                       thumb_size="")
+
+        else:
+            raise ValueError(f"Unknown media type: {decoded[0]}")
+
+        mime_type = getattr(media, 'mime_type', None) or \
+            ("image/jpeg" if media_type == "photo" else "application/octet-stream")
+        file_name = getattr(media, 'file_name', None) or \
+            f"{media_type}_{int(time.time())}{guess_extension(mime_type) or ''}"
+
+        return FileInfo(dc_id, location, media.file_size or 0, file_name, mime_type)
+
+    async def __create_session(self, dc_id: int) -> Session:
+        client = self.__client
+
+        LOG.info(
+            LOG_STR.format(f"Creating Media Session => DC {dc_id}"))
+
+        if dc_id == await _maybe_await(client.storage.dc_id()):
+            session = Session(client, dc_id,
+                              await _maybe_await(client.storage.auth_key()), is_media=True)
+            await session.start()
+
+            return session
+
+        session = Session(client, dc_id, await Auth(client, dc_id).create(), is_media=True)
+        await session.start()
+
+        for _ in range(3):
+            exported_auth = await client.send(
+                functions.auth.ExportAuthorization(dc_id=dc_id))
+
+            try:
+                await session.send(
+                    functions.auth.ImportAuthorization(id=exported_auth.id,
+                                                       bytes=exported_auth.bytes))
+
+            except AuthBytesInvalid:
+                continue
+
+            else:
+                return session
+
+        await session.stop()
+        raise AuthBytesInvalid
+
+    async def get_session(self, dc_id: int, index: int = 0) -> Session:
+        """
+        Returns media session of the data center.
+        First one is the same session pyrogram uses, others are extra sessions
+        to spread parallel requests over more connections.
+        """
+
+        client = self.__client
+
+        if index == 0:
+            async with client.media_sessions_lock:
+                if dc_id not in client.media_sessions:
+                    client.media_sessions[dc_id] = await self.__create_session(dc_id)
+
+                return client.media_sessions[dc_id]
+
+        async with self.__lock:
+            sessions = self.__extra_sessions.setdefault(dc_id, [])
+
+            while len(sessions) < index:
+                sessions.append(await self.__create_session(dc_id))
+
+            return sessions[index - 1]
+
+    async def get_part(self,
+                       info: FileInfo,
+                       offset: int,
+                       limit: int = PART_SIZE,
+                       session_index: int = 0) -> bytes:
+        """
+        Returns `limit` bytes of the file from `offset`.
+        """
+
+        session = await self.get_session(info.dc_id, session_index)
+
+        response = await session.send(
+            functions.upload.GetFile(location=info.location, offset=offset, limit=limit))
+
+        if not isinstance(response, types.upload.File):
+            # cdn files need decryption, they are downloaded by pyrogram
+            raise ValueError("CDN files can't be streamed")
+
+        return response.bytes
+
+    async def stream(self,
+                     message: BaseMessage,
+                     offset: int = 0,
+                     parts: int = 1) -> AsyncGenerator[bytes, None]:
+        """
+        Yields media of the message part by part.
+
+        Parameters:
+            message (`pyrogram.Message`):
+                message which contains the media.
+            offset (``int``, *optional*):
+                start from this offset, must be a multiple of 1 MB.
+            parts (``int``, *optional*):
+                number of parts requested at the same time, parts are yielded in order.
+        """
+
+        info = self.get_file_info(message)
+        pending: List[asyncio.Future] = []
+
+        try:
+            while True:
+                while len(pending) < parts and (
+                        not info.file_size or offset < info.file_size or not pending):
+                    index = offset // PART_SIZE % (EXTRA_SESSIONS + 1) if parts > 1 else 0
+                    pending.append(asyncio.ensure_future(
+                        self.get_part(info, offset, session_index=index)))
+                    offset += PART_SIZE
+
+                chunk = await pending.pop(0)
+
+                if chunk:
+                    yield chunk
+
+                if len(chunk) < PART_SIZE:
+                    break
+
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def download(self,
+                       message: BaseMessage,
+                       file_path: str,
+                       progress: Optional[Callable[..., Any]] = None,
+                       progress_args: Tuple[Any, ...] = (),
+                       parts: int = PARALLEL_PARTS) -> str:
+        """
+        Download media of the message to `file_path` with parallel part requests.
+        Parts are written in place into a preallocated file.
+
+        Parameters:
+            message (`pyrogram.Message`):
+                message which contains the media.
+            file_path (``str``):
+                path of the new file.
+            progress (``callable``, *optional*):
+                called as await progress(current, total, *progress_args) for every part.
+            progress_args (``tuple``, *optional*):
+                extra args for progress callback.
+            parts (``int``, *optional*):
+                number of parts requested at the same time.
+        Returns:
+            path of the file.
+        """
+
+        info = self.get_file_info(message)
+        part_ids = iter(range((info.file_size + PART_SIZE - 1) // PART_SIZE))
+        temp_path = file_path + ".temp"
+        current = 0
+
+        LOG.info(
+            LOG_STR.format(f"Downloading In Parallel => {file_path} : {parts} parts"))
+
+        with open(temp_path, 'wb') as d_f:
+            d_f.truncate(info.file_size)
+
+        async def _worker(index: int) -> None:
+            nonlocal current
+
+            # the shared iterator gives every part to one worker only
+            for part_id in part_ids:
+                chunk = await self.get_part(info, part_id * PART_SIZE,
+                                            session_index=index % (EXTRA_SESSIONS + 1))
+
+                d_f.seek(part_id * PART_SIZE)
+                d_f.write(chunk)
+                current += len(chunk)
+
+                if progress:
+                    await progress(current, info.file_size, *progress_args)
+
+        try:
+            with open(temp_path, 'r+b') as d_f:
+                workers = [asyncio.ensure_future(_worker(i)) for i in range(parts)]
+
+                try:
+                    await asyncio.gather(*workers)
+
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        os.replace(temp_path, file_path)
+
+        return file_path
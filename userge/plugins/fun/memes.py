@@ -597,8 +597,6 @@ async def decide_(message: Message):
     else:
         r = requests.get(f"https://yesno.wtf/api").json()
 
-    path = wget.download(r["image"])
-
     chat_id = message.chat.id
     message_id = None
     if message.reply_to_message:
@@ -606,10 +604,20 @@ async def decide_(message: Message):
 
     await message.delete()
 
-    await userge.send_photo(chat_id=chat_id,
-                            photo=path,
-                            caption=str(r["answer"]).upper(),
-                            reply_to_message_id=message_id)
+    # same images are sent again by file_id
+    if await userge.files.send(chat_id, r["image"],
+                               caption=str(r["answer"]).upper(),
+                               reply_to_message_id=message_id):
+        return
+
+    path = wget.download(r["image"])
+
+    msg = await userge.send_photo(chat_id=chat_id,
+                                  photo=path,
+                                  caption=str(r["answer"]).upper(),
+                                  reply_to_message_id=message_id)
+
+    userge.files.save(r["image"], msg)
 
     os.remove(path)
 
@@ -7,42 +7,113 @@
 # All rights reserved.
 
 
-import asyncio
-import math
 import os
+import re
+import json
 import time
-from datetime import datetime
-from pySmartDL import SmartDL
-from userge import userge, Message, Config
-from userge.utils import progress, humanbytes
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from userge import userge, Message, Config, Job, get_collection
+from userge.utils import progress, Downloader, humanbytes
+from userge.utils.downloader import CONNECTIONS
+from userge.utils.splitter import SPLIT_EXT, SPLIT_PATH, append_part
 
 LOGGER = userge.getLogger(__name__)
+JOIN_WORKERS = 3
+DLCHAT_WORKERS = 3
+ALBUM_SIZE = 10
+DLCHAT_COLLECTION = get_collection("dlchat")
+# one document per downloaded file, big chats don't fit in one document
+DLCHAT_COLLECTION.create_index([('chat', 1), ('key', 1)], unique=True)
+MEDIA_TYPES = ("audio", "document", "photo", "sticker",
+               "animation", "video", "voice", "video_note")
 
 
 @userge.on_cmd("download", about="""\
 __download files to server__
 
+**Available Flags:**
+
+    `-c` : max connections for url downloads (default 4)
+    `-s` : only the replied media, not the whole album
+    `-f` : download again even if the file is in the store
+
 **Usage:**
 
     `.download [url | reply to telegram media]`
+    `.download [url] | [file name] | [size:bytes] [md5:hash] [sha256:hash]`
 
 **Example:**
 
-    `.download https://speed.hetzner.de/100MB.bin | testing upload.bin`""")
+    `.download https://speed.hetzner.de/100MB.bin | testing upload.bin`
+    `.download -c8 https://speed.hetzner.de/100MB.bin || size:104857600`""")
 async def down_load_media(message: Message):
-    await message.edit("Trying to Download...")
     if message.reply_to_message is not None:
+        args = {'reply_id': message.reply_to_message.message_id,
+                'album': '-s' not in message.flags,
+                'force': '-f' in message.flags}
+
+    elif message.filtered_input_str:
+        url, custom_file_name, verify = (
+            message.filtered_input_str.split("|", maxsplit=2) + ['', ''])[:3]
+        args = {'url': url.strip(),
+                'file_name': custom_file_name.strip(),
+                'verify': dict(i.split(':', maxsplit=1) for i in verify.split() if ':' in i),
+                'connections': int(message.flags.get('-c') or CONNECTIONS),
+                'force': '-f' in message.flags}
+
+    else:
+        await message.edit(
+            "Reply to a Telegram Media, to download it to local server.", del_in=3)
+        return
+
+    await userge.jobs.submit("download", message, args)
+
+
+@userge.jobs.runner("download", limit=2)
+async def _download(job: Job, message: Message):
+    await message.edit("Trying to Download...")
+    downloader: Optional[Downloader] = None
+
+    async def _progress(current: int, total: int, *args) -> None:
+        job.set_progress(current, total)
+
+        if job.is_paused and downloader is not None:
+            # keep the downloaded segments to continue on resume
+            downloader.pause()
+
+        await progress(current, total, *args)
+
+    if 'reply_id' in job.args:
         start_t = datetime.now()
         c_time = time.time()
 
-        the_real_download_location = await userge.download_media(
-            message=message.reply_to_message,
-            file_name=Config.DOWN_PATH,
-            progress=progress,
-            progress_args=(
-                "trying to download", userge, message, c_time
+        replied = await userge.get_messages(message.chat.id, job.args['reply_id'])
+
+        if replied.media_group_id and job.args.get('album', True):
+            await _download_album(job, message, replied)
+            return
+
+        key = _get_key(replied)
+        the_real_download_location = None
+
+        if key and not job.args.get('force'):
+            the_real_download_location = userge.store.get(key)
+
+        if the_real_download_location is None:
+            the_real_download_location = await userge.download_media(
+                message=replied,
+                file_name=Config.DOWN_PATH,
+                progress=_progress,
+                progress_args=(
+                    "trying to download", userge, message, c_time
+                )
             )
-        )
+
+            if the_real_download_location and key:
+                await userge.store.add(the_real_download_location, key)
         # await userge.send_chat_action(message.chat.id, "cancel")
 
         if message.process_is_canceled:
@@ -54,64 +125,463 @@ async def down_load_media(message: Message):
             await message.edit(
                 f"Downloaded to `{the_real_download_location}` in {ms} seconds", log=True)
 
-    elif message.input_str:
+    else:
         start_t = datetime.now()
-        url = message.input_str
-        custom_file_name = os.path.basename(url)
-
-        if "|" in url:
-            url, custom_file_name = url.split("|")
-            url = url.strip()
-            custom_file_name = custom_file_name.strip()
+        url = job.args['url']
 
-        download_file_path = os.path.join(Config.DOWN_PATH, custom_file_name)
-        downloader = SmartDL(url, download_file_path, progress_bar=False)
-        downloader.start(blocking=False)
         c_time = time.time()
+        downloader = Downloader(url,
+                                file_name=job.args['file_name'],
+                                connections=job.args['connections'],
+                                verify=job.args['verify'],
+                                progress=_progress,
+                                progress_args=(
+                                    f"trying to download\nURL: {url}", userge, message, c_time
+                                ))
+
+        download_file_path = None
+
+        if not job.args.get('force'):
+            download_file_path = userge.store.get(
+                url, os.path.join(Config.DOWN_PATH, job.args['file_name'])
+                if job.args['file_name'] else '')
+
+        try:
+            if download_file_path is None:
+                download_file_path = await downloader.start()
+
+                if download_file_path is not None:
+                    await userge.store.add(download_file_path, url)
+
+        except Exception as d_e:
+            LOGGER.exception(d_e)
+            await message.err(str(d_e) or "Something went wrong!", log=True)
+            return
 
-        while not downloader.isFinished():
-            total_length = downloader.filesize if downloader.filesize else None
-            downloaded = downloader.get_dl_size()
-            display_message = ""
-            now = time.time()
-            diff = now - c_time
-            percentage = downloader.get_progress() * 100
-            # speed = downloader.get_speed()
-            # elapsed_time = round(diff) * 1000
-
-            progress_str = "[{0}{1}]\nProgress: {2}%".format(
-                ''.join(["█" for i in range(math.floor(percentage / 5))]),
-                ''.join(["░" for i in range(20 - math.floor(percentage / 5))]),
-                round(percentage, 2))
-            estimated_total_time = downloader.get_eta(human=True)
-
-            try:
-                current_message = f"trying to download\n"
-                current_message += f"URL: {url}\n"
-                current_message += f"File Name: {custom_file_name}\n"
-                current_message += f"{progress_str}\n"
-                current_message += f"{humanbytes(downloaded)} of {humanbytes(total_length)}\n"
-                current_message += f"ETA: {estimated_total_time}"
-
-                if round(diff % 10.00) == 0 and current_message != display_message:
-                    await message.try_to_edit(text=current_message,
-                                              disable_web_page_preview=True)
-
-                    # display_message = current_message
-                    await asyncio.sleep(10)
-
-            except Exception as e:
-                LOGGER.info(e)
-
-        if os.path.exists(download_file_path):
+        if download_file_path is None:
+            await message.edit("`Process Paused!`" if job.is_paused else "`Process Canceled!`",
+                               del_in=5, log=True)
+
+        else:
             end_t = datetime.now()
             ms = (end_t - start_t).seconds
 
             await message.edit(f"Downloaded to `{download_file_path}` in {ms} seconds", log=True)
 
-        else:
-            await message.edit(f"`Something went wrong!`", del_in=3, log=True)
 
-    else:
+async def _download_album(job: Job, message: Message, replied: Message) -> None:
+    start_t = datetime.now()
+    c_time = time.time()
+
+    # albums have at most 10 messages with consecutive ids
+    ids = range(max(replied.message_id - ALBUM_SIZE + 1, 1), replied.message_id + ALBUM_SIZE)
+    msgs = [msg for msg in await userge.get_messages(message.chat.id, list(ids))
+            if not msg.empty and msg.media_group_id == replied.media_group_id]
+
+    path = os.path.join(Config.DOWN_PATH, f"album_{replied.media_group_id}")
+    current = {msg.message_id: 0 for msg in msgs}
+    total = sum(getattr(_get_media(msg)[1], 'file_size', 0) or 0 for msg in msgs)
+
+    async def _progress(cur: int, _: int, message_id: int) -> None:
+        current[message_id] = cur
+        job.set_progress(sum(current.values()), total)
+
+        await progress(sum(current.values()), total,
+                       f"trying to download album of {len(msgs)} files",
+                       userge, message, c_time)
+
+    async def _download(msg: Message) -> Optional[str]:
+        key = _get_key(msg)
+        name = getattr(_get_media(msg)[1], 'file_name', None)
+        file_path = None
+
+        if not job.args.get('force'):
+            file_path = userge.store.get(key, os.path.join(path, name) if name else '')
+
+        if file_path is None:
+            file_path = await userge.download_media(
+                message=msg, file_name=path + "/", progress=_progress,
+                progress_args=(msg.message_id,))
+
+            if file_path:
+                await userge.store.add(file_path, key)
+
+        return file_path
+
+    results = await asyncio.gather(*(_download(msg) for msg in msgs), return_exceptions=True)
+
+    if message.process_is_canceled:
+        await message.edit("`Process Canceled!`", del_in=5, log=True)
+        return
+
+    failed = [i for i in results if not isinstance(i, str)]
+
+    for f_e in failed:
+        if isinstance(f_e, Exception):
+            LOGGER.exception(f_e)
+
+    m_s = (datetime.now() - start_t).seconds
+    out = f"Downloaded album of {len(results) - len(failed)} files to `{path}` in {m_s} seconds"
+
+    if failed:
+        out += f"\n\n**Failed** : `{len(failed)}`"
+
+    await message.edit(out, log=True)
+
+
+@userge.on_cmd("join", about="""\
+__join a split file from telegram__
+
+    parts are downloaded in parallel, verified
+    and joined in order to the download path.
+
+**Usage:**
+
+    `.join [reply to split manifest file]`""")
+async def join_(message: Message):
+    replied = message.reply_to_message
+
+    if replied is None or replied.document is None \
+            or not (replied.document.file_name or '').endswith(SPLIT_EXT):
+        await message.err("reply to a split manifest file!")
+        return
+
+    await userge.jobs.submit("join", message, {'reply_id': replied.message_id})
+
+
+@userge.jobs.runner("join", limit=1)
+async def _join(job: Job, message: Message):
+    await message.edit("`Loading split manifest...`")
+
+    if not os.path.isdir(SPLIT_PATH):
+        os.makedirs(SPLIT_PATH)
+
+    replied = await userge.get_messages(message.chat.id, job.args['reply_id'])
+    manifest_path = await userge.download_media(replied, file_name=SPLIT_PATH + "/")
+
+    if not manifest_path:
+        await message.err("failed to download the split manifest!")
+        return
+
+    with open(manifest_path) as m_f:
+        manifest = json.load(m_f)
+
+    os.remove(manifest_path)
+
+    name, parts = manifest['name'], manifest['parts']
+    msgs = await userge.get_messages(message.chat.id, [i['message_id'] for i in parts])
+    slots = asyncio.Semaphore(JOIN_WORKERS)
+
+    async def _check(*_) -> None:
+        if message.process_is_canceled:
+            await userge.stop_transmission()
+
+    async def _download(msg) -> str:
+        async with slots:
+            return await userge.download_media(
+                msg, file_name=SPLIT_PATH + "/", progress=_check)
+
+    start_t = datetime.now()
+    tasks = [asyncio.ensure_future(_download(msg)) for msg in msgs]
+    file_path = os.path.join(Config.DOWN_PATH, name)
+    file_hash = hashlib.sha256()
+
+    # an old file of this name may be linked to the store
+    if os.path.lexists(file_path):
+        os.remove(file_path)
+
+    try:
+        with open(file_path, 'wb') as o_f:
+            for index, (part, task) in enumerate(zip(parts, tasks)):
+                part_path = await task
+
+                if message.process_is_canceled:
+                    raise Exception("Process Canceled!")
+
+                if not part_path:
+                    raise Exception(f"can't download {part['name']}")
+
+                try:
+                    # parts are joined while next ones are downloading
+                    _, digest = await asyncio.get_event_loop().run_in_executor(
+                        None, append_part, part_path, o_f, file_hash)
+
+                finally:
+                    os.remove(part_path)
+
+                if digest != part['sha256']:
+                    raise Exception(f"checksum mismatch in {part['name']}!")
+
+                job.set_progress(index + 1, len(parts))
+
+                await message.try_to_edit(
+                    f"__Joining__ `{name}`\n\n"
+                    f"**Parts** : `{index + 1}/{len(parts)}` "
+                    f"`({(index + 1) * 100 // len(parts)}%)`")
+
+        if file_hash.hexdigest() != manifest['sha256']:
+            raise Exception(f"checksum mismatch in {name}!")
+
+    except Exception as j_e:
+        LOGGER.exception(j_e)
+
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+        await message.err(str(j_e), log=True)
+        return
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # parts which were downloaded, but not joined
+        for part in parts:
+            for path in (os.path.join(SPLIT_PATH, part['name']),
+                         os.path.join(SPLIT_PATH, part['name'] + ".temp")):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    m_s = (datetime.now() - start_t).seconds
+
+    await message.edit(
+        f"Joined {len(parts)} parts to `{file_path}` in {m_s} seconds", log=True)
+
+
+def _get_media(msg: Message) -> Tuple[Optional[str], object]:
+    for media_type in MEDIA_TYPES:
+        media = getattr(msg, media_type, None)
+
+        if media is not None:
+            return media_type, media
+
+    return None, None
+
+
+def _get_key(msg: Message) -> Optional[str]:
+    _, media = _get_media(msg)
+
+    if media is None:
+        return None
+
+    # file_unique_id is the same for every copy of the file
+    return getattr(media, 'file_unique_id', None) or media.file_id
+
+
+@userge.on_cmd("dlchat", about="""\
+__download media of a chat to server__
+
+    history is read from newest to oldest and files are downloaded
+    in parallel to `DOWN_PATH/chat`, downloaded files are remembered
+    so running it again only downloads new files.
+
+**Available Flags:**
+
+    `-w` : number of parallel downloads (default 3)
+
+**Options:**
+
+    `from:id` `to:id` : message id range
+    `after:YYYY-MM-DD` `before:YYYY-MM-DD` : date range
+    `type:video,photo,...` : media types
+    `min:MB` `max:MB` : file size range
+    `| regex` : caption must match the regex
+
+**Usage:**
+
+    `.dlchat [flags] [chat] [options] | [caption regex]`
+
+**Example:**
+
+    `.dlchat -w5 @channel from:100 to:500 type:video,document min:10`
+    `.dlchat @channel after:2020-01-01 | (?i)lecture`""")
+async def dlchat_(message: Message):
+    query, _, caption = message.filtered_input_str.partition('|')
+    chat, *options = query.split() or ['']
+    options = dict(i.split(':', maxsplit=1) for i in options if ':' in i)
+
+    if not chat:
+        await message.err("chat not found!")
+        return
+
+    try:
+        args = {'chat': int(chat) if chat.lstrip('-').isdigit() else chat,
+                'from': int(options.get('from', 0)),
+                'to': int(options.get('to', 0)),
+                'after': int(datetime.strptime(options['after'], "%Y-%m-%d").timestamp())
+                         if 'after' in options else 0,
+                'before': int((datetime.strptime(options['before'], "%Y-%m-%d")
+                               + timedelta(days=1)).timestamp())
+                          if 'before' in options else 0,
+                'types': [i for i in options.get('type', '').split(',') if i],
+                'min': int(float(options.get('min', 0)) * 1024 * 1024),
+                'max': int(float(options.get('max', 0)) * 1024 * 1024),
+                'caption': caption.strip(),
+                'workers': int(message.flags.get('-w') or DLCHAT_WORKERS)}
+
+        if args['caption']:
+            re.compile(args['caption'])
+
+    except (ValueError, re.error) as d_e:
+        await message.err(f"invalid options : {d_e}")
+        return
+
+    unknown = [i for i in args['types'] if i not in MEDIA_TYPES]
+
+    if unknown:
+        await message.err(f"unknown media types : {unknown}")
+        return
+
+    await userge.jobs.submit("dlchat", message, args)
+
+
+@userge.jobs.runner("dlchat", limit=1)
+async def _dlchat(job: Job, message: Message):
+    args = job.args
+    await message.edit("`Reading chat history...`")
+
+    chat = await userge.get_chat(args['chat'])
+    path = os.path.join(Config.DOWN_PATH, str(chat.username or chat.id))
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    done = {doc['key'] for doc in DLCHAT_COLLECTION.find({'chat': chat.id}, {'key': 1})}
+    caption = re.compile(args['caption']) if args['caption'] else None
+    slots = asyncio.Semaphore(args['workers'])
+    tasks = set()
+    stats = {'found': 0, 'done': 0, 'skipped': 0, 'failed': 0, 'size': 0}
+    start_t = datetime.now()
+    last_t = time.time()
+
+    async def _check(*_) -> None:
+        if message.process_is_canceled:
+            await userge.stop_transmission()
+
+    async def _download(msg: Message, key: str, media: object) -> None:
+        file_name = getattr(media, 'file_name', None)
+
+        try:
+            # same names are common in chats, so keep the message id
+            file_path = await userge.download_media(
+                msg, file_name=os.path.join(path, f"{msg.message_id}_{file_name}")
+                if file_name else path + "/", progress=_check)
+
+            if file_path:
+                await userge.store.add(file_path, key)
+                done.add(key)
+                DLCHAT_COLLECTION.update_one(
+                    {'chat': chat.id, 'key': key},
+                    {"$setOnInsert": {'message_id': msg.message_id}}, upsert=True)
+                stats['done'] += 1
+                stats['size'] += media.file_size or 0
+
+        except Exception as d_e:
+            LOGGER.exception(d_e)
+            stats['failed'] += 1
+
+        finally:
+            slots.release()
+
+    def _status() -> str:
+        return (f"__Downloading media of__ `{chat.title or chat.first_name or chat.id}`\n\n"
+                f"**Found** : `{stats['found']}`\n"
+                f"**Downloaded** : `{stats['done']}` __({humanbytes(stats['size']) or '0 B'})__\n"
+                f"**Skipped** : `{stats['skipped']}`\n"
+                f"**Failed** : `{stats['failed']}`")
+
+    try:
+        async for msg in userge.iter_history(chat.id,
+                                             offset_id=args['to'] + 1 if args['to'] else 0,
+                                             offset_date=args['before']):
+            if message.process_is_canceled or msg.message_id < args['from'] \
+                    or msg.date < args['after']:
+                break
+
+            media_type, media = _get_media(msg)
+
+            if media is None or (args['types'] and media_type not in args['types']) \
+                    or (media.file_size or 0) < args['min'] \
+                    or (args['max'] and (media.file_size or 0) > args['max']) \
+                    or (caption and not caption.search(msg.caption or '')):
+                continue
+
+            stats['found'] += 1
+            key = _get_key(msg)
+
+            if key in done:
+                stats['skipped'] += 1
+                continue
+
+            await slots.acquire()
+
+            task = asyncio.ensure_future(_download(msg, key, media))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+            if time.time() - last_t > 5:
+                await message.try_to_edit(_status())
+                last_t = time.time()
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if message.process_is_canceled:
+        await message.edit("`Process Canceled!`\n\n" + _status(), log=True)
+        return
+
+    m_s = (datetime.now() - start_t).seconds
+
+    await message.edit(_status() + f"\n\n__to__ `{path}` __in {m_s} seconds__", log=True)
+
+
+@userge.on_cmd("dlstore", about="""\
+__manage store of downloaded files__
+
+    downloaded files are kept once by content and linked to their names,
+    so the same media or url is not downloaded and stored again.
+
+**Available Flags:**
+
+    `-p` : remove stored files which are not linked anymore
+    `-d` : delete downloaded file and free its space if not used elsewhere
+
+**Usage:**
+
+    `.dlstore`
+    `.dlstore -p`
+    `.dlstore -d [file path]`""")
+async def dlstore_(message: Message):
+    if '-p' in message.flags:
+        removed, freed = userge.store.prune()
+
         await message.edit(
-            "Reply to a Telegram Media, to download it to local server.", del_in=3)
+            f"**Removed** : `{removed}` __files ({humanbytes(freed) or '0 B'})__", log=True)
+        return
+
+    if '-d' in message.flags:
+        if not message.filtered_input_str:
+            await message.err("file path not found!")
+
+        elif userge.store.release(message.filtered_input_str):
+            await message.edit(f"`{message.filtered_input_str}` deleted", del_in=5, log=True)
+
+        else:
+            await message.err("file is not in the store!")
+
+        return
+
+    stats = userge.store.stats()
+
+    await message.edit(
+        "**--Download Store--**\n\n"
+        f"**Files** : `{stats['blobs']}`\n"
+        f"**Links** : `{stats['links']}`\n"
+        f"**Size** : `{humanbytes(stats['size']) or '0 B'}`\n"
+        f"**Saved** : `{humanbytes(stats['saved']) or '0 B'}`")
@@ -9,35 +9,310 @@
 
 import os
 import io
+import re
 import time
 import math
 import pickle
+import aiohttp
+import shutil
+import hashlib
 import asyncio
-from json import dumps
+from json import dumps, loads
+import threading
 from threading import Thread
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from mimetypes import guess_type
 from httplib2 import Http
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document, DISCOVERY_URI
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaUpload
 from oauth2client.client import OAuth2WebServerFlow
 from oauth2client.client import HttpAccessTokenRefreshError, FlowExchangeError
-from userge import userge, Message, Config, get_collection
-from userge.utils import humanbytes, time_formatter
+from pymongo import DeleteOne, ReplaceOne
+from userge import userge, Message, Config, Job, get_collection
+from userge.utils import humanbytes, time_formatter, get_file_name, hash_file
 
 CREDS: object = None
 AUTH_FLOW: object = None
 PARENT_ID = ""
+DISCOVERY_DOC: Optional[str] = None
 
 OAUTH_SCOPE = "https://www.googleapis.com/auth/drive"
 REDIRECT_URI = "urn:ietf:wg:oauth:2.0:oob"
 G_DRIVE_DIR_MIME_TYPE = "application/vnd.google-apps.folder"
 G_DRIVE_FILE_LINK = "📄 <a href='https://drive.google.com/open?id={}'>{}</a> __({})__"
 G_DRIVE_FOLDER_LINK = "📁 <a href='https://drive.google.com/drive/folders/{}'>{}</a> __(folder)__"
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+G_DRIVE_WORKERS = 4
+G_DRIVE_RETRIES = 5
+G_DRIVE_BATCH_SIZE = 100
+MAX_BACKOFF = 64
+# chunks of all transfers are kept in memory, so their total size is limited
+G_DRIVE_MEMORY_BUDGET = 128 * 1024 * 1024
+CHUNK_ALIGN = 256 * 1024
+MIN_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 100 * 1024 * 1024
+CHUNK_TARGET_TIME = 5
+# mirrors keep two chunks in memory, one uploading and one downloading
+STREAM_CHUNK_SIZE = 16 * 1024 * 1024
 
 LOG = userge.getLogger(__name__)
 GDRIVE_COLLECTION = get_collection("gdrive")
+INDEX_COLLECTION = get_collection("gdrive_index")
+INDEX_TOKEN_ID = "index_token"
+INDEX_FIELDS = "id, name, parents, size, md5Checksum, mimeType, modifiedTime"
+
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+
+
+def _is_expiring(creds: object) -> bool:
+    return creds.token_expiry is None or \
+        creds.token_expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN
+
+
+def _is_rate_limited(h_e: HttpError) -> bool:
+    return h_e.resp.status == 429 or (
+        h_e.resp.status == 403 and b'ateLimitExceeded' in (h_e.content or b''))
+
+
+def _get_session_offset(http: Http,
+                        uri: str,
+                        size: int) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    # returns committed offset of the upload session and the response if it is finished,
+    # offset is None if the session is expired
+    resp, content = http.request(uri, method='PUT', headers={
+        'Content-Length': '0', 'Content-Range': f"bytes */{size}"})
+
+    if resp.status in (200, 201):
+        return size, loads(content)
+
+    if resp.status == 308:
+        range_ = resp.get('range')
+
+        return int(range_.split('-')[1]) + 1 if range_ else 0, None
+
+    if resp.status in (404, 410):
+        return None, None
+
+    raise HttpError(resp, content, uri=uri)
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class _ChunkSizer:
+    """
+    Chooses chunk size of a transfer from its speed.
+    Starts small and grows while the transfer is fast, but chunks of all
+    transfers together never exceed `G_DRIVE_MEMORY_BUDGET`.
+    """
+
+    _used = 0
+    _cond = threading.Condition()
+
+    def __init__(self) -> None:
+        self.__size = MIN_CHUNK_SIZE
+        self.__reserved = 0
+        self.__start_t = 0.0
+
+    def acquire(self) -> int:
+        """
+        Reserve memory for the next chunk and returns its size.
+        """
+
+        with self._cond:
+            while G_DRIVE_MEMORY_BUDGET - _ChunkSizer._used < MIN_CHUNK_SIZE:
+                self._cond.wait()
+
+            size = min(self.__size, G_DRIVE_MEMORY_BUDGET - _ChunkSizer._used)
+            # resumable uploads only accept multiples of 256 KB
+            size -= size % CHUNK_ALIGN
+            _ChunkSizer._used += size
+
+        self.__reserved = size
+        self.__start_t = time.time()
+
+        return size
+
+    def release(self, done: int) -> None:
+        """
+        Free memory of the last chunk and adapt size to its speed.
+        """
+
+        diff = time.time() - self.__start_t
+
+        with self._cond:
+            _ChunkSizer._used -= self.__reserved
+            self._cond.notify_all()
+
+        self.__reserved = 0
+
+        if done > 0 and diff > 0:
+            self.__size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, self.__size * 2,
+                                                  int(done / diff * CHUNK_TARGET_TIME)))
+
+
+class _StreamBuffer:
+    """
+    Bounded buffer between a download and a Drive upload.
+    Data before the last requested offset is dropped, so memory stays constant.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.__capacity = capacity
+        self.__data = bytearray()
+        self.__base = 0
+        self.__eof = False
+        self.__error: Optional[Exception] = None
+        self.__cond = threading.Condition()
+
+    @property
+    def written(self) -> int:
+        """
+        Returns number of bytes written to the buffer.
+        """
+
+        return self.__base + len(self.__data)
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Add chunk to the buffer, waits while the buffer is full.
+        """
+
+        with self.__cond:
+            while len(self.__data) + len(chunk) > self.__capacity and self.__error is None:
+                self.__cond.wait()
+
+            if self.__error is not None:
+                raise self.__error
+
+            self.__data += chunk
+            self.__cond.notify_all()
+
+    def read(self, begin: int, length: int) -> bytes:
+        """
+        Returns `length` bytes from `begin`, waits until they are written.
+        """
+
+        with self.__cond:
+            # uploads never go back before the committed offset
+            if begin > self.__base:
+                del self.__data[:begin - self.__base]
+                self.__base = begin
+                self.__cond.notify_all()
+
+            while self.written < begin + length and not self.__eof and self.__error is None:
+                self.__cond.wait()
+
+            if self.__error is not None:
+                raise self.__error
+
+            return bytes(self.__data[begin - self.__base:begin - self.__base + length])
+
+    def close(self, error: Optional[Exception] = None) -> None:
+        """
+        Mark end of data, or stop both sides with the error.
+        """
+
+        with self.__cond:
+            if error is None:
+                self.__eof = True
+
+            else:
+                self.__error = error
+
+            self.__cond.notify_all()
+
+
+class _StreamUpload(MediaUpload):
+    """
+    Resumable upload which reads the content from :obj:`_StreamBuffer`.
+    """
+
+    def __init__(self, buffer: _StreamBuffer, mimetype: str, size: int) -> None:
+        super().__init__()
+        self.__buffer = buffer
+        self.__mimetype = mimetype
+        self.__size = size
+
+    def chunksize(self) -> int:
+        return STREAM_CHUNK_SIZE
+
+    def mimetype(self) -> str:
+        return self.__mimetype
+
+    def size(self) -> int:
+        return self.__size
+
+    def resumable(self) -> bool:
+        return True
+
+    def getbytes(self, begin: int, length: int) -> bytes:
+        return self.__buffer.read(begin, length)
+
+    def has_stream(self) -> bool:
+        return False
+
+
+async def _feed(buffer: _StreamBuffer, chunks: AsyncIterator[bytes]) -> None:
+    loop = asyncio.get_event_loop()
+
+    try:
+        async for chunk in chunks:
+            # waits in a thread while the upload is behind
+            await loop.run_in_executor(None, buffer.write, chunk)
+
+    except ProcessCanceled:
+        return
+
+    except Exception as f_e:
+        LOG.exception(f_e)
+        buffer.close(f_e)
+        return
+
+    buffer.close()
+
+
+def _to_index_doc(file_: Dict[str, Any]) -> Dict[str, Any]:
+    return {'_id': file_['id'],
+            'name': file_['name'],
+            'parents': file_.get('parents', []),
+            'size': int(file_.get('size', 0)),
+            'md5': file_.get('md5Checksum'),
+            'mime': file_['mimeType'],
+            'modified': file_.get('modifiedTime', '')}
+
+
+def _get_service() -> object:
+    """
+    Returns drive service of the current thread.
+    httplib2 is not thread safe, so every thread keeps its own service
+    and reuses the connections of it.
+    """
+    global DISCOVERY_DOC
+
+    if getattr(_LOCAL, 'creds', None) is not CREDS:
+        with _LOCK:
+            if DISCOVERY_DOC is None:
+                resp, content = Http().request(
+                    DISCOVERY_URI.format(api="drive", apiVersion="v3"))
+
+                if resp.status == 200:
+                    DISCOVERY_DOC = content.decode()
+
+        if DISCOVERY_DOC is None:
+            _LOCAL.service = build("drive", "v3", credentials=CREDS, cache_discovery=False)
+
+        else:
+            _LOCAL.service = build_from_document(DISCOVERY_DOC, credentials=CREDS)
+
+        _LOCAL.creds = CREDS
+
+    return _LOCAL.service
 
 
 class ProcessCanceled(Exception):
@@ -61,7 +336,9 @@ class DBase:
             result = GDRIVE_COLLECTION.find_one({'_id': self.__id}, {'creds': 1})
             CREDS = pickle.loads(result['creds']) if result else None
 
-        if CREDS:
+        # authorized http refreshes expired tokens by itself,
+        # so only refresh here when the token is about to expire
+        if CREDS and _is_expiring(CREDS):
             try:
                 LOG.info("Refreshing Creds...")
                 CREDS.refresh(Http())
@@ -106,9 +383,16 @@ class GDrive(DBase):
         self.__completed = 0
         self.__list = 1
         self.__progress = None
+        self.__percentage: Optional[float] = None
         self.__output = None
         self.__is_canceled = False
         self.__is_finished = False
+        self.__lock = threading.Lock()
+        self.__transferred = 0
+        self.__total_size = 0
+        self.__failed: List[str] = []
+        self.__delay = 0
+        self.__start_t = time.time()
 
         LOG.info("Setting GDrive...")
         super().__init__(id_)
@@ -131,13 +415,17 @@ class GDrive(DBase):
     def _progress(self) -> str:
         return self.__progress
 
+    @property
+    def _percentage(self) -> Optional[float]:
+        return self.__percentage
+
     @property
     def _output(self) -> str:
         return self.__output
 
     @property
     def __service(self) -> object:
-        return build("drive", "v3", credentials=CREDS, cache_discovery=False)
+        return _get_service()
 
     @userge.new_thread
     def _search(self,
@@ -149,6 +437,9 @@ class GDrive(DBase):
         force = '-f' in flags
         pid = parent_id or self._parent_id
 
+        if GDRIVE_COLLECTION.find_one({'_id': INDEX_TOKEN_ID}):
+            return self.__search_index(search_query, flags, parent_id, list_root)
+
         if pid and not force:
             query = f"'{pid}' in parents and (name contains '{search_query}')"
         else:
@@ -207,6 +498,250 @@ class GDrive(DBase):
 
         return out + f"**Limit** : `{limit}`\n\n__Results__ : \n\n" + msg
 
+    def __search_index(self,
+                       search_query: str,
+                       flags: list,
+                       parent_id: str = "",
+                       list_root: bool = False) -> str:
+
+        self.__sync_index()
+
+        force = '-f' in flags
+        pid = parent_id or self._parent_id
+        limit = int(flags.get('-l', 20))
+        query: Dict[str, Any] = {}
+
+        if search_query != '*':
+            pattern = search_query if '-r' in flags else re.escape(search_query)
+
+            try:
+                re.compile(pattern)
+
+            except re.error:
+                return "`Invalid regex!`"
+
+            query['name'] = {"$regex": pattern, "$options": 'i'}
+
+        if pid and not force:
+            query['parents'] = pid
+
+        paths: Dict[str, str] = {}
+        msg = ""
+
+        for doc in INDEX_COLLECTION.find(query).sort('modified', -1).limit(limit):
+            msg += self.__index_link(doc)
+
+            if not (parent_id or list_root) or force:
+                msg += f"\n    `{self.__index_path(doc, paths)}`"
+
+            msg += '\n'
+
+        if not msg:
+            return "`Not Found!`"
+
+        elif parent_id and not force:
+            out = f"**List GDrive Folder** : `{parent_id}`\n"
+
+        elif list_root and not force:
+            out = f"**List GDrive Root Folder** : `{self._parent_id}`\n"
+
+        else:
+            out = f"**GDrive Search Query** : `{search_query}`\n"
+
+        return out + f"**Limit** : `{limit}` __(index)__\n\n__Results__ : \n\n" + msg
+
+    @staticmethod
+    def __index_link(doc: Dict[str, Any]) -> str:
+        if doc['mime'] == G_DRIVE_DIR_MIME_TYPE:
+            return G_DRIVE_FOLDER_LINK.format(doc['_id'], doc['name'])
+
+        return G_DRIVE_FILE_LINK.format(doc['_id'], doc['name'], humanbytes(doc['size']))
+
+    @staticmethod
+    def __index_path(doc: Dict[str, Any], paths: Dict[str, str]) -> str:
+        """
+        Returns folder path of the indexed file, parents are cached in `paths`.
+        """
+
+        names = []
+        parents = doc['parents']
+
+        while parents and parents[0] not in paths:
+            parent = INDEX_COLLECTION.find_one({'_id': parents[0]}, {'name': 1, 'parents': 1})
+
+            if parent is None:
+                # root folder or a folder shared with us
+                paths[parents[0]] = ""
+                break
+
+            names.append((parents[0], parent['name']))
+            parents = parent['parents']
+
+        path = paths[parents[0]] if parents else ""
+
+        for file_id, name in reversed(names):
+            path += "/" + name
+            paths[file_id] = path
+
+        return path + "/" + doc['name']
+
+    def __sync_index(self) -> int:
+        """
+        Apply changes since the last sync to the index and returns number of changes.
+        """
+
+        tokens = GDRIVE_COLLECTION.find_one({'_id': INDEX_TOKEN_ID})
+        # changes of shared drives are only listed with their driveId
+        count = self.__sync_changes('token', tokens['token'])
+
+        for drive_id, token in tokens.get('drives', {}).items():
+            count += self.__sync_changes(f'drives.{drive_id}', token, drive_id)
+
+        LOG.info(f"Synced Google-Drive Index : {count} changes")
+
+        return count
+
+    def __sync_changes(self, token_key: str, page_token: str, drive_id: str = '') -> int:
+        fields = "nextPageToken, newStartPageToken, " + \
+            f"changes(changeType, fileId, removed, file({INDEX_FIELDS}, trashed))"
+        kwargs = {'driveId': drive_id} if drive_id else {}
+        count = 0
+
+        while page_token:
+            response = self.__service.changes().list(
+                pageToken=page_token, pageSize=1000, spaces='drive', fields=fields,
+                supportsAllDrives=True, includeItemsFromAllDrives=True, **kwargs).execute(
+                    num_retries=G_DRIVE_RETRIES)
+
+            requests = []
+
+            for change in response.get('changes', []):
+                if change.get('changeType') == 'drive':
+                    continue
+
+                file_ = change.get('file')
+
+                if change.get('removed') or file_ is None or file_.get('trashed'):
+                    requests.append(DeleteOne({'_id': change['fileId']}))
+
+                else:
+                    requests.append(ReplaceOne({'_id': file_['id']},
+                                               _to_index_doc(file_), upsert=True))
+
+            if requests:
+                INDEX_COLLECTION.bulk_write(requests, ordered=True)
+                count += len(requests)
+
+            if 'newStartPageToken' in response:
+                GDRIVE_COLLECTION.update_one(
+                    {'_id': INDEX_TOKEN_ID},
+                    {"$set": {token_key: response['newStartPageToken']}})
+
+            page_token = response.get('nextPageToken')
+
+        return count
+
+    def __list_drives(self) -> List[str]:
+        drives: List[str] = []
+        page_token = None
+
+        while True:
+            response = self.__service.drives().list(
+                fields="nextPageToken, drives(id)", pageSize=100,
+                pageToken=page_token).execute(num_retries=G_DRIVE_RETRIES)
+
+            drives.extend(i['id'] for i in response.get('drives', []))
+            page_token = response.get('nextPageToken')
+
+            if page_token is None:
+                return drives
+
+    @userge.new_thread
+    def _build_index(self) -> int:
+
+        # changes after these tokens are applied by the next sync
+        token = self.__service.changes().getStartPageToken(
+            supportsAllDrives=True).execute(num_retries=G_DRIVE_RETRIES)['startPageToken']
+        drives = {}
+
+        for drive_id in self.__list_drives():
+            drives[drive_id] = self.__service.changes().getStartPageToken(
+                supportsAllDrives=True, driveId=drive_id).execute(
+                    num_retries=G_DRIVE_RETRIES)['startPageToken']
+
+        INDEX_COLLECTION.delete_many({})
+        page_token = None
+        count = 0
+
+        while True:
+            response = self.__service.files().list(
+                supportsAllDrives=True, includeItemsFromAllDrives=True,
+                q="trashed = false", spaces='drive', corpora='allDrives',
+                fields=f"nextPageToken, files({INDEX_FIELDS})", pageSize=1000,
+                pageToken=page_token).execute(num_retries=G_DRIVE_RETRIES)
+
+            files = response.get('files', [])
+
+            if files:
+                INDEX_COLLECTION.insert_many([_to_index_doc(i) for i in files])
+                count += len(files)
+
+            page_token = response.get('nextPageToken')
+
+            if page_token is None:
+                break
+
+        INDEX_COLLECTION.create_index('parents')
+        INDEX_COLLECTION.create_index('md5')
+        GDRIVE_COLLECTION.update_one(
+            {'_id': INDEX_TOKEN_ID}, {"$set": {'token': token, 'drives': drives}}, upsert=True)
+
+        LOG.info(f"Built Google-Drive Index : {count} files")
+
+        return count
+
+    @userge.new_thread
+    def _sync_index(self) -> int:
+
+        return self.__sync_index()
+
+    @userge.new_thread
+    def _query_index(self, flags: list) -> str:
+
+        self.__sync_index()
+
+        limit = int(flags.get('-l', 20))
+        paths: Dict[str, str] = {}
+        msg = ""
+
+        if '-b' in flags:
+            out = "**Largest Files**"
+
+            for doc in INDEX_COLLECTION.find(
+                    {'mime': {"$ne": G_DRIVE_DIR_MIME_TYPE}}).sort('size', -1).limit(limit):
+                msg += self.__index_link(doc) + f"\n    `{self.__index_path(doc, paths)}`\n"
+
+        else:
+            out = "**Duplicate Files**"
+
+            for group in INDEX_COLLECTION.aggregate([
+                    {"$match": {'md5': {"$ne": None}}},
+                    {"$group": {'_id': "$md5", 'ids': {"$push": "$_id"},
+                                'size': {"$first": "$size"}, 'count': {"$sum": 1}}},
+                    {"$match": {'count': {"$gt": 1}}},
+                    {"$sort": {'size': -1}},
+                    {"$limit": limit}], allowDiskUse=True):
+
+                for doc in INDEX_COLLECTION.find({'_id': {"$in": group['ids']}}):
+                    msg += self.__index_link(doc) + f"\n    `{self.__index_path(doc, paths)}`\n"
+
+                msg += '\n'
+
+        if not msg:
+            return "`Not Found!`"
+
+        return out + f"\n**Limit** : `{limit}`\n\n__Results__ : \n\n" + msg
+
     def __set_permission(self, file_id: str) -> None:
 
         permissions = {'role': 'reader', 'type': 'anyone'}
@@ -216,7 +751,14 @@ class GDrive(DBase):
 
         LOG.info(f"Set Permission : {permissions} for Google-Drive File : {file_id}")
 
-    def __upload_file(self, file_path: str, parent_id: str) -> str:
+    def __upload_file(self,
+                      file_path: str,
+                      parent_id: str,
+                      is_root: bool = True,
+                      file_id: str = '') -> str:
+        """
+        Upload new file to the parent or new content to the file of `file_id`.
+        """
 
         if self._is_canceled:
             raise ProcessCanceled
@@ -224,39 +766,119 @@ class GDrive(DBase):
         mime_type = guess_type(file_path)[0] or "text/plain"
         file_name = os.path.basename(file_path)
         body = {"name": file_name, "mimeType": mime_type, "description": "Uploaded using Userge"}
+        is_update = bool(file_id)
 
-        if parent_id:
+        if parent_id and not is_update:
             body["parents"] = [parent_id]
 
-        if os.path.getsize(file_path) == 0:
-            media_body = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
+        def _create(**kwargs) -> object:
+            if is_update:
+                return self.__service.files().update(fileId=file_id, body=body,
+                                                     fields='id, name, size',
+                                                     supportsTeamDrives=True, **kwargs)
 
-            u_file_obj = self.__service.files().create(body=body, media_body=media_body,
-                                                       supportsTeamDrives=True).execute()
-            file_id = u_file_obj.get("id")
+            return self.__service.files().create(body=body, fields='id, name, size',
+                                                 supportsTeamDrives=True, **kwargs)
+
+        if os.path.getsize(file_path) == 0:
+            response = _create(media_body=MediaFileUpload(
+                file_path, mimetype=mime_type, resumable=False)).execute(
+                    num_retries=G_DRIVE_RETRIES)
 
         else:
-            media_body = MediaFileUpload(file_path, mimetype=mime_type,
-                                         chunksize=100*1024*1024, resumable=True)
 
-            u_file_obj = self.__service.files().create(body=body, media_body=media_body,
-                                                       supportsTeamDrives=True)
+            stat = os.stat(file_path)
+            stat_key = [stat.st_size, stat.st_mtime_ns]
+            session_id = "upload_" + hashlib.md5(
+                f"{os.path.abspath(file_path)}:{parent_id}".encode()).hexdigest()
+            session = GDRIVE_COLLECTION.find_one({'_id': session_id})
 
-            c_time = time.time()
+            u_file_obj = _create(media_body=MediaFileUpload(
+                file_path, mimetype=mime_type, chunksize=MIN_CHUNK_SIZE, resumable=True))
             response = None
+            resumed = 0
+
+            if session and session['stat'] == stat_key:
+                resumed, response = _get_session_offset(
+                    u_file_obj.http, session['uri'], stat.st_size)
+
+                if resumed is None:
+                    LOG.info(f"Upload Session Expired : {file_path}")
+                    GDRIVE_COLLECTION.delete_one({'_id': session_id})
+                    resumed = 0
+
+                else:
+                    LOG.info(f"Resuming Upload : {file_path} from {resumed}")
+
+                    u_file_obj.resumable_uri = session['uri']
+                    u_file_obj.resumable_progress = resumed
+
+                    if response is not None:
+                        # finished before the session was removed
+                        GDRIVE_COLLECTION.delete_one({'_id': session_id})
+
+            c_time = time.time()
+            sizer = _ChunkSizer()
+            uploaded = 0
 
             while response is None:
-                status, response = u_file_obj.next_chunk()
+                # pylint: disable=protected-access
+                u_file_obj.resumable._chunksize = sizer.acquire()
+                before = u_file_obj.resumable_progress
+                done = 0
+
+                try:
+                    status, response = u_file_obj.next_chunk(num_retries=G_DRIVE_RETRIES)
+                    done = (stat.st_size if response else u_file_obj.resumable_progress) - before
+
+                except HttpError as h_e:
+                    status_code = int(h_e.resp.status)
+
+                    if status_code >= 500 or status_code == 429:
+                        # session can be continued next time
+                        raise
+
+                    GDRIVE_COLLECTION.delete_one({'_id': session_id})
+
+                    if status_code not in (404, 410) or not u_file_obj.resumable_uri:
+                        raise
+
+                    # session is expired, start again
+                    LOG.info(f"Upload Session Expired : {file_path}")
+                    resumed = 0
+                    u_file_obj = _create(media_body=MediaFileUpload(
+                        file_path, mimetype=mime_type, chunksize=MIN_CHUNK_SIZE, resumable=True))
+                    continue
+
+                finally:
+                    sizer.release(done)
+
+                if response is None:
+                    session = {'stat': stat_key,
+                               'uri': u_file_obj.resumable_uri,
+                               'offset': u_file_obj.resumable_progress}
+                    GDRIVE_COLLECTION.update_one(
+                        {'_id': session_id}, {"$set": session}, upsert=True)
+
+                else:
+                    GDRIVE_COLLECTION.delete_one({'_id': session_id})
 
                 if self._is_canceled:
+                    # canceled session is not continued
+                    GDRIVE_COLLECTION.delete_one({'_id': session_id})
                     raise ProcessCanceled
 
-                if status:
+                if not is_root:
+                    current = status.resumable_progress if status else os.path.getsize(file_path)
+                    self.__add_transferred(current - uploaded, "Uploading to")
+                    uploaded = current
+
+                elif status:
                     f_size = status.total_size
                     diff = time.time() - c_time
                     uploaded = status.resumable_progress
                     percentage = uploaded / f_size * 100
-                    speed = round(uploaded / diff, 2)
+                    speed = round((uploaded - resumed) / diff, 2) or 1
                     eta = round((f_size - uploaded) / speed)
 
                     tmp = \
@@ -269,6 +891,7 @@ class GDrive(DBase):
                         "**Speed** : `{}/s`\n" + \
                         "**ETA** : `{}`"
 
+                    self.__percentage = percentage
                     self.__progress = tmp.format(
                         "".join(["█" for i in range(math.floor(percentage / 5))]),
                         "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
@@ -281,19 +904,16 @@ class GDrive(DBase):
                         humanbytes(speed),
                         time_formatter(eta))
 
-            file_id = response.get("id")
+        file_id = response.get('id')
+        file_name = response.get("name")
+        file_size = humanbytes(int(response.get('size', 0)))
 
-        if not Config.G_DRIVE_IS_TD:
+        # files in a folder are shared with the folder
+        if is_root and not is_update and not Config.G_DRIVE_IS_TD:
             self.__set_permission(file_id)
 
-        self.__completed += 1
-
-        drive_file = self.__service.files().get(fileId=file_id, fields='id, name, size',
-                                                supportsTeamDrives=True).execute()
-
-        file_id = drive_file.get('id')
-        file_name = drive_file.get("name")
-        file_size = humanbytes(int(drive_file.get('size', 0)))
+        with self.__lock:
+            self.__completed += 1
 
         LOG.info(
             "Created Google-Drive File => Name: {} ID: {} Size: {}".format(
@@ -301,7 +921,7 @@ class GDrive(DBase):
 
         return G_DRIVE_FILE_LINK.format(file_id, file_name, file_size)
 
-    def __create_drive_dir(self, dir_name: str, parent_id: str) -> str:
+    def __create_drive_dir(self, dir_name: str, parent_id: str, is_root: bool = True) -> str:
 
         if self._is_canceled:
             raise ProcessCanceled
@@ -311,43 +931,112 @@ class GDrive(DBase):
         if parent_id:
             body["parents"] = [parent_id]
 
-        file_ = self.__service.files().create(body=body, supportsTeamDrives=True).execute()
+        file_ = self.__service.files().create(
+            body=body, supportsTeamDrives=True).execute(num_retries=G_DRIVE_RETRIES)
 
         file_id = file_.get("id")
         file_name = file_.get("name")
 
-        if not Config.G_DRIVE_IS_TD:
+        if is_root and not Config.G_DRIVE_IS_TD:
             self.__set_permission(file_id)
 
-        self.__completed += 1
+        with self.__lock:
+            self.__completed += 1
 
         LOG.info("Created Google-Drive Folder => Name: {} ID: {} ".format(file_name, file_id))
 
         return file_id
 
+    def __add_transferred(self, size: int, action: str) -> None:
+        with self.__lock:
+            self.__transferred += size
+
+            diff = time.time() - self.__start_t
+            percentage = self.__transferred / self.__total_size * 100 if self.__total_size else 0
+            speed = round(self.__transferred / diff, 2) if diff else 0
+            eta = round((self.__total_size - self.__transferred) / speed) if speed else 0
+
+            tmp = \
+                "__{} GDrive...__\n" + \
+                "```[{}{}]({}%)```\n" + \
+                "**Total Size** : `{}`\n" + \
+                "**Transferred** : `{}`\n" + \
+                "**Completed** : `{}/{}`\n" + \
+                "**Speed** : `{}/s`\n" + \
+                "**ETA** : `{}`"
+
+            self.__percentage = percentage
+            self.__progress = tmp.format(
+                action,
+                "".join(["█" for i in range(math.floor(percentage / 5))]),
+                "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
+                round(percentage, 2),
+                humanbytes(self.__total_size),
+                humanbytes(self.__transferred),
+                self.__completed,
+                self.__list,
+                humanbytes(speed),
+                time_formatter(eta))
+
+    def __run_pool(self, func: Callable[..., Any], items: List[Tuple[Any, ...]]) -> None:
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            futures = {pool.submit(func, *item): item for item in items}
+
+            try:
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+
+                    except HttpError as h_e:
+                        LOG.exception(h_e)
+                        self.__failed.append(f"`{futures[future][0]}` : `{h_e}`")
+
+            finally:
+                # stop waiting files when canceled
+                for future in futures:
+                    future.cancel()
+
     def __upload_dir(self, input_directory: str, parent_id: str) -> str:
 
-        if self._is_canceled:
-            raise ProcessCanceled
+        # walked paths are joined without a trailing slash
+        input_directory = os.path.normpath(input_directory)
+        dir_ids = {input_directory: parent_id}
+        levels: Dict[int, List[str]] = {}
+        files: List[Tuple[str, str]] = []
 
-        list_dirs = os.listdir(input_directory)
-        if len(list_dirs) == 0:
-            return parent_id
+        for root, dirs, file_names in os.walk(input_directory):
+            for name in sorted(dirs):
+                path = os.path.join(root, name)
+                levels.setdefault(os.path.relpath(path, input_directory).count(os.sep),
+                                  []).append(path)
 
-        self.__list += len(list_dirs)
+            files.extend((os.path.join(root, name), root) for name in sorted(file_names))
 
-        new_id = None
-        for item in list_dirs:
-            current_file_name = os.path.join(input_directory, item)
+        self.__list += sum(len(i) for i in levels.values()) + len(files)
+        self.__total_size = sum(os.path.getsize(i[0]) for i in files)
+        self.__start_t = time.time()
 
-            if os.path.isdir(current_file_name):
-                current_dir_id = self.__create_drive_dir(item, parent_id)
-                new_id = self.__upload_dir(current_file_name, current_dir_id)
-            else:
-                self.__upload_file(current_file_name, parent_id)
-                new_id = parent_id
+        # tree first, folders of the same level are created in parallel
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            for depth in sorted(levels):
+                paths = levels[depth]
+                ids = pool.map(
+                    lambda x: self.__create_drive_dir(
+                        os.path.basename(x), dir_ids[os.path.dirname(x)], False), paths)
+                dir_ids.update(zip(paths, ids))
+
+        self.__run_pool(lambda x, y: self.__upload_file(x, dir_ids[y], False), files)
+
+        return parent_id
+
+    def __summary(self) -> str:
+        out = f"\n\n**Completed** : `{self.__completed}/{self.__list}` "
+        out += f"__({humanbytes(self.__transferred) or '0 B'})__"
+
+        if self.__failed:
+            out += f"\n**Failed** : `{len(self.__failed)}`\n" + "\n".join(self.__failed[:10])
 
-        return new_id
+        return out
 
     def _upload(self, file_name: str) -> None:
         try:
@@ -357,7 +1046,8 @@ class GDrive(DBase):
                 folder_name = os.path.basename(os.path.abspath(file_name))
                 dir_id = self.__create_drive_dir(folder_name, self._parent_id)
                 self.__upload_dir(file_name, dir_id)
-                self.__output = G_DRIVE_FOLDER_LINK.format(dir_id, folder_name)
+                self.__output = G_DRIVE_FOLDER_LINK.format(dir_id, folder_name) + \
+                    self.__summary()
 
         except HttpError as h_e:
             LOG.exception(h_e)
@@ -369,28 +1059,68 @@ class GDrive(DBase):
         finally:
             self.__finish()
 
-    def __download_file(self, path: str, name: str, **kwargs) -> None:
+    def __download_file(self, path: str, name: str, is_root: bool = True, **kwargs) -> None:
+
+        if self._is_canceled:
+            raise ProcessCanceled
+
+        file_path = os.path.join(path, name)
+        size = int(kwargs.get('size', -1))
+        # continue interrupted downloads from the existing part
+        offset = os.path.getsize(file_path) if os.path.isfile(file_path) else 0
+
+        if offset and offset == size:
+            self.__add_transferred(size, "Downloading From")
+            LOG.info(f"Skipping Downloaded Google-Drive File => {name}")
+
+            with self.__lock:
+                self.__completed += 1
+
+            return
+
+        if offset > size:
+            offset = 0
 
         request = self.__service.files().get_media(fileId=kwargs['id'], supportsTeamDrives=True)
 
-        with io.FileIO(os.path.join(path, name), 'wb') as d_f:
-            d_file_obj = MediaIoBaseDownload(d_f, request, chunksize=100*1024*1024)
+        with io.FileIO(file_path, 'ab' if offset else 'wb') as d_f:
+            # pylint: disable=protected-access
+            d_file_obj = MediaIoBaseDownload(d_f, request, chunksize=MIN_CHUNK_SIZE)
+            # MediaIoBaseDownload requests the next range from this offset
+            d_file_obj._progress = offset
+
+            if not is_root:
+                self.__add_transferred(offset, "Downloading From")
 
             c_time = time.time()
+            sizer = _ChunkSizer()
             done = False
+            downloaded = offset
 
             while done is False:
-                status, done = d_file_obj.next_chunk()
+                d_file_obj._chunksize = sizer.acquire()
+                before = d_file_obj._progress
+
+                try:
+                    status, done = d_file_obj.next_chunk(num_retries=G_DRIVE_RETRIES)
+
+                finally:
+                    sizer.release(d_file_obj._progress - before)
 
                 if self._is_canceled:
                     raise ProcessCanceled
 
-                if status:
+                if not is_root:
+                    current = status.resumable_progress if status else size
+                    self.__add_transferred(current - downloaded, "Downloading From")
+                    downloaded = current
+
+                elif status:
                     f_size = status.total_size
                     diff = time.time() - c_time
                     downloaded = status.resumable_progress
                     percentage = downloaded / f_size * 100
-                    speed = round(downloaded / diff, 2)
+                    speed = round((downloaded - offset) / diff, 2) or 1
                     eta = round((f_size - downloaded) / speed)
 
                     tmp = \
@@ -403,6 +1133,7 @@ class GDrive(DBase):
                         "**Speed** : `{}/s`\n" + \
                         "**ETA** : `{}`"
 
+                    self.__percentage = percentage
                     self.__progress = tmp.format(
                         "".join(["█" for i in range(math.floor(percentage / 5))]),
                         "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
@@ -415,14 +1146,16 @@ class GDrive(DBase):
                         humanbytes(speed),
                         time_formatter(eta))
 
-        self.__completed += 1
+        with self.__lock:
+            self.__completed += 1
+
         LOG.info(
             "Downloaded Google-Drive File => Name: {} ID: {} ".format(name, kwargs['id']))
 
     def __list_drive_dir(self, file_id: str) -> list:
 
         query = f"'{file_id}' in parents and (name contains '*')"
-        fields = 'nextPageToken, files(id, name, mimeType)'
+        fields = 'nextPageToken, files(id, name, mimeType, size, md5Checksum)'
         page_token = None
         page_size = 100
         files = []
@@ -433,7 +1166,8 @@ class GDrive(DBase):
                                                    q=query, spaces='drive',
                                                    fields=fields, pageToken=page_token,
                                                    pageSize=page_size, corpora='allDrives',
-                                                   orderBy='folder, name').execute()
+                                                   orderBy='folder, name').execute(
+                                                       num_retries=G_DRIVE_RETRIES)
 
             files.extend(response.get('files', []))
             page_token = response.get('nextPageToken', None)
@@ -459,100 +1193,581 @@ class GDrive(DBase):
 
     def __download_dir(self, path: str, **kwargs) -> None:
 
-        if self._is_canceled:
-            raise ProcessCanceled
+        level = [(path, kwargs['id'])]
+        files: List[Tuple[str, str, Dict[str, str]]] = []
+
+        # list the whole tree first, folders of the same level are listed in parallel
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            while level:
+                next_level = []
+
+                for (path_, _), children in zip(
+                        level, pool.map(lambda x: self.__list_drive_dir(x[1]), level)):
+
+                    self.__list += len(children)
+
+                    for file_ in children:
+                        if file_['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
+                            next_level.append(
+                                (self.__create_server_dir(path_, file_['name']), file_['id']))
+
+                        else:
+                            files.append((os.path.join(path_, file_['name']), path_, file_))
+
+                level = next_level
+
+        self.__total_size = sum(int(i[2].get('size', 0)) for i in files)
+        self.__start_t = time.time()
+
+        self.__run_pool(lambda _, x, y: self.__download_file(x, is_root=False, **y), files)
+
+    def _download(self, file_id: str) -> None:
+        try:
+            drive_file = self.__service.files().get(fileId=file_id,
+                                                    fields="id, name, mimeType, size",
+                                                    supportsTeamDrives=True).execute()
+
+            if drive_file['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
+                path = self.__create_server_dir(Config.DOWN_PATH, drive_file['name'])
+                self.__download_dir(path, **drive_file)
+                self.__output = f"`{path}`" + self.__summary()
+
+            else:
+                self.__download_file(Config.DOWN_PATH, **drive_file)
+                self.__output = f"`{os.path.join(Config.DOWN_PATH, drive_file['name'])}`"
+
+        except HttpError as h_e:
+            LOG.exception(h_e)
+            self.__output = h_e
+
+        except ProcessCanceled:
+            self.__output = "`Process Canceled!`"
+
+        finally:
+            self.__finish()
+
+    def __find_drive_dir(self, dir_name: str, parent_id: str) -> Optional[str]:
+        name = dir_name.replace("\\", "\\\\").replace("'", "\\'")
+        query = f"'{parent_id or 'root'}' in parents and name = '{name}' and " + \
+            f"mimeType = '{G_DRIVE_DIR_MIME_TYPE}' and trashed = false"
+
+        files = self.__service.files().list(
+            supportsTeamDrives=True, includeTeamDriveItems=True, q=query, spaces='drive',
+            corpora='allDrives', fields='files(id)', pageSize=1).execute(
+                num_retries=G_DRIVE_RETRIES).get('files', [])
+
+        return files[0]['id'] if files else None
+
+    def __list_drive_tree(self, file_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns everything inside the folder by relative path.
+        Google Docs are skipped, they have no content to compare.
+        """
+
+        tree: Dict[str, Dict[str, Any]] = {}
+        level = [("", file_id)]
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            while level:
+                next_level = []
+
+                for (path, _), children in zip(
+                        level, pool.map(lambda x: self.__list_drive_dir(x[1]), level)):
+
+                    for file_ in children:
+                        rel_path = os.path.join(path, file_['name'])
+                        is_dir = file_['mimeType'] == G_DRIVE_DIR_MIME_TYPE
+
+                        if rel_path in tree or (
+                                not is_dir and 'md5Checksum' not in file_):
+                            continue
+
+                        tree[rel_path] = file_
+
+                        if is_dir:
+                            next_level.append((rel_path, file_['id']))
+
+                level = next_level
+
+        return tree
+
+    @staticmethod
+    def __list_local_tree(path: str) -> Dict[str, int]:
+        """
+        Returns size of everything inside the folder by relative path, -1 for folders.
+        """
+
+        tree: Dict[str, int] = {}
+
+        for root, dirs, file_names in os.walk(path):
+            rel_root = os.path.relpath(root, path)
+
+            for name in dirs:
+                tree[os.path.normpath(os.path.join(rel_root, name))] = -1
+
+            for name in file_names:
+                tree[os.path.normpath(os.path.join(rel_root, name))] = \
+                    os.path.getsize(os.path.join(root, name))
+
+        return tree
+
+    def __diff_trees(self,
+                     local_path: str,
+                     local: Dict[str, int],
+                     remote: Dict[str, Dict[str, Any]],
+                     pull: bool) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Returns folders to create, files to transfer and extra items in the target.
+        Files of the same size are compared by md5, hashed in parallel.
+        """
+
+        def _is_dir(rel_path: str, tree: Dict[str, Any]) -> bool:
+            if tree is remote:
+                return remote[rel_path]['mimeType'] == G_DRIVE_DIR_MIME_TYPE
+
+            return local[rel_path] == -1
+
+        to_hash = [i for i, size in local.items()
+                   if size >= 0 and i in remote and not _is_dir(i, remote)
+                   and int(remote[i].get('size', 0)) == size]
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            hashes = dict(zip(to_hash, pool.map(
+                lambda x: hash_file(os.path.join(local_path, x), 'md5'), to_hash)))
+
+        source, target = (remote, local) if pull else (local, remote)
+        dirs: List[str] = []
+        files: List[str] = []
+
+        for rel_path in source:
+            is_dir = _is_dir(rel_path, source)
+
+            if rel_path in target and is_dir == _is_dir(rel_path, target) and (
+                    is_dir or hashes.get(rel_path) == remote[rel_path]['md5Checksum']):
+                continue
+
+            (dirs if is_dir else files).append(rel_path)
+
+        extras: List[str] = []
+        extra_set = set()
+
+        # only top most extra items, folders are removed with everything inside
+        for rel_path in sorted((i for i in target if i not in source),
+                               key=lambda x: x.count(os.sep)):
+            extra_set.add(rel_path)
+
+            if os.path.dirname(rel_path) not in extra_set:
+                extras.append(rel_path)
+
+        return sorted(dirs, key=lambda x: x.count(os.sep)), files, extras
+
+    def __push(self,
+               local_path: str,
+               folder_id: str,
+               remote: Dict[str, Dict[str, Any]],
+               dirs: List[str],
+               files: List[str],
+               extras: List[str]) -> None:
+
+        dir_ids = {"": folder_id}
+        dir_ids.update((i, j['id']) for i, j in remote.items()
+                       if j['mimeType'] == G_DRIVE_DIR_MIME_TYPE)
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            for depth in sorted(set(i.count(os.sep) for i in dirs)):
+                level = [i for i in dirs if i.count(os.sep) == depth]
+                ids = pool.map(lambda x: self.__create_drive_dir(
+                    os.path.basename(x), dir_ids[os.path.dirname(x)], False), level)
+                dir_ids.update(zip(level, ids))
+
+        self.__run_pool(
+            lambda x: self.__upload_file(
+                os.path.join(local_path, x), dir_ids[os.path.dirname(x)], False,
+                remote[x]['id'] if x in remote and x not in dir_ids else ''),
+            [(i,) for i in files])
+
+        results = self.__run_batches({
+            i: lambda x=remote[i]['id']: self.__service.files().delete(
+                fileId=x, supportsTeamDrives=True) for i in extras})
+
+        with self.__lock:
+            self.__completed += len(results)
+
+    def __pull(self,
+               local_path: str,
+               local: Dict[str, int],
+               remote: Dict[str, Dict[str, Any]],
+               dirs: List[str],
+               files: List[str],
+               extras: List[str]) -> None:
+
+        for rel_path in extras + [i for i in dirs + files if i in local]:
+            path = os.path.join(local_path, rel_path)
+
+            # changed files are downloaded again, not continued
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+
+            elif os.path.exists(path):
+                os.remove(path)
+
+        self.__completed += len(extras)
+
+        for rel_path in dirs:
+            os.makedirs(os.path.join(local_path, rel_path), exist_ok=True)
+            self.__completed += 1
+
+        self.__run_pool(
+            lambda x: self.__download_file(
+                os.path.join(local_path, os.path.dirname(x)), is_root=False, **remote[x]),
+            [(i,) for i in files])
+
+    def _sync(self, source: str, pull: bool, delete: bool) -> None:
+        try:
+            if pull:
+                drive_file = self.__service.files().get(
+                    fileId=source, fields="id, name, mimeType",
+                    supportsTeamDrives=True).execute()
+
+                if drive_file['mimeType'] != G_DRIVE_DIR_MIME_TYPE:
+                    self.__output = "`Please send me a folder link`"
+                    return
+
+                folder_id = drive_file['id']
+                folder_name = drive_file['name']
+                local_path = os.path.join(Config.DOWN_PATH, folder_name)
+
+                os.makedirs(local_path, exist_ok=True)
+
+            else:
+                local_path = source.rstrip(os.sep)
+                folder_name = os.path.basename(local_path)
+                folder_id = self.__find_drive_dir(folder_name, self._parent_id) or \
+                    self.__create_drive_dir(folder_name, self._parent_id)
+
+            remote = self.__list_drive_tree(folder_id)
+            local = self.__list_local_tree(local_path)
+            dirs, files, extras = self.__diff_trees(local_path, local, remote, pull)
+
+            if not delete:
+                extras = []
+
+            self.__list = len(dirs) + len(files) + len(extras)
+            self.__total_size = sum(int(remote[i].get('size', 0)) if pull else local[i]
+                                    for i in files)
+            self.__start_t = time.time()
+
+            if pull:
+                self.__pull(local_path, local, remote, dirs, files, extras)
+                out = f"`{local_path}`"
+
+            else:
+                self.__push(local_path, folder_id, remote, dirs, files, extras)
+                out = G_DRIVE_FOLDER_LINK.format(folder_id, folder_name)
+
+            unchanged = len([i for i in (remote if pull else local)
+                             if i not in dirs and i not in files])
+
+            self.__output = out + self.__summary() + \
+                f"\n**Unchanged** : `{unchanged}`\n**Removed** : `{len(extras)}`"
+
+        except HttpError as h_e:
+            LOG.exception(h_e)
+            self.__output = h_e
+
+        except ProcessCanceled:
+            self.__output = "`Process Canceled!`"
+
+        finally:
+            self.__finish()
+
+    def _mirror(self, buffer: _StreamBuffer, file_name: str, mime_type: str, size: int) -> None:
+        try:
+            body = {"name": file_name, "mimeType": mime_type,
+                    "description": "Uploaded using Userge"}
+
+            if self._parent_id:
+                body["parents"] = [self._parent_id]
+
+            u_file_obj = self.__service.files().create(
+                body=body, media_body=_StreamUpload(buffer, mime_type, size),
+                fields='id, name, size', supportsTeamDrives=True)
+
+            c_time = time.time()
+            response = None
+
+            while response is None:
+                status, response = u_file_obj.next_chunk(num_retries=G_DRIVE_RETRIES)
+
+                if self._is_canceled:
+                    raise ProcessCanceled
+
+                if status:
+                    diff = time.time() - c_time
+                    uploaded = status.resumable_progress
+                    percentage = uploaded / size * 100
+                    speed = round(uploaded / diff, 2) or 1
+                    eta = round((size - uploaded) / speed)
+
+                    tmp = \
+                        "__Mirroring to GDrive...__\n" + \
+                        "```[{}{}]({}%)```\n" + \
+                        "**File Name** : `{}`\n" + \
+                        "**File Size** : `{}`\n" + \
+                        "**Downloaded** : `{}`\n" + \
+                        "**Uploaded** : `{}`\n" + \
+                        "**Speed** : `{}/s`\n" + \
+                        "**ETA** : `{}`"
+
+                    self.__percentage = percentage
+                    self.__progress = tmp.format(
+                        "".join(["█" for i in range(math.floor(percentage / 5))]),
+                        "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
+                        round(percentage, 2),
+                        file_name,
+                        humanbytes(size),
+                        humanbytes(buffer.written),
+                        humanbytes(uploaded),
+                        humanbytes(speed),
+                        time_formatter(eta))
+
+            file_id = response.get('id')
+
+            if not Config.G_DRIVE_IS_TD:
+                self.__set_permission(file_id)
+
+            LOG.info(f"Mirrored Google-Drive File => Name: {file_name} ID: {file_id}")
+
+            self.__output = G_DRIVE_FILE_LINK.format(
+                file_id, response.get('name'), humanbytes(int(response.get('size', 0))))
+
+        except HttpError as h_e:
+            LOG.exception(h_e)
+            self.__output = h_e
+
+        except ProcessCanceled:
+            self.__output = "`Process Canceled!`"
+
+        except Exception as m_e:
+            # errors of the download side come from the buffer
+            LOG.exception(m_e)
+            self.__output = f"`{m_e}`"
+
+        finally:
+            buffer.close(ProcessCanceled())
+            self.__finish()
+
+    def __copy_file(self, file_id: str, parent_id: str) -> str:
+
+        if self._is_canceled:
+            raise ProcessCanceled
+
+        body = {}
+        if parent_id:
+            body["parents"] = [parent_id]
+
+        drive_file = self.__service.files().copy(
+            body=body, fileId=file_id, supportsTeamDrives=True).execute()
+
+        percentage = (self.__completed / self.__list) * 100
+
+        tmp = \
+            "__Copying Files In GDrive...__\n" + \
+            "```[{}{}]({}%)```\n" + \
+            "**Completed** : `{}/{}`"
+
+        self.__percentage = percentage
+        self.__progress = tmp.format(
+            "".join(["█" for i in range(math.floor(percentage / 5))]),
+            "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
+            round(percentage, 2),
+            self.__completed,
+            self.__list)
+
+        self.__completed += 1
+
+        LOG.info(
+            "Copied Google-Drive File => Name: {} ID: {} ".format(
+                drive_file['name'], drive_file['id']))
+
+        return drive_file['id']
+
+    def __backoff(self, limited: bool) -> None:
+        with self.__lock:
+            if limited:
+                self.__delay = min(max(self.__delay * 2, 1), MAX_BACKOFF)
+
+            else:
+                self.__delay = self.__delay // 2
+
+            delay = self.__delay
+
+        if limited:
+            LOG.info(f"Rate Limit Exceeded, waiting {delay}s...")
+            time.sleep(delay)
+
+    def __execute_batch(self,
+                        requests: Dict[str, Callable[[], object]]) -> Dict[str, Dict[str, Any]]:
+
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = list(requests)
+        attempt = 0
+
+        while pending:
+            if self._is_canceled:
+                raise ProcessCanceled
+
+            if attempt > G_DRIVE_RETRIES:
+                # server keeps failing, don't retry forever
+                LOG.error(f"Batch Failed : {len(pending)} requests")
+                self.__failed.extend(f"`{i}` : `too many retries`" for i in pending)
+                break
+
+            limited: List[str] = []
+
+            def _callback(request_id: str, response: Dict[str, Any], exception: HttpError) -> None:
+                if exception is None:
+                    results[request_id] = response
+
+                elif _is_rate_limited(exception):
+                    limited.append(request_id)
+
+                else:
+                    LOG.error(exception)
+                    self.__failed.append(f"`{request_id}` : `{exception}`")
+
+            batch = self.__service.new_batch_http_request(callback=_callback)
+
+            for request_id in pending:
+                batch.add(requests[request_id](), request_id=request_id)
+
+            try:
+                batch.execute()
+
+            except HttpError as h_e:
+                if not _is_rate_limited(h_e) and h_e.resp.status < 500:
+                    raise
+
+                limited = pending
+
+            # only retries without any progress are counted
+            attempt = attempt + 1 if len(limited) == len(pending) else 0
+            pending = limited
+            self.__backoff(bool(limited))
+
+        return results
+
+    def __copy_batch(self, items: List[Tuple[str, str]], checkpoint: str) -> None:
+        results = self.__execute_batch({
+            file_id: lambda x=file_id, y=parent_id: self.__service.files().copy(
+                body={'parents': [y]}, fileId=x, fields='id', supportsTeamDrives=True)
+            for file_id, parent_id in items})
+
+        GDRIVE_COLLECTION.update_one(
+            {'_id': checkpoint}, {"$push": {'files': {"$each": list(results)}}}, upsert=True)
+
+        with self.__lock:
+            self.__completed += len(results)
+            percentage = (self.__completed / self.__list) * 100
 
-        files = self.__list_drive_dir(kwargs['id'])
-        if len(files) == 0:
-            return
+            tmp = \
+                "__Copying Files In GDrive...__\n" + \
+                "```[{}{}]({}%)```\n" + \
+                "**Completed** : `{}/{}`"
 
-        self.__list += len(files)
+            self.__percentage = percentage
+            self.__progress = tmp.format(
+                "".join(["█" for i in range(math.floor(percentage / 5))]),
+                "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
+                round(percentage, 2),
+                self.__completed,
+                self.__list)
 
-        for file_ in files:
-            if file_['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
-                path_ = self.__create_server_dir(path, file_['name'])
-                self.__download_dir(path_, **file_)
-            else:
-                self.__download_file(path, **file_)
+    def __create_dirs_batch(self,
+                            items: List[Tuple[str, str, str]],
+                            checkpoint: str) -> Dict[str, str]:
 
-    def _download(self, file_id: str) -> None:
-        try:
-            drive_file = self.__service.files().get(fileId=file_id, fields="id, name, mimeType",
-                                                    supportsTeamDrives=True).execute()
+        results = self.__execute_batch({
+            file_id: lambda x=name, y=parent_id: self.__service.files().create(
+                body={"name": x, "mimeType": G_DRIVE_DIR_MIME_TYPE, "parents": [y]},
+                fields='id', supportsTeamDrives=True)
+            for file_id, name, parent_id in items})
 
-            if drive_file['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
-                path = self.__create_server_dir(Config.DOWN_PATH, drive_file['name'])
-                self.__download_dir(path, **drive_file)
-            else:
-                self.__download_file(Config.DOWN_PATH, **drive_file)
+        dir_ids = {file_id: response['id'] for file_id, response in results.items()}
 
-            self.__output = os.path.join(Config.DOWN_PATH, drive_file['name'])
+        if dir_ids:
+            GDRIVE_COLLECTION.update_one(
+                {'_id': checkpoint},
+                {"$set": {f"dirs.{x}": y for x, y in dir_ids.items()}}, upsert=True)
 
-        except HttpError as h_e:
-            LOG.exception(h_e)
-            self.__output = h_e
+        with self.__lock:
+            self.__completed += len(dir_ids)
 
-        except ProcessCanceled:
-            self.__output = "`Process Canceled!`"
+        return dir_ids
 
-        finally:
-            self.__finish()
+    def __copy_dir(self, file_id: str, parent_id: str) -> Optional[str]:
+        """
+        Copy folder tree with batch requests and returns id of the new folder
+        or None if it can't be created.
+        Copied items are saved as a checkpoint, so a stopped copy continues next time.
+        """
 
-    def __copy_file(self, file_id: str, parent_id: str) -> str:
+        checkpoint = f"copy_{file_id}_{parent_id}"
+        saved = GDRIVE_COLLECTION.find_one({'_id': checkpoint}) or {}
+        dir_ids: Dict[str, str] = saved.get('dirs', {})
+        copied = set(saved.get('files', []))
 
-        if self._is_canceled:
-            raise ProcessCanceled
+        if file_id in dir_ids:
+            self.__completed += 1
 
-        body = {}
-        if parent_id:
-            body["parents"] = [parent_id]
+        else:
+            dir_ids.update(self.__create_dirs_batch(
+                [(file_id, self.__service.files().get(
+                    fileId=file_id, fields='name', supportsTeamDrives=True).execute()['name'],
+                  parent_id)], checkpoint))
 
-        drive_file = self.__service.files().copy(
-            body=body, fileId=file_id, supportsTeamDrives=True).execute()
+            if file_id not in dir_ids:
+                # error of the batch is in the failed list
+                return None
 
-        percentage = (self.__completed / self.__list) * 100
+        level = [file_id]
+        files: List[Tuple[str, str]] = []
 
-        tmp = \
-            "__Copying Files In GDrive...__\n" + \
-            "```[{}{}]({}%)```\n" + \
-            "**Completed** : `{}/{}`"
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            while level:
+                dirs: List[Tuple[str, str, str]] = []
 
-        self.__progress = tmp.format(
-            "".join(["█" for i in range(math.floor(percentage / 5))]),
-            "".join(["░" for i in range(20 - math.floor(percentage / 5))]),
-            round(percentage, 2),
-            self.__completed,
-            self.__list)
+                for dir_id, children in zip(level, pool.map(self.__list_drive_dir, level)):
+                    self.__list += len(children)
 
-        self.__completed += 1
+                    for file_ in children:
+                        if file_['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
+                            dirs.append((file_['id'], file_['name'], dir_ids[dir_id]))
 
-        LOG.info(
-            "Copied Google-Drive File => Name: {} ID: {} ".format(
-                drive_file['name'], drive_file['id']))
+                        elif file_['id'] in copied:
+                            self.__completed += 1
 
-        return drive_file['id']
+                        else:
+                            files.append((file_['id'], dir_ids[dir_id]))
 
-    def __copy_dir(self, file_id: str, parent_id: str) -> str:
+                self.__completed += len([i for i in dirs if i[0] in dir_ids])
+                new_dirs = [i for i in dirs if i[0] not in dir_ids]
 
-        if self._is_canceled:
-            raise ProcessCanceled
+                for result in pool.map(
+                        lambda x: self.__create_dirs_batch(x, checkpoint),
+                        _chunks(new_dirs, G_DRIVE_BATCH_SIZE)):
+                    dir_ids.update(result)
 
-        files = self.__list_drive_dir(file_id)
-        if len(files) == 0:
-            return parent_id
+                level = [i[0] for i in dirs if i[0] in dir_ids]
 
-        self.__list += len(files)
+        # several batches run at the same time, each one with its own service
+        self.__run_pool(lambda _, y: self.__copy_batch(y, checkpoint),
+                        [(i[0][0], i) for i in _chunks(files, G_DRIVE_BATCH_SIZE)])
 
-        new_id = None
-        for file_ in files:
-            if file_['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
-                dir_id = self.__create_drive_dir(file_['name'], parent_id)
-                new_id = self.__copy_dir(file_['id'], dir_id)
-            else:
-                self.__copy_file(file_['id'], parent_id)
-                new_id = parent_id
+        if not self.__failed:
+            GDRIVE_COLLECTION.delete_one({'_id': checkpoint})
 
-        return new_id
+        return dir_ids[file_id]
 
     def _copy(self, file_id: str) -> None:
         try:
@@ -560,9 +1775,15 @@ class GDrive(DBase):
                 fileId=file_id, fields="id, name, mimeType", supportsTeamDrives=True).execute()
 
             if drive_file['mimeType'] == G_DRIVE_DIR_MIME_TYPE:
-                dir_id = self.__create_drive_dir(drive_file['name'], self._parent_id)
-                self.__copy_dir(file_id, dir_id)
-                ret_id = dir_id
+                ret_id = self.__copy_dir(file_id, self._parent_id)
+
+                if ret_id is None:
+                    self.__output = "`can't create the folder!`" + self.__summary()
+                    return
+
+                if not Config.G_DRIVE_IS_TD:
+                    self.__set_permission(ret_id)
+
             else:
                 ret_id = self.__copy_file(file_id, self._parent_id)
 
@@ -574,7 +1795,8 @@ class GDrive(DBase):
             file_id = drive_file['id']
 
             if mime_type == G_DRIVE_DIR_MIME_TYPE:
-                self.__output = G_DRIVE_FOLDER_LINK.format(file_id, file_name)
+                self.__output = G_DRIVE_FOLDER_LINK.format(file_id, file_name) + \
+                    self.__summary()
             else:
                 file_size = humanbytes(int(drive_file.get('size', 0)))
                 self.__output = G_DRIVE_FILE_LINK.format(file_id, file_name, file_size)
@@ -642,17 +1864,72 @@ class GDrive(DBase):
 
         return drive_file
 
+    def __list_permissions(self, file_id: str) -> List[Dict[str, Any]]:
+        perms: List[Dict[str, Any]] = []
+        page_token = None
+
+        while True:
+            response = self.__service.permissions().list(
+                fileId=file_id, supportsTeamDrives=True, pageSize=100, pageToken=page_token,
+                fields="nextPageToken, permissions").execute(num_retries=G_DRIVE_RETRIES)
+
+            perms.extend(response.get('permissions', []))
+            page_token = response.get('nextPageToken')
+
+            if page_token is None:
+                break
+
+        return perms
+
+    def __list_tree(self, file_id: str) -> List[str]:
+        """
+        Returns ids of the folder and everything inside it.
+        """
+
+        file_ids = [file_id]
+        level = [file_id]
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            while level:
+                children = [i for files in pool.map(self.__list_drive_dir, level) for i in files]
+                file_ids.extend(i['id'] for i in children)
+                level = [i['id'] for i in children if i['mimeType'] == G_DRIVE_DIR_MIME_TYPE]
+
+        return file_ids
+
+    def __run_batches(self, requests: Dict[str, Callable[[], object]]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        request_ids = list(requests)
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            for result in pool.map(
+                    lambda x: self.__execute_batch({i: requests[i] for i in x}),
+                    _chunks(request_ids, G_DRIVE_BATCH_SIZE)):
+                results.update(result)
+
+        return results
+
+    def __get_tree_perms(self,
+                         file_id: str,
+                         recursive: bool) -> Dict[str, List[Dict[str, Any]]]:
+
+        file_ids = self.__list_tree(file_id) if recursive else [file_id]
+
+        with ThreadPoolExecutor(max_workers=G_DRIVE_WORKERS) as pool:
+            return dict(zip(file_ids, pool.map(self.__list_permissions, file_ids)))
+
+    def __perms_summary(self, done: int, total: int) -> str:
+        out = f"**Completed** : `{done}/{total}`"
+
+        if self.__failed:
+            out += f"\n**Failed** : `{len(self.__failed)}`\n" + "\n".join(self.__failed[:10])
+
+        return out
+
     @userge.new_thread
     def _get_perms(self, file_id: str) -> str:
 
-        perm_ids = self.__service.files().get(supportsTeamDrives=True, fileId=file_id,
-                                              fields="permissionIds").execute()['permissionIds']
-        all_perms = {}
-        for perm_id in perm_ids:
-            perm = self.__service.permissions().get(fileId=file_id, fields='*',
-                                                    supportsTeamDrives=True,
-                                                    permissionId=perm_id).execute()
-            all_perms[perm_id] = perm
+        all_perms = {perm['id']: perm for perm in self.__list_permissions(file_id)}
 
         all_perms = dumps(all_perms, sort_keys=True, indent=4)
         LOG.info(f"All Permissions: {all_perms} for Google-Drive File : {file_id}")
@@ -660,9 +1937,21 @@ class GDrive(DBase):
         return all_perms
 
     @userge.new_thread
-    def _set_perms(self, file_id: str) -> str:
+    def _set_perms(self, file_id: str, recursive: bool = False) -> str:
+
+        if recursive:
+            file_ids = self.__list_tree(file_id)
+            permissions = {'role': 'reader', 'type': 'anyone'}
+
+            results = self.__run_batches({
+                i: lambda x=i: self.__service.permissions().create(
+                    fileId=x, body=permissions, supportsTeamDrives=True)
+                for i in file_ids})
+
+            LOG.info(f"Set Permission : {permissions} for {len(results)} Google-Drive Files")
 
-        self.__set_permission(file_id)
+        else:
+            self.__set_permission(file_id)
 
         drive_file = self.__service.files().get(fileId=file_id, supportsTeamDrives=True,
                                                 fields="id, name, mimeType, size").execute()
@@ -675,31 +1964,48 @@ class GDrive(DBase):
         file_id = drive_file['id']
 
         if mime_type == G_DRIVE_DIR_MIME_TYPE:
-            return G_DRIVE_FOLDER_LINK.format(file_id, file_name)
+            out = G_DRIVE_FOLDER_LINK.format(file_id, file_name)
+
+            if recursive:
+                out += "\n\n" + self.__perms_summary(len(results), len(file_ids))
+
+            return out
 
         file_size = humanbytes(int(drive_file.get('size', 0)))
         return G_DRIVE_FILE_LINK.format(file_id, file_name, file_size)
 
     @userge.new_thread
-    def _del_perms(self, file_id: str) -> str:
+    def _del_perms(self, file_id: str, recursive: bool = False) -> str:
+
+        all_perms = self.__get_tree_perms(file_id, recursive)
+
+        to_remove = {f"{i}:{perm['id']}": (i, perm)
+                     for i, perms in all_perms.items()
+                     for perm in perms if perm['role'] != "owner"}
+
+        results = self.__run_batches({
+            key: lambda x=file_id_, y=perm['id']: self.__service.permissions().delete(
+                fileId=x, permissionId=y, supportsTeamDrives=True)
+            for key, (file_id_, perm) in to_remove.items()})
 
-        perm_ids = self.__service.files().get(fileId=file_id, supportsTeamDrives=True,
-                                              fields="permissionIds").execute()['permissionIds']
-        removed_perms = {}
-        for perm_id in perm_ids:
-            perm = self.__service.permissions().get(fileId=file_id, fields='*',
-                                                    supportsTeamDrives=True,
-                                                    permissionId=perm_id).execute()
+        removed_perms: Dict[str, Any] = {}
 
-            if perm['role'] != "owner":
-                self.__service.permissions().delete(supportsTeamDrives=True, fileId=file_id,
-                                                    permissionId=perm_id).execute()
-                removed_perms[perm_id] = perm
+        for key in results:
+            file_id_, perm = to_remove[key]
+
+            if recursive:
+                removed_perms.setdefault(file_id_, {})[perm['id']] = perm
+
+            else:
+                removed_perms[perm['id']] = perm
 
         removed_perms = dumps(removed_perms, sort_keys=True, indent=4)
         LOG.info(
             f"Remove Permission: {removed_perms} for Google-Drive File : {file_id}")
 
+        if self.__failed:
+            removed_perms += "\n\n" + self.__perms_summary(len(results), len(to_remove))
+
         return removed_perms
 
 
@@ -708,15 +2014,20 @@ class Worker(GDrive):
     Worker Class for GDrive.
     """
 
-    def __init__(self, message: Message) -> None:
+    def __init__(self, message: Message, parent_id: str = '', job: Optional[Job] = None) -> None:
         self.__message = message
+        self.__job = job
         super().__init__(message.from_user.id)
 
-    def __get_file_id(self, filter_str: bool = False) -> tuple:
-        link = self.__message.input_str
+        if parent_id:
+            self._parent_id = parent_id
+
+    def __get_file_id(self, filter_str: bool = False, link: str = '') -> tuple:
+        if not link:
+            link = self.__message.input_str
 
-        if filter_str:
-            link = self.__message.filtered_input_str
+            if filter_str:
+                link = self.__message.filtered_input_str
 
         link = link.rstrip('export=download').rstrip('&')
 
@@ -882,13 +2193,13 @@ class Worker(GDrive):
         else:
             await self.__message.edit("Please run `.gsetup` first", del_in=5)
 
-    async def upload(self) -> None:
+    async def upload(self, upload_file_name: str = '') -> None:
         """
         Upload file/folder to GDrive.
         """
 
         if CREDS:
-            upload_file_name = self.__message.input_str
+            upload_file_name = upload_file_name or self.__message.input_str
 
             if not os.path.exists(upload_file_name):
                 await self.__message.err("invalid file path provided?")
@@ -906,6 +2217,9 @@ class Worker(GDrive):
                 if self._progress is not None:
                     await self.__message.try_to_edit(self._progress)
 
+                if self.__job is not None:
+                    self.__job.progress = self._percentage
+
                 await asyncio.sleep(3)
 
             end_t = datetime.now()
@@ -925,7 +2239,7 @@ class Worker(GDrive):
         else:
             await self.__message.edit("Please run `.gsetup` first", del_in=5)
 
-    async def download(self) -> None:
+    async def download(self, link: str = '') -> None:
         """
         Download file/folder from GDrive.
         """
@@ -933,7 +2247,7 @@ class Worker(GDrive):
         if CREDS:
             await self.__message.edit("`Loading GDrive Download...`")
 
-            file_id, _ = self.__get_file_id()
+            file_id, _ = self.__get_file_id(link=link)
 
             Thread(target=self._download, args=(file_id,)).start()
             start_t = datetime.now()
@@ -945,13 +2259,16 @@ class Worker(GDrive):
                 if self._progress is not None:
                     await self.__message.try_to_edit(self._progress)
 
+                if self.__job is not None:
+                    self.__job.progress = self._percentage
+
                 await asyncio.sleep(3)
 
             end_t = datetime.now()
             m_s = (end_t - start_t).seconds
 
             if self._output is not None and not self._is_canceled:
-                out = f"**Downloaded Successfully** __in {m_s} seconds__\n\n`{self._output}`"
+                out = f"**Downloaded Successfully** __in {m_s} seconds__\n\n{self._output}"
 
             elif self._output is not None and self._is_canceled:
                 out = self._output
@@ -964,7 +2281,7 @@ class Worker(GDrive):
         else:
             await self.__message.edit("Please run `.gsetup` first", del_in=5)
 
-    async def copy(self) -> None:
+    async def copy(self, link: str = '') -> None:
         """
         Copy file/folder in GDrive.
         """
@@ -976,7 +2293,7 @@ class Worker(GDrive):
         if CREDS:
             await self.__message.edit("`Loading GDrive Copy...`")
 
-            file_id, _ = self.__get_file_id()
+            file_id, _ = self.__get_file_id(link=link)
 
             Thread(target=self._copy, args=(file_id,)).start()
             start_t = datetime.now()
@@ -988,6 +2305,9 @@ class Worker(GDrive):
                 if self._progress is not None:
                     await self.__message.try_to_edit(self._progress)
 
+                if self.__job is not None:
+                    self.__job.progress = self._percentage
+
                 await asyncio.sleep(3)
 
             end_t = datetime.now()
@@ -1007,6 +2327,131 @@ class Worker(GDrive):
         else:
             await self.__message.edit("Please run `.gsetup` first", del_in=5)
 
+    async def sync(self, source: str, pull: bool = False, delete: bool = False) -> None:
+        """
+        Sync local folder to GDrive folder or GDrive folder to local folder.
+        """
+
+        if pull:
+            source, _ = self.__get_file_id(link=source)
+
+        elif not os.path.isdir(source):
+            await self.__message.err("invalid folder path provided?")
+            return
+
+        if CREDS:
+            await self.__message.edit("`Loading GDrive Sync...`")
+
+            Thread(target=self._sync, args=(source, pull, delete)).start()
+            start_t = datetime.now()
+
+            while not self._is_finished:
+                if self.__message.process_is_canceled:
+                    self._cancel()
+
+                if self._progress is not None:
+                    await self.__message.try_to_edit(self._progress)
+
+                if self.__job is not None:
+                    self.__job.progress = self._percentage
+
+                await asyncio.sleep(3)
+
+            end_t = datetime.now()
+            m_s = (end_t - start_t).seconds
+
+            if self._output is not None and not self._is_canceled:
+                out = f"**Synced Successfully** __in {m_s} seconds__\n\n{self._output}"
+
+            elif self._output is not None and self._is_canceled:
+                out = self._output
+
+            else:
+                out = "`failed to sync.. check logs?`"
+
+            await self.__message.edit(out, disable_web_page_preview=True, log=True)
+
+        else:
+            await self.__message.edit("Please run `.gsetup` first", del_in=5)
+
+    async def mirror(self,
+                     replied: Optional[Message] = None,
+                     url: str = '') -> None:
+        """
+        Stream media of the message or file of the url to GDrive, without a local copy.
+        """
+
+        if not CREDS:
+            await self.__message.edit("Please run `.gsetup` first", del_in=5)
+            return
+
+        await self.__message.edit("`Loading GDrive Mirror...`")
+
+        session = None
+
+        try:
+            if replied is not None:
+                info = userge.streamer.get_file_info(replied)
+                file_name, mime_type, size = info.file_name, info.mime_type, info.file_size
+                chunks = userge.streamer.stream(replied, parts=4)
+
+            else:
+                session = aiohttp.ClientSession()
+                resp = await session.get(url)
+                resp.raise_for_status()
+
+                file_name = get_file_name(resp)
+                mime_type = resp.content_type or "application/octet-stream"
+                size = resp.content_length or 0
+                chunks = resp.content.iter_chunked(1024 * 1024)
+
+            if not size:
+                await self.__message.err("can't mirror files of unknown size!")
+                return
+
+            buffer = _StreamBuffer(2 * STREAM_CHUNK_SIZE)
+            feeder = asyncio.ensure_future(_feed(buffer, chunks))
+
+            Thread(target=self._mirror, args=(buffer, file_name, mime_type, size)).start()
+            start_t = datetime.now()
+
+            while not self._is_finished:
+                if self.__message.process_is_canceled:
+                    self._cancel()
+                    buffer.close(ProcessCanceled())
+
+                if self._progress is not None:
+                    await self.__message.try_to_edit(self._progress)
+
+                if self.__job is not None:
+                    self.__job.progress = self._percentage
+
+                await asyncio.sleep(3)
+
+            feeder.cancel()
+
+        except (ValueError, aiohttp.ClientError) as m_e:
+            await self.__message.err(m_e)
+            return
+
+        finally:
+            if session is not None:
+                await session.close()
+
+        end_t = datetime.now()
+        m_s = (end_t - start_t).seconds
+
+        if self._output is not None and not self._is_canceled:
+            out = f"**Mirrored Successfully** __in {m_s} seconds__\n\n{self._output}"
+
+        elif self._output is not None and self._is_canceled:
+            out = self._output
+
+        else:
+            out = "`failed to mirror.. check logs?`"
+
+        await self.__message.edit(out, disable_web_page_preview=True, log=True)
+
     async def move(self) -> None:
         """
         Move file/folder in GDrive.
@@ -1107,6 +2552,59 @@ class Worker(GDrive):
         else:
             await self.__message.edit("Please run `.gsetup` first", del_in=5)
 
+    async def index(self) -> None:
+        """
+        Build, sync, clear or query local index of GDrive.
+        """
+
+        flags = self.__message.flags
+
+        if '-c' in flags:
+            GDRIVE_COLLECTION.delete_one({'_id': INDEX_TOKEN_ID})
+            INDEX_COLLECTION.drop()
+
+            await self.__message.edit("`GDrive Index Cleared`", del_in=5, log=True)
+            return
+
+        if not CREDS:
+            await self.__message.edit("Please run `.gsetup` first", del_in=5)
+            return
+
+        has_index = bool(GDRIVE_COLLECTION.find_one({'_id': INDEX_TOKEN_ID}))
+
+        if ('-b' in flags or '-d' in flags) and not has_index:
+            await self.__message.err("build the index first by `.gindex`")
+            return
+
+        try:
+            if '-b' in flags or '-d' in flags:
+                await self.__message.edit("`Loading GDrive Index...`")
+
+                out = await self._query_index(flags)
+
+                await self.__message.edit_or_send_as_file(
+                    out, disable_web_page_preview=True, caption="gdrive index results")
+
+            elif has_index:
+                await self.__message.edit("`Syncing GDrive Index...`")
+
+                count = await self._sync_index()
+
+                await self.__message.edit(
+                    f"**GDrive Index Synced** : `{count}` __changes__", log=True)
+
+            else:
+                await self.__message.edit("`Building GDrive Index...`")
+
+                count = await self._build_index()
+
+                await self.__message.edit(
+                    f"**GDrive Index Built** : `{count}` __files__", log=True)
+
+        except HttpError as h_e:
+            LOG.exception(h_e)
+            await self.__message.err(h_e)
+
     async def get_perms(self) -> None:
         """
         Get all Permissions of file/folder in GDrive.
@@ -1142,10 +2640,10 @@ class Worker(GDrive):
         if CREDS:
             await self.__message.edit("`Loading GDrive SetPermissions...`")
 
-            file_id, _ = self.__get_file_id()
+            file_id, _ = self.__get_file_id(filter_str=True)
 
             try:
-                link = await self._set_perms(file_id)
+                link = await self._set_perms(file_id, '-r' in self.__message.flags)
 
             except HttpError as h_e:
                 LOG.exception(h_e)
@@ -1166,10 +2664,10 @@ class Worker(GDrive):
         if CREDS:
             await self.__message.edit("`Loading GDrive DelPermissions...`")
 
-            file_id, _ = self.__get_file_id()
+            file_id, _ = self.__get_file_id(filter_str=True)
 
             try:
-                out = await self._del_perms(file_id)
+                out = await self._del_perms(file_id, '-r' in self.__message.flags)
 
             except HttpError as h_e:
                 LOG.exception(h_e)
@@ -1240,6 +2738,7 @@ __Search files in GDrive__
 
     `-l` : add limit to search (default limit 20)
     `-f` : add to do a force search
+    `-r` : search query is a regex (only with `.gindex`)
 
 **Usage:**
 
@@ -1250,6 +2749,28 @@ async def gfind_(message: Message):
     await Worker(message).search()
 
 
+@userge.on_cmd("gindex", about="""\
+__Local index of GDrive for fast search__
+
+    `.gfind` and `.gls` use the index after it is built,
+    changes in GDrive are synced before every search.
+
+**Available Flags:**
+
+    `-b` : list largest files
+    `-d` : list duplicate files (same md5)
+    `-l` : add limit to `-b` and `-d` (default limit 20)
+    `-c` : clear the index
+
+**Usage:**
+
+    `.gindex` build the index or sync it if already built
+    `.gindex -b -l10`""")
+async def gindex_(message: Message):
+    """gindex"""
+    await Worker(message).index()
+
+
 @userge.on_cmd("gls", about="""\
 __List files in GDrive Folder or Root__
 
@@ -1273,13 +2794,20 @@ __Upload files to GDrive__
 
     set destination by setting parent_id,
     use `.gset` to set parent_id (root path).
+    stopped uploads continue from the last uploaded chunk.
 
 **Usage:**
 
     `.gup [file | folder path]`""")
 async def gup_(message: Message):
     """gup"""
-    await Worker(message).upload()
+    await userge.jobs.submit("gup", message, {'path': message.input_str,
+                                              'parent_id': PARENT_ID})
+
+
+@userge.jobs.runner("gup", limit=2)
+async def _gup(job: Job, message: Message):
+    await Worker(message, job.args['parent_id'], job).upload(job.args['path'])
 
 
 @userge.on_cmd("gdown", about="""\
@@ -1290,7 +2818,12 @@ __Download files from GDrive__
     `.gdown [file_id | file/folder link]`""")
 async def gdown_(message: Message):
     """gdown"""
-    await Worker(message).download()
+    await userge.jobs.submit("gdown", message, {'link': message.input_str})
+
+
+@userge.jobs.runner("gdown", limit=2)
+async def _gdown(job: Job, message: Message):
+    await Worker(message, job=job).download(job.args['link'])
 
 
 @userge.on_cmd("gcopy", about="""\
@@ -1298,13 +2831,92 @@ __Copy files in GDrive__
 
     set destination by setting parent_id,
     use `.gset` to set parent_id (root path).
+    stopped folder copies continue from where they stopped.
 
 **Usage:**
 
     `.gcopy [file_id | file/folder link]`""")
 async def gcopy_(message: Message):
     """gcopy"""
-    await Worker(message).copy()
+    await userge.jobs.submit("gcopy", message, {'link': message.input_str,
+                                                'parent_id': PARENT_ID})
+
+
+@userge.jobs.runner("gcopy", limit=2)
+async def _gcopy(job: Job, message: Message):
+    await Worker(message, job.args['parent_id'], job).copy(job.args['link'])
+
+
+@userge.on_cmd("gsync", about="""\
+__Sync folders between local and GDrive__
+
+    only new or changed files (by size and md5) are transferred.
+    local folder is synced to the folder with the same name in parent_id,
+    use `.gset` to set parent_id (root path).
+
+**Available Flags:**
+
+    `-p` : pull, sync GDrive folder to the download path
+    `-x` : remove files which are not in the source
+
+**Usage:**
+
+    `.gsync [flags] [folder path]`
+    `.gsync -p [flags] [drive folder link]`""")
+async def gsync_(message: Message):
+    """gsync"""
+    if not message.filtered_input_str:
+        await message.err("folder path or link not found!")
+        return
+
+    await userge.jobs.submit("gsync", message, {'path': message.filtered_input_str,
+                                                'pull': '-p' in message.flags,
+                                                'delete': '-x' in message.flags,
+                                                'parent_id': PARENT_ID})
+
+
+@userge.jobs.runner("gsync", limit=2)
+async def _gsync(job: Job, message: Message):
+    await Worker(message, job.args['parent_id'], job).sync(
+        job.args['path'], job.args['pull'], job.args['delete'])
+
+
+@userge.on_cmd("gmirror", about="""\
+__Mirror telegram media or url to GDrive without saving it on server__
+
+    download and upload run at the same time with constant memory,
+    set destination by setting parent_id,
+    use `.gset` to set parent_id (root path).
+
+**Usage:**
+
+    reply `.gmirror` to telegram media
+    `.gmirror [url]`""")
+async def gmirror_(message: Message):
+    """gmirror"""
+    if message.reply_to_message is not None:
+        args = {'reply_id': message.reply_to_message.message_id}
+
+    elif message.input_str:
+        args = {'url': message.input_str}
+
+    else:
+        await message.err("reply to media or give me a url!")
+        return
+
+    args['parent_id'] = PARENT_ID
+
+    await userge.jobs.submit("gmirror", message, args)
+
+
+@userge.jobs.runner("gmirror", limit=2)
+async def _gmirror(job: Job, message: Message):
+    replied = None
+
+    if 'reply_id' in job.args:
+        replied = await userge.get_messages(message.chat.id, job.args['reply_id'])
+
+    await Worker(message, job.args['parent_id'], job).mirror(replied, job.args.get('url', ''))
 
 
 @userge.on_cmd("gmove", about="""\
@@ -1363,9 +2975,13 @@ async def ggetperm_(message: Message):
 @userge.on_cmd("gsetperm", about="""\
 __Set permissions to file/folder in GDrive__
 
+**Available Flags:**
+
+    `-r` : set permissions to everything inside the folder too
+
 **Usage:**
 
-    `.gsetperm [file_id | file/folder link]`""")
+    `.gsetperm [flags] [file_id | file/folder link]`""")
 async def gsetperm_(message: Message):
     """gsetperm"""
     await Worker(message).set_perms()
@@ -1374,9 +2990,13 @@ async def gsetperm_(message: Message):
 @userge.on_cmd("gdelperm", about="""\
 __Remove all permissions of file/folder in GDrive__
 
+**Available Flags:**
+
+    `-r` : remove permissions of everything inside the folder too
+
 **Usage:**
 
-    `.gdelperm [file_id | file/folder link]`""")
+    `.gdelperm [flags] [file_id | file/folder link]`""")
 async def gdelperm_(message: Message):
     """gdelperm"""
     await Worker(message).del_perms()
@@ -61,10 +61,18 @@ async def clear_thumb_nail(message: Message):
 async def get_thumb_nail(message: Message):
     await message.edit("processing ...")
     if os.path.exists(THUMB_PATH):
-        msg = await userge.send_document(chat_id=message.chat.id,
-                                         document=THUMB_PATH,
-                                         disable_notification=True,
-                                         reply_to_message_id=message.message_id)
+        key = await userge.files.get_key(THUMB_PATH)
+        msg = await userge.files.send(message.chat.id, key,
+                                      disable_notification=True,
+                                      reply_to_message_id=message.message_id)
+
+        if msg is None:
+            msg = await userge.send_document(chat_id=message.chat.id,
+                                             document=THUMB_PATH,
+                                             disable_notification=True,
+                                             reply_to_message_id=message.message_id)
+            userge.files.save(key, msg, THUMB_PATH)
+
         await CHANNEL.fwd_msg(msg)
         await message.delete()
 
@@ -8,135 +8,593 @@
 
 
 import os
-import time
+import json
+import asyncio
+import math
+import hashlib
 from datetime import datetime
 from pathlib import Path
-from hachoir.metadata import extractMetadata
-from hachoir.parser import createParser
+from mimetypes import guess_type
+from typing import Dict, List, Optional, Tuple
+import pyrogram
+from pyrogram.api import functions, types
 from pyrogram.errors.exceptions import FloodWait
-from userge import userge, Config, Message
-from userge.utils import progress, take_screen_shot
+from userge import userge, Config, Message, Job
+from userge.utils import humanbytes, get_media_info
+from userge.utils.splitter import SPLIT_EXT, SPLIT_PATH, write_part
 
 LOGGER = userge.getLogger(__name__)
 CHANNEL = userge.getCLogger(__name__)
 
 LOGO_PATH = 'resources/userge.png'
 THUMB_PATH = Config.DOWN_PATH + "thumb_image.jpg"
+# hidden, so folder uploads of DOWN_PATH skip it
+MANIFEST_DIR = os.path.join(Config.DOWN_PATH, ".uploads")
+MANIFEST_PATH = os.path.join(MANIFEST_DIR, "upload_{}.json")
+VIDEO_EXTS = (".mkv", ".mp4", ".webm")
+PHOTO_EXTS = (".jpg", ".jpeg", ".png")
+MAX_PHOTO_SIZE = 10 * 1024 * 1024
+ALBUM_SIZE = 10
+MAX_FILE_SIZE = 2000 * 1024 * 1024
+UPLOAD_WORKERS = 3
 
 
 @userge.on_cmd("upload", about="""\
 __upload files to telegram__
 
+    folders are uploaded in sorted order, parallel with `-w` files
+    at a time. canceled or failed folder uploads continue from
+    the last sent file when started again.
+
+**Available Flags:**
+
+    `-w` : number of parallel uploads (default 3)
+    `-a` : send photos and videos as albums
+    `-s` : split files bigger than this size in MB (default 2000)
+
+    files bigger than telegram limit are split into parts,
+    use `.join` on the manifest file to get the file back.
+
 **Usage:**
 
-    `.upload [file or folder path]`""")
+    `.upload [file or folder path]`
+    `.upload -w5 [folder path]`
+    `.upload -a [folder path]`
+    `.upload -s500 [file path]`""")
 async def uploadtotg(message: Message):
-    path_ = message.input_str
+    path_ = message.filtered_input_str
     if not path_:
         await message.edit("invalid input!, check `.help .upload`", del_in=5)
         return
 
-    try:
-        string = Path(path_)
+    await userge.jobs.submit("upload", message, {
+        'path': path_,
+        'workers': int(message.flags.get('-w') or UPLOAD_WORKERS),
+        'album': '-a' in message.flags,
+        'split_size': int(message.flags.get('-s') or 0) * 1024 * 1024})
 
-    except IndexError:
-        await message.edit("wrong syntax\n`.upload [path]`")
 
-    else:
-        await message.delete()
-        await explorer(string, message.chat.id)
+@userge.jobs.runner("upload", limit=1)
+async def _upload(job: Job, message: Message):
+    path = Path(job.args['path'])
 
+    if not path.exists():
+        await message.err("file path not exists!")
+        return
+
+    start_t = datetime.now()
+    uploader = Uploader(path,
+                        message,
+                        job.args.get('workers', UPLOAD_WORKERS),
+                        job.args.get('album', False),
+                        job.args.get('split_size', 0),
+                        job)
+    await uploader.start()
+    m_s = (datetime.now() - start_t).seconds
+
+    out = f"**Uploaded** `{path}` __in {m_s} seconds__\n\n"
+    out += f"**Sent** : `{uploader.sent}/{uploader.total}` "
+    out += f"__({humanbytes(uploader.uploaded) or '0 B'})__\n"
+
+    if uploader.skipped:
+        out += f"**Skipped** : `{uploader.skipped}` __(sent before)__\n"
+
+    if uploader.canceled:
+        out += "**Status** : `Process Canceled!`\n"
+
+    for name, error in uploader.failed:
+        out += f"\n**Failed** : `{name}` - `{error}`"
+
+    await message.edit_or_send_as_file(out, log=True)
+
+
+class Uploader:
+    """
+    Upload file or folder to telegram.
+
+    Files of a folder are uploaded in parallel and posted in sorted order.
+    In album mode, photos and videos are sent as albums of up to 10 files.
+    Files bigger than the split size are sent in parts with a manifest file.
+    FloodWait only stops the worker which got it, and the file is tried again.
+    Sent files are saved in a manifest, so a stopped folder upload can be continued.
+    """
+
+    def __init__(self,
+                 path: Path,
+                 message: Message,
+                 workers: int = UPLOAD_WORKERS,
+                 album: bool = False,
+                 split_size: int = 0,
+                 job: Optional[Job] = None) -> None:
+
+        self.__path = path
+        self.__job = job
+        self.__message = message
+        self.__workers = max(workers, 1)
+        self.__album = album
+        self.__split_size = min(split_size, MAX_FILE_SIZE) or MAX_FILE_SIZE
+        self.__chat_id = message.chat.id
+        self.__files: List[Path] = []
+        self.__done: List[str] = []
+        self.__progress: Dict[str, Tuple[int, int]] = {}
+        self.__failed: List[Tuple[str, str]] = []
+        self.__uploaded = 0
+        self.__sent = 0
+        self.__skipped = 0
+        self.__is_canceled = False
+
+        key = f"{self.__chat_id}:{path.resolve()}".encode()
+        self.__manifest = MANIFEST_PATH.format(hashlib.md5(key).hexdigest())
+
+    @property
+    def total(self) -> int:
+        """
+        Returns number of files.
+        """
+        return len(self.__files)
+
+    @property
+    def sent(self) -> int:
+        """
+        Returns number of sent files.
+        """
+        return self.__sent
+
+    @property
+    def skipped(self) -> int:
+        """
+        Returns number of files skipped by the manifest.
+        """
+        return self.__skipped
+
+    @property
+    def uploaded(self) -> int:
+        """
+        Returns uploaded bytes.
+        """
+        return self.__uploaded
+
+    @property
+    def failed(self) -> List[Tuple[str, str]]:
+        """
+        Returns list of failed files with errors.
+        """
+        return self.__failed
+
+    @property
+    def canceled(self) -> bool:
+        """
+        Returns True if canceled.
+        """
+        return self.__is_canceled
+
+    async def start(self) -> None:
+        """
+        Start uploading.
+        """
+
+        if self.__path.is_file():
+            self.__files = [self.__path]
+
+        else:
+            for root, dirs, files in os.walk(self.__path):
+                # skip hidden folders of thumbnails, parts and manifests
+                dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+                self.__files.extend(Path(root, name) for name in sorted(files))
+
+        if os.path.exists(self.__manifest):
+            with open(self.__manifest) as m_f:
+                self.__done = json.load(m_f)
+
+        pending = [path for path in self.__files if self.__rel(path) not in self.__done]
+        self.__skipped = len(self.__files) - len(pending)
+
+        # files uploaded but not sent yet, keeps workers close to the sender
+        slots = asyncio.Semaphore(self.__workers * 2)
+        queue: asyncio.Queue = asyncio.Queue()
+        units = self.__group(pending)
+        results = []
+
+        for unit in units:
+            future = asyncio.get_event_loop().create_future()
+            results.append(future)
+            queue.put_nowait((unit, future))
+
+        workers = [asyncio.ensure_future(self.__worker(queue, slots))
+                   for _ in range(min(self.__workers, len(units)))]
+        sender = asyncio.ensure_future(self.__sender(units, results, slots))
 
-async def explorer(path: Path, chatid):
-    if path.is_file():
         try:
-            await upload(path, chatid)
+            while not sender.done():
+                if self.__message.process_is_canceled:
+                    self.__is_canceled = True
+                    sender.cancel()
+                    break
 
-        except FloodWait as x:
-            time.sleep(x.x)  # asyncio sleep ?
+                await self.__message.try_to_edit(self.__status())
 
-    elif path.is_dir():
-        for i in path.iterdir():
-            await explorer(i, chatid)
+                if self.__job is not None:
+                    self.__job.set_progress(self.__sent + self.__skipped, len(self.__files))
 
+                await asyncio.wait([sender], timeout=3)
 
-async def upload(path: Path, chat_id: int):
-    if path.name.endswith((".mkv", ".mp4", ".webm")):
-        await vid_upload(chat_id, path)
+        finally:
+            for task in workers:
+                task.cancel()
 
-    else:
-        await doc_upload(chat_id, path)
+        if not self.__is_canceled:
+            # re-raise unexpected errors of sender
+            sender.result()
 
+        if not self.__is_canceled and not self.__failed and os.path.exists(self.__manifest):
+            os.remove(self.__manifest)
 
-async def doc_upload(chat_id, path):
-    message: Message = await userge.send_message(
-        chat_id, f"`Uploading {path.name} ...`", log=True)
+    def __rel(self, path: Path) -> str:
+        return str(path.relative_to(self.__path)) if path != self.__path else path.name
 
-    start_t = datetime.now()
-    c_time = time.time()
-    thumb = await get_thumb()
-    await userge.send_chat_action(chat_id, "upload_document")
-    msg = await userge.send_document(
-        chat_id=chat_id,
-        document=str(path),
-        thumb=thumb,
-        caption=path.name,
-        parse_mode="html",
-        disable_notification=True,
-        progress=progress,
-        progress_args=(
-            "uploading", userge, message, c_time
-        )
-    )
-
-    await CHANNEL.fwd_msg(msg)
-    await userge.send_chat_action(chat_id, "cancel")
-
-    if message.process_is_canceled:
-        await message.edit("`Process Canceled!`", del_in=5, log=True)
-
-    else:
-        end_t = datetime.now()
-        ms = (end_t - start_t).seconds
-        await message.edit(f"Uploaded in {ms} seconds", log=True)
-
-
-async def vid_upload(chat_id, path):
-    strpath = str(path)
-    thumb = await get_thumb(strpath)
-    metadata = extractMetadata(createParser(strpath))
-
-    message: Message = await userge.send_message(
-        chat_id, f"`Uploading {path.name} ...` as a video", log=True)
+    def __status(self) -> str:
+        uploaded = self.__uploaded + sum(i[0] for i in self.__progress.values())
 
-    start_t = datetime.now()
-    c_time = time.time()
-    await userge.send_chat_action(chat_id, "upload_video")
-    msg = await userge.send_video(
-        chat_id=chat_id,
-        video=strpath,
-        duration=metadata.get("duration").seconds,
-        thumb=thumb,
-        caption=path.name,
-        parse_mode="html",
-        disable_notification=True,
-        progress=progress,
-        progress_args=(
-            "uploading", userge, message, c_time
-        )
-    )
-
-    await CHANNEL.fwd_msg(msg)
-    await userge.send_chat_action(chat_id, "cancel")
-    await remove_thumb(thumb)
-
-    if message.process_is_canceled:
-        await message.edit("`Process Canceled!`", del_in=5, log=True)
-
-    else:
-        end_t = datetime.now()
-        ms = (end_t - start_t).seconds
-        await message.edit(f"Uploaded in {ms} seconds", log=True)
+        out = f"__Uploading__ `{self.__path}`\n\n"
+        out += f"**Sent** : `{self.__sent + self.__skipped}/{len(self.__files)}`\n"
+        out += f"**Uploaded** : `{humanbytes(uploaded) or '0 B'}`\n"
+
+        for name, (current, total) in self.__progress.items():
+            percentage = current * 100 // total if total else 0
+            out += f"\n`{name}` : `{percentage}%`"
+
+        return out
+
+    def __group(self, pending: List[Path]) -> List[List[Path]]:
+        if not self.__album:
+            return [[path] for path in pending]
+
+        units: List[List[Path]] = []
+        album: List[Path] = []
+
+        for path in pending:
+            if path.stat().st_size <= self.__split_size and _is_album_media(path):
+                album.append(path)
+
+                if len(album) == ALBUM_SIZE:
+                    units.append(album)
+                    album = []
+
+            else:
+                units.extend(_flush(album))
+                units.append([path])
+                album = []
+
+        units.extend(_flush(album))
+
+        return units
+
+    async def __worker(self, queue: asyncio.Queue, slots: asyncio.Semaphore) -> None:
+        while not queue.empty():
+            unit, future = queue.get_nowait()
+
+            await slots.acquire()
+
+            try:
+                if len(unit) == 1 and unit[0].stat().st_size > self.__split_size:
+                    # parts are uploaded by the sender, to keep them in order
+                    future.set_result(None)
+
+                elif len(unit) == 1:
+                    key = await userge.files.get_key(str(unit[0]))
+                    # saved files are sent again by file_id, without uploading
+                    media = None if userge.files.get(key) else await self.__prepare(unit[0])
+                    future.set_result((key, media))
+
+                else:
+                    # members of an album are uploaded in parallel
+                    future.set_result(await asyncio.gather(
+                        *[self.__prepare(path, True) for path in unit]))
+
+            except Exception as u_e:
+                LOGGER.exception(u_e)
+                future.set_exception(u_e)
+
+            finally:
+                for path in unit:
+                    self.__progress.pop(self.__rel(path), None)
+
+    async def __on_progress(self, current: int, total: int, name: str) -> None:
+        self.__progress[name] = (current, total)
+
+    async def __save_file(self, path: str, name: str = '') -> types.InputFile:
+        while True:
+            try:
+                if name:
+                    return await userge.save_file(path,
+                                                  progress=self.__on_progress,
+                                                  progress_args=(name,))
+
+                return await userge.save_file(path)
+
+            except FloodWait as f_e:
+                LOGGER.info(f"FloodWait ({f_e.x}s) while uploading {path}")
+                await asyncio.sleep(f_e.x)
+
+    async def __invoke(self, query: object) -> object:
+        while True:
+            try:
+                return await userge.send(query)
+
+            except FloodWait as f_e:
+                LOGGER.info(f"FloodWait ({f_e.x}s) for {type(query).__name__}")
+                await asyncio.sleep(f_e.x)
+
+    async def __prepare(self, path: Path, album: bool = False) -> object:
+        strpath = str(path)
+
+        if album and path.name.lower().endswith(PHOTO_EXTS):
+            file = await self.__save_file(strpath, self.__rel(path))
+
+            return await self.__upload_media(types.InputMediaUploadedPhoto(file=file))
+
+        attributes = [types.DocumentAttributeFilename(file_name=path.name)]
+        is_video = path.name.lower().endswith(VIDEO_EXTS)
+        thumb = await get_thumb(strpath if is_video else '')
+
+        if is_video:
+            info = await get_media_info(strpath)
+
+            # album members must be videos, not documents
+            if info.duration or album:
+                attributes.append(types.DocumentAttributeVideo(
+                    supports_streaming=True,
+                    duration=info.duration,
+                    w=info.width,
+                    h=info.height))
+
+        file = await self.__save_file(strpath, self.__rel(path))
+        thumb_file = await self.__save_file(thumb) \
+            if thumb and os.path.exists(thumb) else None
+
+        media = types.InputMediaUploadedDocument(
+            mime_type=guess_type(strpath)[0] or "application/octet-stream",
+            file=file,
+            thumb=thumb_file,
+            attributes=attributes)
+
+        if album:
+            return await self.__upload_media(media)
+
+        return media
+
+    async def __upload_media(self, media: object) -> object:
+        r = await self.__invoke(
+            functions.messages.UploadMedia(
+                peer=await userge.resolve_peer(self.__chat_id),
+                media=media))
+
+        if isinstance(r, types.MessageMediaPhoto):
+            return types.InputMediaPhoto(
+                id=types.InputPhoto(id=r.photo.id,
+                                    access_hash=r.photo.access_hash,
+                                    file_reference=r.photo.file_reference))
+
+        return types.InputMediaDocument(
+            id=types.InputDocument(id=r.document.id,
+                                   access_hash=r.document.access_hash,
+                                   file_reference=r.document.file_reference))
+
+    async def __send(self, media: object, unit: List[Path]) -> List[pyrogram.Message]:
+        peer = await userge.resolve_peer(self.__chat_id)
+
+        if len(unit) == 1:
+            r = await self.__invoke(
+                functions.messages.SendMedia(peer=peer,
+                                             media=media,
+                                             silent=True,
+                                             random_id=userge.rnd_id(),
+                                             message=unit[0].name))
+
+        else:
+            r = await self.__invoke(
+                functions.messages.SendMultiMedia(
+                    peer=peer,
+                    silent=True,
+                    multi_media=[types.InputSingleMedia(media=i,
+                                                        random_id=userge.rnd_id(),
+                                                        message=path.name)
+                                 for i, path in zip(media, unit)]))
+
+        users = {i.id: i for i in r.users}
+        chats = {i.id: i for i in r.chats}
+
+        return [await pyrogram.Message._parse(userge, i.message, users, chats)
+                for i in r.updates
+                if isinstance(i, (types.UpdateNewMessage, types.UpdateNewChannelMessage))]
+
+    async def __send_unit(self, result: object, unit: List[Path]) -> List[pyrogram.Message]:
+        if len(unit) > 1:
+            return await self.__send(result, unit)
+
+        if result is None:
+            return await self.__send_split(unit[0])
+
+        key, media = result
+
+        if media is None:
+            while True:
+                try:
+                    msg = await userge.files.send(self.__chat_id, key,
+                                                  caption=unit[0].name,
+                                                  disable_notification=True)
+                    break
+
+                except FloodWait as f_e:
+                    LOGGER.info(f"FloodWait ({f_e.x}s) while sending {unit[0].name}")
+                    await asyncio.sleep(f_e.x)
+
+            if msg is not None:
+                return [msg]
+
+            # saved file is not available anymore
+            media = await self.__prepare(unit[0])
+
+        msgs = await self.__send(media, unit)
+
+        if msgs:
+            userge.files.save(key, msgs[0], str(unit[0]))
+
+        return msgs
+
+    async def __upload_part(self,
+                            index: int,
+                            path: Path,
+                            file_hash: object,
+                            lock: asyncio.Lock,
+                            slots: asyncio.Semaphore) -> Tuple[Path, int, str, object]:
+
+        part = Path(SPLIT_PATH, f"{path.name}.{index + 1:03d}")
+
+        await slots.acquire()
+
+        try:
+            # parts are written in order, so the whole file is hashed in the same pass
+            async with lock:
+                size, digest = await asyncio.get_event_loop().run_in_executor(
+                    None, write_part, str(path), index * self.__split_size,
+                    self.__split_size, str(part), file_hash)
+
+            file = await self.__save_file(str(part), part.name)
+
+        finally:
+            if part.exists():
+                part.unlink()
+
+            self.__progress.pop(part.name, None)
+            slots.release()
+
+        media = types.InputMediaUploadedDocument(
+            mime_type="application/octet-stream",
+            file=file,
+            attributes=[types.DocumentAttributeFilename(file_name=part.name)])
+
+        return part, size, digest, media
+
+    async def __send_split(self, path: Path) -> List[pyrogram.Message]:
+        if not os.path.isdir(SPLIT_PATH):
+            os.makedirs(SPLIT_PATH)
+
+        size = path.stat().st_size
+        file_hash = hashlib.sha256()
+        lock = asyncio.Lock()
+        # keep one part on disk, pyrogram uploads it with parallel workers
+        slots = asyncio.Semaphore(1)
+        tasks = [asyncio.ensure_future(self.__upload_part(index, path, file_hash, lock, slots))
+                 for index in range(math.ceil(size / self.__split_size))]
+
+        msgs: List[pyrogram.Message] = []
+        parts = []
+
+        try:
+            for task in tasks:
+                part, part_size, digest, media = await task
+                sent = await self.__send(media, [part])
+                msgs.extend(sent)
+                parts.append({'name': part.name,
+                              'size': part_size,
+                              'sha256': digest,
+                              'message_id': sent[0].message_id})
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        manifest = {'name': path.name,
+                    'size': size,
+                    'sha256': file_hash.hexdigest(),
+                    'parts': parts}
+
+        manifest_path = os.path.join(SPLIT_PATH, f"{path.name}{SPLIT_EXT}")
+
+        with open(manifest_path, 'w') as m_f:
+            json.dump(manifest, m_f, indent=2)
+
+        try:
+            msgs.append(await userge.send_document(
+                chat_id=self.__chat_id,
+                document=manifest_path,
+                caption=f"**split file** `{path.name}` __({humanbytes(size)})__\n"
+                        f"__reply__ `.join` __to get the file back__",
+                disable_notification=True))
+
+        finally:
+            os.remove(manifest_path)
+
+        return msgs
+
+    async def __sender(self,
+                       units: List[List[Path]],
+                       results: List[asyncio.Future],
+                       slots: asyncio.Semaphore) -> None:
+
+        for unit, future in zip(units, results):
+            try:
+                msgs = await self.__send_unit(await future, unit)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as u_e:
+                self.__failed.extend((self.__rel(path), str(u_e)) for path in unit)
+                continue
+
+            finally:
+                slots.release()
+
+            if msgs:
+                await CHANNEL.fwd_msgs(msgs)
+
+            for path in unit:
+                self.__sent += 1
+                self.__uploaded += path.stat().st_size
+                self.__done.append(self.__rel(path))
+
+            if len(self.__files) > 1:
+                if not os.path.isdir(MANIFEST_DIR):
+                    os.makedirs(MANIFEST_DIR)
+
+                with open(self.__manifest, 'w') as m_f:
+                    json.dump(self.__done, m_f)
+
+
+def _flush(album: List[Path]) -> List[List[Path]]:
+    # a single media file is not an album
+    return [album] if len(album) > 1 else [[i] for i in album]
+
+
+def _is_album_media(path: Path) -> bool:
+    name = path.name.lower()
+
+    if name.endswith(PHOTO_EXTS):
+        return path.stat().st_size <= MAX_PHOTO_SIZE
+
+    return name.endswith(VIDEO_EXTS)
 
 
 async def get_thumb(path: str = '') -> str:
@@ -144,17 +602,9 @@ async def get_thumb(path: str = '') -> str:
         return THUMB_PATH
 
     if path:
-        metadata = extractMetadata(createParser(path))
+        info = await get_media_info(path, thumb=True)
 
-        if metadata and metadata.has("duration"):
-            return await take_screen_shot(
-                path, metadata.get("duration").seconds)
+        if info.thumb:
+            return info.thumb
 
     return LOGO_PATH
-
-
-async def remove_thumb(thumb: str) -> None:
-    if os.path.exists(thumb) and \
-        thumb != LOGO_PATH and \
-            thumb != THUMB_PATH:
-        os.remove(thumb)
@@ -7,31 +7,666 @@
 # All rights reserved.
 
 
+import bz2
+import gzip
+import lzma
+import struct
+import tarfile
 from asyncio import sleep
 from datetime import datetime
-from math import floor
+from fnmatch import fnmatch
+from heapq import heappush, heappushpop
+from math import floor, ceil
 from pathlib import Path
-from os import remove
-from os.path import join, splitext, basename, dirname, relpath, exists
-from zipfile import ZipFile
+from shutil import copyfileobj
+from os import remove, makedirs, sep
+from os.path import (
+    join, basename, dirname, relpath, exists, getsize, realpath)
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, NamedTuple
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED, is_zipfile
 from threading import Thread
-from multiprocessing import Pool, Lock
-from userge import userge, Message, Config
+from multiprocessing import Pool
+from userge import userge, Message, Config, Job
 from userge.utils import humanbytes
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import py7zr
+    from py7zr.callbacks import ExtractCallback
+    from py7zr.exceptions import CrcError
+except ImportError:
+    py7zr = None
+    ExtractCallback = object
+    CrcError = Exception
+
+try:
+    from py7zr.io import Py7zIO, WriterFactory
+except ImportError:
+    # py7zr < 0.20, archives are tested without progress
+    Py7zIO = WriterFactory = object
+
 LOGGER = userge.getLogger(__name__)
-COUNTER_LOCK = Lock()
+
+COUNTER = Callable[[int], None]
+COPY_BUFFER_SIZE = 1024 * 1024
+# tarfile's own checks of members (python 3.12, backported to 3.8+)
+TAR_FILTER = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+
+ZIP_EOCD = struct.Struct("<4s4H2LH")
+ZIP_EOCD64_LOCATOR = struct.Struct("<4sLQL")
+ZIP_EOCD64 = struct.Struct("<4sQ2H2L4Q")
+ZIP_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+ZIP_MAX_COMMENT = (1 << 16) - 1
 
 
 class ProcessCanceled(Exception):
     """
-    Custom Exception to terminate zipping / unzipping thread.
+    Custom Exception to terminate archiving / extracting thread.
+    """
+
+
+class ArchiveInfo(NamedTuple):
+    """
+    Details of a member in an archive.
+    """
+
+    name: str
+    size: int
+    compress_size: Optional[int]
+    is_dir: bool
+
+
+class _Reader:
+    """
+    File wrapper which reports every read to a counter.
+    """
+
+    def __init__(self, fileobj, counter: COUNTER) -> None:
+        self.__fileobj = fileobj
+        self.__counter = counter
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.__fileobj.read(size)
+        self.__counter(len(data))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self.__fileobj, name)
+
+
+def _is_safe_member(final_file_path: str, name: str) -> bool:
+    root = realpath(final_file_path)
+    return realpath(join(root, name)).startswith(root + sep)
+
+
+def _is_safe_tar_member(final_file_path: str, member: tarfile.TarInfo) -> bool:
+    if not _is_safe_member(final_file_path, member.name) or member.isdev():
+        return False
+
+    if member.issym():
+        # target of a symlink is relative to its folder
+        return _is_safe_member(final_file_path, join(dirname(member.name), member.linkname))
+
+    if member.islnk():
+        return _is_safe_member(final_file_path, member.linkname)
+
+    return True
+
+
+def _unzip(args: Tuple[str, List[str], str]) -> Tuple[int, str]:
+    file_path, file_names, final_file_path = args
+    size = 0
+    error = ""
+
+    with ZipFile(file_path, 'r') as z_f:
+        for file_name in file_names:
+            try:
+                if _is_safe_member(final_file_path, file_name):
+                    z_f.extract(file_name, final_file_path)
+
+                size += z_f.getinfo(file_name).file_size
+
+            except FileExistsError:
+                pass
+
+            except Exception as z_e:
+                LOGGER.exception(z_e)
+                error = str(z_e)
+                break
+
+    return size, error
+
+
+def _test_zip(args: Tuple[str, List[str]]) -> Tuple[int, List[str]]:
+    file_path, file_names = args
+    size = 0
+    bad_members = []
+
+    with ZipFile(file_path, 'r') as z_f:
+        for file_name in file_names:
+            try:
+                # zipfile verifies CRC-32 when a member is read to the end
+                with z_f.open(file_name) as member:
+                    while member.read(COPY_BUFFER_SIZE):
+                        pass
+
+            except Exception as z_e:
+                LOGGER.error(f"corrupted member : {file_name} => {z_e}")
+                bad_members.append(file_name)
+
+            size += z_f.getinfo(file_name).file_size
+
+    return size, bad_members
+
+
+class ArchiveBackend:
+    """
+    Base Class for archive backends.
+    """
+
+    name = ""
+    extensions: Tuple[str, ...] = ()
+
+    @property
+    def is_available(self) -> bool:
+        """
+        Returns True if required modules are installed.
+        """
+        return True
+
+    def match(self, file_path: str) -> str:
+        """
+        Returns matched extension of file path or empty string.
+        """
+
+        for ext in self.extensions:
+            if file_path.lower().endswith(ext):
+                return ext
+
+        return ""
+
+    def total_size(self, file_path: str) -> int:
+        """
+        Returns total bytes which will be reported while extracting.
+        """
+        return getsize(file_path)
+
+    def compress(self,
+                 root: str,
+                 file_paths: List[str],
+                 final_file_path: str,
+                 counter: COUNTER,
+                 level: Optional[int] = None) -> None:
+        """
+        Write all files into new archive.
+        """
+        raise NotImplementedError
+
+    def extract(self, file_path: str, final_file_path: str, counter: COUNTER) -> None:
+        """
+        Extract all members of archive.
+        """
+        raise NotImplementedError
+
+    def iter_info(self, file_path: str) -> Iterator[ArchiveInfo]:
+        """
+        Yields details of all members in archive.
+        """
+        raise NotImplementedError
+
+    def test(self, file_path: str, counter: COUNTER) -> List[str]:
+        """
+        Decompress all members without writing and returns corrupted members.
+        """
+        raise NotImplementedError
+
+
+class ZipBackend(ArchiveBackend):
+    """
+    Backend for ZIP files.
+    """
+
+    name = "zip"
+    extensions = (".zip",)
+
+    def total_size(self, file_path: str) -> int:
+        return sum(info.size for info in self.iter_info(file_path))
+
+    def compress(self,
+                 root: str,
+                 file_paths: List[str],
+                 final_file_path: str,
+                 counter: COUNTER,
+                 level: Optional[int] = None) -> None:
+
+        compress_type = ZIP_STORED if level is None else ZIP_DEFLATED
+
+        with ZipFile(final_file_path, 'w', compress_type, compresslevel=level) as z_f:
+            for file_ in file_paths:
+                z_info = ZipInfo.from_file(file_, relpath(file_, root))
+                z_info.compress_type = compress_type
+
+                with open(file_, 'rb') as src, z_f.open(z_info, 'w') as dest:
+                    copyfileobj(_Reader(src, counter), dest, COPY_BUFFER_SIZE)
+
+    def __chunk_names(self, file_path: str) -> List[List[str]]:
+        chunked_file_names = []
+        temp_file_names = []
+        temp_size = 0
+        min_chunk_size = 1024 * 1024 * 10
+
+        for z_obj in self.iter_info(file_path):
+            temp_size += z_obj.size
+            temp_file_names.append(z_obj.name)
+
+            if temp_size >= min_chunk_size:
+                temp_size = 0
+                chunked_file_names.append(temp_file_names)
+                temp_file_names = []
+
+        if temp_file_names:
+            chunked_file_names.append(temp_file_names)
+
+        return chunked_file_names
+
+    def extract(self, file_path: str, final_file_path: str, counter: COUNTER) -> None:
+        chunked_file_names = self.__chunk_names(file_path)
+
+        with Pool() as pool:
+            for size, error in pool.imap_unordered(
+                    _unzip, [(file_path, f_n_s, final_file_path) for f_n_s in chunked_file_names]):
+
+                if error:
+                    raise Exception(error)
+
+                counter(size)
+
+    def test(self, file_path: str, counter: COUNTER) -> List[str]:
+        chunked_file_names = self.__chunk_names(file_path)
+        bad_members = []
+
+        with Pool() as pool:
+            for size, bad_names in pool.imap_unordered(
+                    _test_zip, [(file_path, f_n_s) for f_n_s in chunked_file_names]):
+
+                bad_members.extend(bad_names)
+                counter(size)
+
+        return bad_members
+
+    @staticmethod
+    def __find_central_dir(z_f) -> Tuple[int, int]:
+        z_f.seek(0, 2)
+        f_size = z_f.tell()
+        tail_size = min(f_size, ZIP_EOCD.size + ZIP_MAX_COMMENT)
+
+        z_f.seek(f_size - tail_size)
+        tail = z_f.read(tail_size)
+        pos = tail.rfind(b"PK\005\006")
+
+        if pos == -1:
+            raise Exception("central directory not found!")
+
+        eocd_pos = f_size - tail_size + pos
+        eocd = ZIP_EOCD.unpack(tail[pos:pos + ZIP_EOCD.size])
+        total, cd_size, cd_offset = eocd[4], eocd[5], eocd[6]
+        zip64_size = 0
+
+        if total == 0xFFFF or 0xFFFFFFFF in (cd_size, cd_offset):
+            z_f.seek(eocd_pos - ZIP_EOCD64_LOCATOR.size)
+            locator = ZIP_EOCD64_LOCATOR.unpack(z_f.read(ZIP_EOCD64_LOCATOR.size))
+
+            if locator[0] == b"PK\006\007":
+                z_f.seek(locator[2])
+                eocd64 = ZIP_EOCD64.unpack(z_f.read(ZIP_EOCD64.size))
+                total, cd_size, cd_offset = eocd64[7], eocd64[8], eocd64[9]
+                zip64_size = ZIP_EOCD64.size + ZIP_EOCD64_LOCATOR.size
+
+        # archives with prepended data (ex: self-extracting) have shifted offsets
+        concat = eocd_pos - cd_size - cd_offset - zip64_size
+
+        return cd_offset + max(concat, 0), total
+
+    def iter_info(self, file_path: str) -> Iterator[ArchiveInfo]:
+        # read central directory record by record instead of loading infolist()
+        with open(file_path, 'rb', buffering=COPY_BUFFER_SIZE) as z_f:
+            start, total = self.__find_central_dir(z_f)
+            z_f.seek(start)
+
+            for _ in range(total):
+                header = z_f.read(ZIP_CENTRAL_DIR.size)
+
+                if len(header) != ZIP_CENTRAL_DIR.size or header[:4] != b"PK\001\002":
+                    raise Exception("bad central directory!")
+
+                c_d = ZIP_CENTRAL_DIR.unpack(header)
+                flags, compress_size, file_size = c_d[5], c_d[10], c_d[11]
+                name_len, extra_len, comment_len = c_d[12], c_d[13], c_d[14]
+
+                name = z_f.read(name_len).decode('utf-8' if flags & 0x800 else 'cp437')
+                extra = z_f.read(extra_len)
+                z_f.seek(comment_len, 1)
+
+                if 0xFFFFFFFF in (file_size, compress_size):
+                    file_size, compress_size = self.__zip64_sizes(
+                        extra, file_size, compress_size)
+
+                yield ArchiveInfo(name, file_size, compress_size, name.endswith('/'))
+
+    @staticmethod
+    def __zip64_sizes(extra: bytes, file_size: int, compress_size: int) -> Tuple[int, int]:
+        while len(extra) >= 4:
+            tp, ln = struct.unpack('<HH', extra[:4])
+
+            if tp == 0x0001:
+                data = extra[4:4 + ln]
+
+                if file_size == 0xFFFFFFFF:
+                    file_size = struct.unpack('<Q', data[:8])[0]
+                    data = data[8:]
+
+                if compress_size == 0xFFFFFFFF:
+                    compress_size = struct.unpack('<Q', data[:8])[0]
+
+                break
+
+            extra = extra[4 + ln:]
+
+        return file_size, compress_size
+
+
+class TarBackend(ArchiveBackend):
+    """
+    Backend for TAR files (plain, gzip, bzip2, xz and zstd).
+    """
+
+    def __init__(self, name: str, comp: str, extensions: Tuple[str, ...]) -> None:
+        self.name = name
+        self.extensions = extensions
+        self.__comp = comp
+
+    @property
+    def is_available(self) -> bool:
+        return self.__comp != "zst" or zstandard is not None
+
+    def compress(self,
+                 root: str,
+                 file_paths: List[str],
+                 final_file_path: str,
+                 counter: COUNTER,
+                 level: Optional[int] = None) -> None:
+
+        with open(final_file_path, 'wb') as out:
+            if self.__comp == "zst":
+                # zstd is the only codec here which can compress using all cores
+                z_c = zstandard.ZstdCompressor(level=level or 3, threads=-1, write_checksum=True)
+
+                with z_c.stream_writer(out) as writer, \
+                        tarfile.open(fileobj=writer, mode='w|') as tar:
+                    self.__add_files(tar, root, file_paths, counter)
+
+            else:
+                kwargs = {}
+
+                if level is not None and self.__comp == "xz":
+                    kwargs['preset'] = level
+
+                elif level is not None and self.__comp:
+                    kwargs['compresslevel'] = level
+
+                mode = f"w:{self.__comp}" if self.__comp else 'w'
+
+                with tarfile.open(fileobj=out, mode=mode, **kwargs) as tar:
+                    self.__add_files(tar, root, file_paths, counter)
+
+    @staticmethod
+    def __add_files(tar: tarfile.TarFile,
+                    root: str,
+                    file_paths: List[str],
+                    counter: COUNTER) -> None:
+
+        for file_ in file_paths:
+            t_info = tar.gettarinfo(file_, relpath(file_, root))
+
+            with open(file_, 'rb') as src:
+                tar.addfile(t_info, _Reader(src, counter))
+
+    def __decompressor(self, fileobj):
+        # these verify checksums of the stream, tarfile's stream mode doesn't
+        if self.__comp == "gz":
+            return gzip.GzipFile(fileobj=fileobj, mode='rb')
+
+        if self.__comp == "bz2":
+            return bz2.BZ2File(fileobj)
+
+        if self.__comp == "xz":
+            return lzma.LZMAFile(fileobj)
+
+        if self.__comp == "zst":
+            return zstandard.ZstdDecompressor().stream_reader(fileobj)
+
+        return fileobj
+
+    @staticmethod
+    def __open(fileobj) -> tarfile.TarFile:
+        return tarfile.open(fileobj=fileobj, mode='r|*')
+
+    def extract(self, file_path: str, final_file_path: str, counter: COUNTER) -> None:
+        with open(file_path, 'rb') as t_f, \
+                self.__open(self.__decompressor(_Reader(t_f, counter))) as tar:
+            for member in tar:
+                if _is_safe_tar_member(final_file_path, member):
+                    tar.extract(member, final_file_path, **TAR_FILTER)
+
+                else:
+                    LOGGER.warning(f"skipped unsafe member : {member.name}")
+
+                # stream mode, don't keep all members in memory
+                tar.members = []
+
+    def iter_info(self, file_path: str) -> Iterator[ArchiveInfo]:
+        with open(file_path, 'rb') as t_f, self.__open(self.__decompressor(t_f)) as tar:
+            for member in tar:
+                yield ArchiveInfo(member.name, member.size, None, member.isdir())
+                tar.members = []
+
+    def test(self, file_path: str, counter: COUNTER) -> List[str]:
+        # single compressed stream, so it can't be split between processes.
+        # reading it to the end verifies gzip / xz / zstd checksums.
+        name = ""
+
+        try:
+            with open(file_path, 'rb') as t_f:
+                d_obj = self.__decompressor(_Reader(t_f, counter))
+
+                with self.__open(d_obj) as tar:
+                    for member in tar:
+                        name = member.name
+
+                        if member.isfile():
+                            t_obj = tar.extractfile(member)
+
+                            while t_obj.read(COPY_BUFFER_SIZE):
+                                pass
+
+                        tar.members = []
+
+                # tarfile stops at end of archive marker, read the trailer too
+                while d_obj.read(COPY_BUFFER_SIZE):
+                    pass
+
+        except ProcessCanceled:
+            raise
+
+        except Exception as t_e:
+            LOGGER.error(f"corrupted member : {name} => {t_e}")
+            return [name or basename(file_path)]
+
+        return []
+
+
+class _SevenZipCallback(ExtractCallback):
+    """
+    Reports extracted bytes of 7z archives.
     """
 
+    def __init__(self, counter: COUNTER) -> None:
+        self.__counter = counter
 
-class Zip:
+    def report_start_preparation(self):
+        pass
+
+    def report_start(self, processing_file_path, processing_bytes):
+        pass
+
+    def report_update(self, decompressed_bytes):
+        pass
+
+    def report_end(self, processing_file_path, wrote_bytes):
+        self.__counter(int(wrote_bytes))
+
+    def report_warning(self, message):
+        LOGGER.warning(message)
+
+    def report_postprocess(self):
+        pass
+
+
+class _SevenZipCounter(Py7zIO):
     """
-    Class for ZIP / UNZIP (files / folders).
+    Drops decompressed data of a 7z member and reports its size.
+    """
+
+    def __init__(self, counter: COUNTER) -> None:
+        self.__counter = counter
+        self.__size = 0
+
+    def write(self, s: bytes) -> int:
+        self.__size += len(s)
+        self.__counter(len(s))
+        return len(s)
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        return b''
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return 0
+
+    def flush(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return self.__size
+
+
+class _SevenZipCounterFactory(WriterFactory):
+    """
+    Creates :obj:`_SevenZipCounter` for every member.
+    """
+
+    def __init__(self, counter: COUNTER) -> None:
+        self.__counter = counter
+
+    def create(self, filename: str) -> _SevenZipCounter:
+        return _SevenZipCounter(self.__counter)
+
+
+class SevenZipBackend(ArchiveBackend):
+    """
+    Backend for 7z files.
+    """
+
+    name = "7z"
+    extensions = (".7z",)
+
+    @property
+    def is_available(self) -> bool:
+        return py7zr is not None
+
+    def total_size(self, file_path: str) -> int:
+        return sum(info.size for info in self.iter_info(file_path))
+
+    def compress(self,
+                 root: str,
+                 file_paths: List[str],
+                 final_file_path: str,
+                 counter: COUNTER,
+                 level: Optional[int] = None) -> None:
+
+        with py7zr.SevenZipFile(final_file_path, 'w') as s_z:
+            for file_ in file_paths:
+                s_z.write(file_, relpath(file_, root))
+                counter(getsize(file_))
+
+    def extract(self, file_path: str, final_file_path: str, counter: COUNTER) -> None:
+        with py7zr.SevenZipFile(file_path, 'r') as s_z:
+            s_z.extractall(path=final_file_path, callback=_SevenZipCallback(counter))
+
+    def iter_info(self, file_path: str) -> Iterator[ArchiveInfo]:
+        with py7zr.SevenZipFile(file_path, 'r') as s_z:
+            for s_obj in s_z.list():
+                yield ArchiveInfo(s_obj.filename, s_obj.uncompressed or 0,
+                                  s_obj.compressed, s_obj.is_directory)
+
+    def test(self, file_path: str, counter: COUNTER) -> List[str]:
+        if WriterFactory is object:
+            with py7zr.SevenZipFile(file_path, 'r') as s_z:
+                bad_member = s_z.testzip()
+
+            counter(self.total_size(file_path))
+
+            return [bad_member] if bad_member else []
+
+        with py7zr.SevenZipFile(file_path, 'r') as s_z:
+            try:
+                # members are decompressed without writing, CRCs are checked on the way
+                s_z.extractall(factory=_SevenZipCounterFactory(counter))
+
+            except CrcError as c_e:
+                return [c_e.args[2] or basename(file_path)]
+
+        return []
+
+
+BACKENDS = {
+    '-zip': ZipBackend(),
+    '-tar': TarBackend("tar", "", (".tar",)),
+    '-gz': TarBackend("tar.gz", "gz", (".tar.gz", ".tgz")),
+    '-bz': TarBackend("tar.bz2", "bz2", (".tar.bz2", ".tbz2", ".tbz")),
+    '-xz': TarBackend("tar.xz", "xz", (".tar.xz", ".txz")),
+    '-zst': TarBackend("tar.zst", "zst", (".tar.zst", ".tzst")),
+    '-sz': SevenZipBackend()
+}
+
+
+def get_backend(file_path: str) -> Tuple[Optional[ArchiveBackend], str]:
+    """
+    Returns available backend and matched extension for archive.
+    """
+
+    found = [(backend, backend.match(file_path)) for backend in BACKENDS.values()]
+    found = sorted([i for i in found if i[1]], key=lambda x: len(x[1]), reverse=True)
+
+    if not found:
+        if is_zipfile(file_path):
+            found = [(BACKENDS['-zip'], "")]
+
+        elif tarfile.is_tarfile(file_path):
+            found = [(BACKENDS['-tar'], "")]
+
+    if found and found[0][0].is_available:
+        return found[0]
+
+    return None, ""
+
+
+class Archive:
+    """
+    Class for ARCHIVE / EXTRACT (files / folders).
     """
 
     def __init__(self, file_path: str) -> None:
@@ -40,20 +675,21 @@ class Zip:
         self.__current = 0
         self.__total = 0
         self.__output = ""
+        self.__bad_members: List[str] = []
         self.__is_canceled = False
         self.__is_finished = False
 
     @property
-    def completed_files(self) -> int:
+    def completed(self) -> int:
         """
-        Returns completed files.
+        Returns completed bytes.
         """
         return self.__current
 
     @property
-    def total_files(self) -> int:
+    def total(self) -> int:
         """
-        Returns total files.
+        Returns total bytes.
         """
         return self.__total
 
@@ -62,6 +698,9 @@ class Zip:
         """
         Returns percentage.
         """
+        if not self.__total:
+            return 0
+
         return round((self.__current / self.__total) * 100, 2)
 
     @property
@@ -88,7 +727,7 @@ class Zip:
         """
         Returns True if finished.
         """
-        return self.__current == self.__total or self.__is_finished
+        return self.__is_finished
 
     def cancel(self) -> None:
         """
@@ -113,78 +752,43 @@ class Zip:
         """
         return self.__final_file_path
 
-    def __zip(self, file_paths: list, final_file_path: str) -> None:
-        root = dirname(self.__file_path)
-
-        if exists(final_file_path):
-            remove(final_file_path)
-
-        with ZipFile(final_file_path, 'w') as z_f:
-            try:
-                for file_ in file_paths:
-
-                    if self.__is_canceled:
-                        raise ProcessCanceled
-
-                    z_f.write(file_, relpath(file_, root))
-
-                    self.__current += 1
-
-            except ProcessCanceled:
-                self.__output = "`process canceled!`"
-
-            except Exception as z_e:
-                LOGGER.exception(z_e)
-                self.__output = z_e
-
-            finally:
-                self.__finish()
-
-    def __counter(self, out_tpl: tuple) -> None:
-        c_out, error = out_tpl
-
-        if error:
-            self.__output = error
-            self.__finish()
-            raise Exception(error)
+    @property
+    def bad_members(self) -> List[str]:
+        """
+        Returns corrupted members found by test.
+        """
+        return self.__bad_members
 
-        with COUNTER_LOCK:
-            self.__current += c_out
+    def __counter(self, size: int) -> None:
+        self.__current += size
 
         if self.__is_canceled:
-            self.__output = "`process canceled!`"
-            self.__finish()
             raise ProcessCanceled
 
-    @staticmethod
-    def _unzip(file_path: str, file_names: list, final_file_path: str) -> tuple:
-        error = ""
+    def __run(self, func: Callable, *args) -> None:
+        try:
+            func(*args)
 
-        with ZipFile(file_path, 'r') as z_f:
-            for file_name in file_names:
-                try:
-                    z_f.extract(file_name, final_file_path)
-
-                except FileExistsError:
-                    pass
+        except ProcessCanceled:
+            self.__output = "`process canceled!`"
 
-                except Exception as z_e:
-                    LOGGER.exception(z_e)
-                    error = z_e
-                    break
+        except Exception as z_e:
+            LOGGER.exception(z_e)
+            self.__output = str(z_e) or z_e.__class__.__name__
 
-        return len(file_names), error
+        finally:
+            self.__finish()
 
-    def zip_path(self) -> None:
+    def compress_path(self, backend: ArchiveBackend, level: Optional[int] = None) -> None:
         """
-        ZIP file path.
+        ARCHIVE file path.
         """
 
         file_paths = []
 
         def explorer(path: Path) -> None:
             if path.is_file():
-                self.__total += 1
+                self.__total += path.stat().st_size
                 file_paths.append(str(path))
 
             elif path.is_dir():
@@ -193,115 +797,156 @@ class Zip:
 
         explorer(Path(self.__file_path))
 
-        file_name = basename(self.__file_path) + '.zip'
+        file_name = basename(self.__file_path.rstrip(sep)) + backend.extensions[0]
         self.__final_file_path = join(Config.DOWN_PATH, file_name)
 
-        Thread(target=self.__zip, args=(file_paths, self.__final_file_path)).start()
+        if exists(self.__final_file_path):
+            remove(self.__final_file_path)
+
+        Thread(target=self.__run,
+               args=(backend.compress, dirname(self.__file_path.rstrip(sep)),
+                     file_paths, self.__final_file_path, self.__counter, level)).start()
 
-    def unzip_path(self) -> None:
+    def extract_path(self, backend: ArchiveBackend, ext: str) -> None:
         """
-        UNZIP file path.
+        EXTRACT file path.
         """
 
-        with ZipFile(self.__file_path, 'r') as z_f:
-            chunked_file_names = []
-            temp_file_names = []
-            temp_size = 0
-            min_chunk_size = 1024 * 1024 * 10
-
-            for z_obj in z_f.infolist():
-                self.__total += 1
-                temp_size += z_obj.file_size
-                temp_file_names.append(z_obj.filename)
+        dir_name = basename(self.__file_path)
 
-                if temp_size >= min_chunk_size:
-                    temp_size = 0
-                    chunked_file_names.append(temp_file_names)
-                    temp_file_names = []
+        if ext:
+            dir_name = dir_name[:-len(ext)]
 
-            if temp_file_names:
-                chunked_file_names.append(temp_file_names)
-
-            del temp_file_names, temp_size, min_chunk_size
-
-        dir_name = splitext(basename(self.__file_path))[0]
         self.__final_file_path = join(Config.DOWN_PATH, dir_name)
 
-        pool = Pool()
+        def _extract() -> None:
+            self.__total = backend.total_size(self.__file_path)
 
-        for f_n_s in chunked_file_names:
-            pool.apply_async(self._unzip,
-                             args=(self.__file_path, f_n_s, self.__final_file_path),
-                             callback=self.__counter)
+            if not exists(self.__final_file_path):
+                makedirs(self.__final_file_path)
 
-        pool.close()
+            backend.extract(self.__file_path, self.__final_file_path, self.__counter)
 
-    def get_info(self) -> list:
+        Thread(target=self.__run, args=(_extract,)).start()
+
+    def test_path(self, backend: ArchiveBackend) -> None:
         """
-        Returns ZIP info.
+        TEST file path.
         """
 
-        with ZipFile(self.__file_path, 'r') as z_f:
-            return z_f.infolist()
+        self.__final_file_path = "null"
+
+        def _test() -> None:
+            self.__total = backend.total_size(self.__file_path)
+            self.__bad_members = backend.test(self.__file_path, self.__counter)
+
+        Thread(target=self.__run, args=(_test,)).start()
+
+
+async def _wait(message: Message,
+                a_obj: Archive,
+                tmp: str,
+                file_path: str,
+                job: Optional[Job] = None) -> None:
+    while not a_obj.finished:
+        if message.process_is_canceled:
+            a_obj.cancel()
+
+        if job is not None:
+            job.set_progress(a_obj.completed, a_obj.total)
+
+        await message.try_to_edit(tmp.format(a_obj.progress,
+                                             a_obj.percentage,
+                                             file_path,
+                                             a_obj.final_file_path,
+                                             humanbytes(a_obj.completed) or "0 B",
+                                             humanbytes(a_obj.total) or "0 B"))
+
+        await sleep(3)
 
 
 @userge.on_cmd('zip', about="""\
 __Zip file / folder__
 
+**Available Flags:**
+
+    `-tar` : tar archive
+    `-gz` : tar.gz archive
+    `-bz` : tar.bz2 archive
+    `-xz` : tar.xz archive
+    `-zst` : tar.zst archive (uses all cores)
+    `-sz` : 7z archive
+    `-l` : compression level (ex: `-l9`)
+
 **Usage:**
 
-    `.zip [file path]`""")
+    `.zip [file path]`
+    `.zip -gz [file path]`""")
 async def zip_(message: Message):
     """zip"""
 
-    file_path = message.input_str
+    file_path = message.filtered_input_str
+    flags = message.flags
 
     if not file_path:
         await message.err("missing file path!")
+        return
 
     if not exists(file_path):
         await message.err("file path not exists!")
+        return
+
+    b_key = '-zip'
+
+    for flag in flags:
+        if flag in BACKENDS:
+            b_key = flag
+
+    if not BACKENDS[b_key].is_available:
+        await message.err(f"{BACKENDS[b_key].name} is not supported in this server!")
+        return
+
+    await userge.jobs.submit('zip', message, {'path': file_path,
+                                              'backend': b_key,
+                                              'level': int(flags['-l']) if flags.get('-l') else None})
+
+
+@userge.jobs.runner('zip', limit=1)
+async def _zip(job: Job, message: Message):
+    file_path = job.args['path']
 
     start_t = datetime.now()
-    z_obj = Zip(file_path)
-    z_obj.zip_path()
+    a_obj = Archive(file_path)
+    a_obj.compress_path(BACKENDS[job.args['backend']], job.args['level'])
 
     tmp = \
-        "__Zipping file path...__\n" + \
+        "__Archiving file path...__\n" + \
         "```{}({}%)```\n" + \
         "**File Path** : `{}`\n" + \
         "**Dest** : `{}`\n" + \
         "**Completed** : `{}/{}`"
 
-    while not z_obj.finished:
-        if message.process_is_canceled:
-            z_obj.cancel()
-
-        await message.try_to_edit(tmp.format(z_obj.progress,
-                                             z_obj.percentage,
-                                             file_path,
-                                             z_obj.final_file_path,
-                                             z_obj.completed_files,
-                                             z_obj.total_files))
-
-        await sleep(3)
+    await _wait(message, a_obj, tmp, file_path, job)
 
-    if z_obj.output:
-        await message.err(z_obj.output, log=True)
+    if a_obj.output:
+        await message.err(a_obj.output, log=True)
 
     else:
         end_t = datetime.now()
         m_s = (end_t - start_t).seconds
         await message.edit(
-            f"**zipped** `{file_path}` into `{z_obj.final_file_path}` in {m_s} seconds.", log=True)
+            f"**archived** `{file_path}` into `{a_obj.final_file_path}` in {m_s} seconds.",
+            log=True)
 
 
 @userge.on_cmd('unzip', about="""\
-__UnZip zip file__
+__UnZip archive file__
+
+    supported types : `zip, tar, tar.gz, tar.bz2, tar.xz, tar.zst, 7z`
 
 **Usage:**
 
-    `.unzip [zip file path]`""")
+    `.unzip [archive file path]`""")
 async def unzip_(message: Message):
     """unzip"""
 
@@ -309,73 +954,249 @@ async def unzip_(message: Message):
 
     if not file_path:
         await message.err("missing file path!")
+        return
 
     if not exists(file_path):
         await message.err("file path not exists!")
+        return
 
-    if not file_path.endswith(".zip"):
+    if get_backend(file_path)[0] is None:
         await message.err("unsupported file type!")
+        return
+
+    await userge.jobs.submit('unzip', message, {'path': file_path})
+
+
+@userge.jobs.runner('unzip', limit=1)
+async def _unzip_job(job: Job, message: Message):
+    file_path = job.args['path']
+    backend, ext = get_backend(file_path)
 
     start_t = datetime.now()
-    z_obj = Zip(file_path)
-    z_obj.unzip_path()
+    a_obj = Archive(file_path)
+    a_obj.extract_path(backend, ext)
 
     tmp = \
-        "__UnZipping file path...__\n" + \
+        "__Extracting file path...__\n" + \
         "```{}({}%)```\n" + \
         "**File Path** : `{}`\n" + \
         "**Dest** : `{}`\n" + \
         "**Completed** : `{}/{}`"
 
-    while not z_obj.finished:
-        if message.process_is_canceled:
-            z_obj.cancel()
-
-        await message.try_to_edit(tmp.format(z_obj.progress,
-                                             z_obj.percentage,
-                                             file_path,
-                                             z_obj.final_file_path,
-                                             z_obj.completed_files,
-                                             z_obj.total_files))
-
-        await sleep(3)
+    await _wait(message, a_obj, tmp, file_path, job)
 
-    if z_obj.output:
-        await message.err(z_obj.output, log=True)
+    if a_obj.output:
+        await message.err(a_obj.output, log=True)
 
     else:
         end_t = datetime.now()
         m_s = (end_t - start_t).seconds
         await message.edit(
-            f"**unzipped** `{file_path}` into `{z_obj.final_file_path}` in {m_s} seconds.", log=True)
+            f"**extracted** `{file_path}` into `{a_obj.final_file_path}` in {m_s} seconds.",
+            log=True)
+
+
+def _ratio(size: int, compress_size: Optional[int]) -> str:
+    if not size or compress_size is None:
+        return "-"
+
+    return f"{round((1 - compress_size / size) * 100, 1)}%"
+
+
+@userge.new_thread
+def _get_info(backend: ArchiveBackend,
+              file_path: str,
+              pattern: str,
+              page: int,
+              limit: int,
+              depth: int,
+              summary: bool) -> str:
+
+    # only the current page, per directory totals or top files are kept in memory
+    lines: List[str] = []
+    dirs: Dict[str, List[int]] = {}
+    largest: List[Tuple[int, str]] = []
+    start, end = (page - 1) * limit, page * limit
+    count = size = compress_size = 0
+    compress_known = True
+
+    for info in backend.iter_info(file_path):
+        if info.is_dir or (pattern and not fnmatch(info.name, pattern)):
+            continue
+
+        if start <= count < end and not depth and not summary:
+            lines.append(f"📄 {info.name} __({humanbytes(info.size) or '0 B'})__")
+
+        count += 1
+        size += info.size
+
+        if info.compress_size is None:
+            compress_known = False
+        else:
+            compress_size += info.compress_size
+
+        if depth:
+            d_name = '/'.join(info.name.split('/')[:-1][:depth]) or '.'
+            d_info = dirs.setdefault(d_name, [0, 0, 0])
+            d_info[0] += 1
+            d_info[1] += info.size
+            d_info[2] += info.compress_size or 0
+
+        elif summary:
+            if len(largest) < 5:
+                heappush(largest, (info.size, info.name))
+            else:
+                heappushpop(largest, (info.size, info.name))
+
+    if not compress_known:
+        # members of tar / 7z files don't have their own compressed sizes
+        compress_size = getsize(file_path)
+
+    output = f"**File Path** : `{file_path}`\n"
+
+    if pattern:
+        output += f"**Filter** : `{pattern}`\n"
+
+    output += f"**Total Files** : `{count}`\n" + \
+        f"**Total Size** : `{humanbytes(size) or '0 B'}`\n" + \
+        f"**Compressed** : `{humanbytes(compress_size) or '0 B'}` " + \
+        f"__({_ratio(size, compress_size)})__\n"
+
+    if depth:
+        items = sorted(dirs.items(), key=lambda x: x[1][1], reverse=True)
+        pages = max(ceil(len(items) / limit), 1)
+
+        for d_name, (d_count, d_size, d_compress_size) in items[start:end]:
+            lines.append(f"📁 {d_name} __({d_count} files, {humanbytes(d_size) or '0 B'}" + \
+                (f", {_ratio(d_size, d_compress_size)})__" if compress_known else ")__"))
+
+    elif summary:
+        pages = 1
+        lines.append("__Largest Files__ :")
+
+        for l_size, l_name in sorted(largest, reverse=True):
+            lines.append(f"📄 {l_name} __({humanbytes(l_size) or '0 B'})__")
+
+    else:
+        pages = max(ceil(count / limit), 1)
+
+    output += f"**Page** : `{page}/{pages}`\n\n"
+
+    return output + '\n'.join(lines)
 
 
 @userge.on_cmd('zipinfo', about="""\
-__File content of Zip file__
+__File content of archive file__
+
+**Available Flags:**
+
+    `-p` : page number (default 1)
+    `-l` : files per page (default 50)
+    `-t` : tree view, totals per directory (ex: `-t2` for depth 2)
+    `-s` : summary and largest files
 
 **Usage:**
 
-    `.zipinfo [zip file]`""")
+    `.zipinfo [archive file]`
+    `.zipinfo -p2 -l100 [archive file] | [glob pattern]`
+    `.zipinfo -t [archive file] | *.mp4`""")
 async def zipinfo_(message: Message):
     """zipinfo"""
 
-    file_path = message.input_str
+    file_path = message.filtered_input_str
+    flags = message.flags
+    pattern = ""
+
+    if '|' in file_path:
+        file_path, pattern = file_path.split('|', maxsplit=1)
+        file_path = file_path.strip()
+        pattern = pattern.strip()
 
     if not file_path:
         await message.err("missing file path!")
+        return
 
     if not exists(file_path):
         await message.err("file path not exists!")
+        return
+
+    backend, _ = get_backend(file_path)
 
-    if not file_path.endswith(".zip"):
+    if backend is None:
         await message.err("unsupported file type!")
+        return
+
+    await message.edit("`Reading archive...`")
 
-    z_obj = Zip(file_path)
-    infos = z_obj.get_info()
+    page = max(int(flags.get('-p') or 1), 1)
+    limit = max(int(flags.get('-l') or 50), 1)
+    depth = int(flags.get('-t') or 1) if '-t' in flags else 0
 
-    output = f"**File Path** : `{file_path}`\n**Total Files** : `{len(infos)}`\n\n"
+    try:
+        output = await _get_info(backend, file_path, pattern,
+                                 page, limit, depth, '-s' in flags)
 
-    for file_ in infos:
-        output += f"📄 {file_.filename} __({humanbytes(file_.file_size)})__\n"
+    except Exception as z_e:
+        LOGGER.exception(z_e)
+        await message.err(str(z_e))
+        return
 
     await message.edit_or_send_as_file(text=output, caption=file_path, log=True)
+
+
+@userge.on_cmd('ziptest', about="""\
+__Test archive file without extracting__
+
+    supported types : `zip, tar, tar.gz, tar.bz2, tar.xz, tar.zst, 7z`
+
+**Usage:**
+
+    `.ziptest [archive file path]`""")
+async def ziptest_(message: Message):
+    """ziptest"""
+
+    file_path = message.input_str
+
+    if not file_path:
+        await message.err("missing file path!")
+        return
+
+    if not exists(file_path):
+        await message.err("file path not exists!")
+        return
+
+    backend, _ = get_backend(file_path)
+
+    if backend is None:
+        await message.err("unsupported file type!")
+        return
+
+    start_t = datetime.now()
+    a_obj = Archive(file_path)
+    a_obj.test_path(backend)
+
+    tmp = \
+        "__Testing file path...__\n" + \
+        "```{}({}%)```\n" + \
+        "**File Path** : `{}`\n" + \
+        "**Dest** : `{}`\n" + \
+        "**Completed** : `{}/{}`"
+
+    await _wait(message, a_obj, tmp, file_path)
+
+    if a_obj.output:
+        await message.err(a_obj.output, log=True)
+        return
+
+    m_s = (datetime.now() - start_t).seconds
+
+    if a_obj.bad_members:
+        output = f"**Tested** `{file_path}` in {m_s} seconds.\n" + \
+            f"**Corrupted Files** : `{len(a_obj.bad_members)}`\n\n" + \
+            '\n'.join(f"❌ {name}" for name in a_obj.bad_members)
+
+        await message.edit_or_send_as_file(text=output, caption=file_path, log=True)
+
+    else:
+        await message.edit(
+            f"**Tested** `{file_path}` in {m_s} seconds, __no errors found.__", log=True)
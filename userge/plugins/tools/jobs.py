@@ -0,0 +1,91 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+from userge import userge, Message
+
+STATUS_EMOJI = {'running': "🔄", 'queued': "🕒", 'paused': "⏸", 'canceled': "🚫"}
+
+
+@userge.on_cmd("jobs", about="""\
+__list and manage download / upload / archive jobs__
+
+**Available Flags:**
+
+    `-c` : cancel job
+    `-p` : pause job
+    `-r` : resume job
+    `-s` : set priority of job (higher runs first)
+
+**Usage:**
+
+    `.jobs`
+    `.jobs [flag][job id]`
+
+**Example:**
+
+    `.jobs -c3`
+    `.jobs -s3 10`""")
+async def jobs_(message: Message):
+    flags = message.flags
+
+    actions = (('-c', userge.jobs.cancel, "canceled"),
+               ('-p', userge.jobs.pause, "paused"),
+               ('-r', userge.jobs.resume, "resumed"))
+
+    for flag, func, done in actions:
+        if flag in flags:
+            if not flags[flag]:
+                await message.err("missing job id!")
+
+            elif func(int(flags[flag])):
+                await message.edit(f"`Job #{flags[flag]} {done}`", del_in=5, log=True)
+
+            else:
+                await message.err(f"can't find job #{flags[flag]} to {flag[1:]}!")
+
+            return
+
+    if '-s' in flags:
+        priority = message.filtered_input_str
+
+        if not flags['-s'] or not priority.lstrip('-').isdigit():
+            await message.err("missing job id or priority!")
+
+        elif userge.jobs.set_priority(int(flags['-s']), int(priority)):
+            await message.edit(
+                f"`Job #{flags['-s']} priority set to {priority}`", del_in=5, log=True)
+
+        else:
+            await message.err(f"can't find job #{flags['-s']}!")
+
+        return
+
+    jobs = userge.jobs.get_jobs()
+
+    if not jobs:
+        await message.edit("`No jobs!`", del_in=5)
+        return
+
+    out = "**--Jobs--**\n\n"
+
+    for job in jobs:
+        out += f"{STATUS_EMOJI.get(job.status, '')} `#{job.id}` **{job.type}** "
+        out += f"__{job.status}__ (priority `{job.priority}`)"
+
+        if job.progress is not None and job.status == "running":
+            out += f" `{round(job.progress, 1)}%`"
+
+        args = job.args.get('path') or job.args.get('url') or job.args.get('link')
+
+        if args:
+            out += f"\n    `{args}`"
+
+        out += "\n"
+
+    await message.edit_or_send_as_file(out, disable_web_page_preview=True)
@@ -10,6 +10,8 @@
 from .config import Config
 from .logger import logging
 from .progress import progress
+from .downloader import Downloader, get_file_name
+from .media import MediaInfo, get_media_info
 
 from .tools import (
     take_screen_shot,
@@ -17,5 +19,6 @@ from .tools import (
     runcmd,
     humanbytes,
     time_formatter,
+    hash_file,
     get_import_path
 )
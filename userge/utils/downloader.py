@@ -0,0 +1,450 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import json
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import aiohttp
+
+from .config import Config
+from .logger import logging
+from .tools import hash_file
+
+LOG = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+CONNECTIONS = 4
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+MAX_RETRIES = 5
+MAX_REDIRECTS = 10
+STATE_SAVE_INTERVAL = 5
+STATE_EXT = ".userge"
+TIMEOUT = aiohttp.ClientTimeout(total=None, connect=30, sock_read=60)
+
+
+class Downloader:
+    """
+    Async HTTP downloader.
+
+    If the server supports ranges, file will be downloaded in parallel segments
+    and the state is saved next to the file, so it can be resumed later.
+
+    Example:
+            downloader = Downloader(url, progress=progress, progress_args=(...))
+            file_path = await downloader.start()
+
+    Parameters:
+        url (``str``):
+            url of the file.
+        file_name (``str``, *optional*):
+            custom file name, defaults to Content-Disposition or url file name.
+        path (``str``, *optional*):
+            download directory, defaults to Config.DOWN_PATH.
+        chunk_size (``int``, *optional*):
+            size of buffer for each read and write.
+        retries (``int``, *optional*):
+            number of retries with backoff for connection errors.
+        connections (``int``, *optional*):
+            max number of parallel segments.
+        verify (``dict``, *optional*):
+            expected `size`, `md5` or `sha256` of the file.
+        progress (``callable``, *optional*):
+            called as progress(current, total, *progress_args) for every chunk.
+        progress_args (``tuple``, *optional*):
+            extra args for progress callback.
+    """
+
+    def __init__(self,
+                 url: str,
+                 file_name: str = '',
+                 path: str = Config.DOWN_PATH,
+                 chunk_size: int = CHUNK_SIZE,
+                 retries: int = MAX_RETRIES,
+                 connections: int = CONNECTIONS,
+                 verify: Optional[Dict[str, str]] = None,
+                 progress: Optional[Callable[..., Any]] = None,
+                 progress_args: Tuple[Any, ...] = ()) -> None:
+
+        self.__url = url
+        self.__file_name = file_name
+        self.__path = path
+        self.__chunk_size = chunk_size
+        self.__retries = retries
+        self.__connections = max(connections, 1)
+        self.__verify = verify or {}
+        self.__segments: List[List[int]] = []
+        self.__progress = progress
+        self.__progress_args = progress_args
+        self.__downloaded = 0
+        self.__total = 0
+        self.__is_canceled = False
+        self.__is_paused = False
+
+    @property
+    def file_name(self) -> str:
+        """
+        Returns file name.
+        """
+        return self.__file_name
+
+    @property
+    def file_path(self) -> str:
+        """
+        Returns file path.
+        """
+        return os.path.join(self.__path, self.__file_name)
+
+    @property
+    def downloaded(self) -> int:
+        """
+        Returns downloaded bytes.
+        """
+        return self.__downloaded
+
+    @property
+    def total(self) -> int:
+        """
+        Returns total bytes or 0 if unknown.
+        """
+        return self.__total
+
+    @property
+    def canceled(self) -> bool:
+        """
+        Returns True if canceled.
+        """
+        return self.__is_canceled
+
+    def cancel(self) -> None:
+        """
+        Cancel the download.
+        """
+        self.__is_canceled = True
+
+    def pause(self) -> None:
+        """
+        Stop the download, but keep the file and its state to continue later.
+        """
+        self.__is_paused = True
+        self.__is_canceled = True
+
+    async def start(self) -> Optional[str]:
+        """
+        Start downloading and returns file path or None if canceled.
+        """
+
+        try:
+            async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+                if self.__connections > 1 and await self.__retry(self.__probe, session):
+                    await self.__download_segments(session)
+
+                else:
+                    await self.__retry(self.__fetch, session)
+
+        except StopAsyncIteration:
+            # progress callback stops the transmission using StopTransmission
+            self.__is_canceled = True
+
+        if self.__is_paused:
+            LOG.info(f"Paused Download => {self.__url}")
+            return None
+
+        if self.__is_canceled:
+            if self.__file_name:
+                for path in (self.file_path, self.__state_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            LOG.info(f"Canceled Download => {self.__url}")
+            return None
+
+        if self.__verify:
+            await self.__check()
+
+        LOG.info(f"Downloaded {self.__url} => {self.file_path}")
+
+        return self.file_path
+
+    @property
+    def __state_path(self) -> str:
+        return self.file_path + STATE_EXT
+
+    async def __retry(self, func: Callable[..., Any], *args: Any) -> Any:
+        attempt = 0
+
+        while True:
+            try:
+                return await func(*args)
+
+            except (aiohttp.ClientPayloadError,
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ServerTimeoutError,
+                    asyncio.TimeoutError,
+                    _RetryableError) as d_e:
+
+                attempt += 1
+
+                if attempt > self.__retries:
+                    raise
+
+                delay = min(2 ** attempt, 60)
+                LOG.warning(f"Download Error => {d_e}, retrying in {delay}s ({attempt})")
+
+                await asyncio.sleep(delay)
+
+    async def __probe(self, session: aiohttp.ClientSession) -> bool:
+        async with session.get(self.__url,
+                               headers={'Range': "bytes=0-0"},
+                               allow_redirects=True,
+                               max_redirects=MAX_REDIRECTS) as resp:
+
+            if resp.status >= 500 or resp.status == 429:
+                raise _RetryableError(f"{resp.status} {resp.reason}")
+
+            resp.raise_for_status()
+
+            if not self.__file_name:
+                self.__file_name = get_file_name(resp)
+
+            content_range = resp.headers.get('Content-Range', '')
+
+            if resp.status != 206 or '/' not in content_range:
+                return False
+
+            total = content_range.split('/')[-1].strip()
+
+            if not total.isdigit():
+                return False
+
+            self.__total = int(total)
+
+        return self.__total >= MIN_SEGMENT_SIZE * 2
+
+    def __load_state(self) -> bool:
+        if not (os.path.exists(self.__state_path) and os.path.exists(self.file_path)):
+            return False
+
+        try:
+            with open(self.__state_path) as s_f:
+                state = json.load(s_f)
+
+        except ValueError:
+            return False
+
+        if state.get('url') != self.__url or state.get('total') != self.__total:
+            return False
+
+        self.__segments = state['segments']
+        self.__downloaded = sum(seg[2] for seg in self.__segments)
+
+        LOG.info(f"Resuming Download => {self.__url} from {self.__downloaded} bytes")
+
+        return True
+
+    def __save_state(self) -> None:
+        tmp_path = self.__state_path + ".tmp"
+
+        with open(tmp_path, 'w') as s_f:
+            json.dump({'url': self.__url,
+                       'total': self.__total,
+                       'segments': self.__segments}, s_f)
+
+        os.replace(tmp_path, self.__state_path)
+
+    async def __state_saver(self) -> None:
+        while True:
+            await asyncio.sleep(STATE_SAVE_INTERVAL)
+            self.__save_state()
+
+    async def __download_segments(self, session: aiohttp.ClientSession) -> None:
+        if not self.__load_state():
+            count = min(self.__connections, self.__total // MIN_SEGMENT_SIZE)
+            size = self.__total // count
+
+            # [start, end, downloaded]
+            self.__segments = [[i * size, (i + 1) * size - 1, 0] for i in range(count)]
+            self.__segments[-1][1] = self.__total - 1
+            self.__downloaded = 0
+
+            _unlink(self.file_path)
+
+            # preallocate, so every segment can write in place
+            with open(self.file_path, 'wb') as d_f:
+                d_f.truncate(self.__total)
+
+            self.__save_state()
+
+        saver = asyncio.ensure_future(self.__state_saver())
+        tasks = [asyncio.ensure_future(self.__retry(self.__fetch_segment, session, segment))
+                 for segment in self.__segments]
+
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+
+            for task in pending:
+                task.cancel()
+
+            for task in done:
+                task.result()
+
+        finally:
+            saver.cancel()
+
+            for task in tasks:
+                task.cancel()
+
+            if not self.__is_canceled or self.__is_paused:
+                self.__save_state()
+
+        if not self.__is_canceled:
+            os.remove(self.__state_path)
+
+    async def __fetch_segment(self,
+                              session: aiohttp.ClientSession,
+                              segment: List[int]) -> None:
+
+        start, end = segment[0], segment[1]
+
+        if start + segment[2] > end:
+            return
+
+        headers = {'Range': f"bytes={start + segment[2]}-{end}"}
+
+        async with session.get(self.__url,
+                               headers=headers,
+                               allow_redirects=True,
+                               max_redirects=MAX_REDIRECTS) as resp:
+
+            if resp.status >= 500 or resp.status == 429:
+                raise _RetryableError(f"{resp.status} {resp.reason}")
+
+            resp.raise_for_status()
+
+            if resp.status != 206:
+                raise Exception("server stopped supporting ranges!")
+
+            with open(self.file_path, 'r+b') as d_f:
+                d_f.seek(start + segment[2])
+
+                async for chunk in resp.content.iter_chunked(self.__chunk_size):
+                    if self.__is_canceled:
+                        return
+
+                    chunk = chunk[:end + 1 - start - segment[2]]
+                    d_f.write(chunk)
+                    segment[2] += len(chunk)
+                    self.__downloaded += len(chunk)
+
+                    if self.__progress is not None:
+                        await self.__progress(self.__downloaded,
+                                              self.__total,
+                                              *self.__progress_args)
+
+        if start + segment[2] <= end:
+            raise _RetryableError(
+                f"connection closed at {start + segment[2]}/{end} bytes of segment")
+
+    async def __check(self) -> None:
+        size = os.path.getsize(self.file_path)
+
+        if 'size' in self.__verify and int(self.__verify['size']) != size:
+            raise Exception(f"size mismatch! (expected {self.__verify['size']}, got {size})")
+
+        loop = asyncio.get_event_loop()
+
+        for algorithm in ('md5', 'sha256'):
+            if algorithm in self.__verify:
+                digest = await loop.run_in_executor(
+                    None, hash_file, self.file_path, algorithm, self.__chunk_size)
+
+                if digest != self.__verify[algorithm].lower():
+                    raise Exception(f"{algorithm} mismatch! (got {digest})")
+
+                LOG.info(f"Verified {algorithm} of {self.file_path} => {digest}")
+
+    async def __fetch(self, session: aiohttp.ClientSession) -> None:
+        headers = {}
+
+        if self.__downloaded:
+            headers['Range'] = f"bytes={self.__downloaded}-"
+
+        async with session.get(self.__url,
+                               headers=headers,
+                               allow_redirects=True,
+                               max_redirects=MAX_REDIRECTS) as resp:
+
+            if resp.status >= 500 or resp.status == 429:
+                raise _RetryableError(f"{resp.status} {resp.reason}")
+
+            resp.raise_for_status()
+
+            if not self.__file_name:
+                self.__file_name = get_file_name(resp)
+
+            if resp.status != 206:
+                # server ignored the range, start over
+                self.__downloaded = 0
+
+            self.__total = self.__downloaded + resp.content_length \
+                if resp.content_length else 0
+
+            mode = 'ab' if self.__downloaded else 'wb'
+
+            if not self.__downloaded:
+                _unlink(self.file_path)
+
+            with open(self.file_path, mode) as d_f:
+                async for chunk in resp.content.iter_chunked(self.__chunk_size):
+                    if self.__is_canceled:
+                        return
+
+                    d_f.write(chunk)
+                    self.__downloaded += len(chunk)
+
+                    if self.__progress is not None:
+                        await self.__progress(self.__downloaded,
+                                              self.__total,
+                                              *self.__progress_args)
+
+            if self.__total and self.__downloaded < self.__total:
+                raise _RetryableError(
+                    f"connection closed at {self.__downloaded}/{self.__total} bytes")
+
+
+class _RetryableError(Exception):
+    """
+    Raised for responses which should be retried.
+    """
+
+
+def _unlink(file_path: str) -> None:
+    # the old file may be a link to a stored blob, writing into it changes every link
+    if os.path.lexists(file_path):
+        os.remove(file_path)
+
+
+
+def get_file_name(resp: aiohttp.ClientResponse) -> str:
+    """
+    Returns file name of the response from Content-Disposition or url.
+    """
+
+    file_name = ''
+
+    if resp.content_disposition is not None:
+        file_name = resp.content_disposition.filename or ''
+
+    if not file_name:
+        # use the url after redirects
+        file_name = unquote(os.path.basename(urlparse(str(resp.url)).path))
+
+    return os.path.basename(file_name.replace('\\', '/')) or "download.bin"
@@ -0,0 +1,167 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from hachoir.metadata import extractMetadata
+from hachoir.parser import createParser
+
+from .config import Config
+from .logger import logging
+from .tools import take_screen_shot
+
+LOG = logging.getLogger(__name__)
+
+THUMBS_PATH = os.path.join(Config.DOWN_PATH, ".thumbs")
+MAX_CACHE_SIZE = 256
+MAX_THUMBS = 256
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_CACHE: 'OrderedDict[Tuple[str, int, int], MediaInfo]' = OrderedDict()
+_RUNNING: Dict[Tuple[str, int, int], asyncio.Future] = {}
+
+
+class MediaInfo(NamedTuple):
+    """
+    Metadata of media file.
+    """
+
+    duration: int
+    width: int
+    height: int
+    codec: str
+    mime_type: str
+    thumb: Optional[str]
+
+
+async def get_media_info(path: str, thumb: bool = False) -> MediaInfo:
+    """
+    Returns metadata of media file and a generated thumbnail if `thumb` is True.
+    Results are cached by (path, size, mtime), so the same file is only probed once.
+    """
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    if key in _RUNNING:
+        await asyncio.shield(_RUNNING[key])
+
+    info = _CACHE.get(key)
+
+    if info is None or (thumb and info.duration
+                        and (info.thumb is None or not os.path.exists(info.thumb))):
+        future = asyncio.get_event_loop().create_future()
+        _RUNNING[key] = future
+
+        try:
+            info = await _load(key, info, thumb)
+
+        finally:
+            future.set_result(None)
+            del _RUNNING[key]
+
+    _CACHE[key] = info
+    _CACHE.move_to_end(key)
+
+    while len(_CACHE) > MAX_CACHE_SIZE:
+        _, old = _CACHE.popitem(last=False)
+
+        if old.thumb and os.path.exists(old.thumb):
+            os.remove(old.thumb)
+
+    return info
+
+
+async def _load(key: Tuple[str, int, int], info: Optional[MediaInfo], thumb: bool) -> MediaInfo:
+    global _POOL
+
+    if info is None:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor()
+
+        LOG.info(f"Probing Media => {key[0]}")
+
+        info = MediaInfo(**await asyncio.get_event_loop().run_in_executor(
+            _POOL, _probe, key[0]), thumb=None)
+
+    if thumb and info.duration:
+        if not os.path.isdir(THUMBS_PATH):
+            os.makedirs(THUMBS_PATH)
+
+        thumb_path = os.path.join(
+            THUMBS_PATH, hashlib.md5(str(key).encode()).hexdigest() + ".jpg")
+
+        # thumbnails are kept on disk, so they survive restarts
+        if os.path.exists(thumb_path):
+            os.utime(thumb_path)
+
+        else:
+            thumb_path = await take_screen_shot(key[0], info.duration, thumb_path)
+            _prune_thumbs()
+
+        info = info._replace(thumb=thumb_path)
+
+    return info
+
+
+def _prune_thumbs() -> None:
+    # remove least recently used thumbnails, also the ones left from old runs
+    paths = [os.path.join(THUMBS_PATH, name) for name in os.listdir(THUMBS_PATH)]
+
+    if len(paths) <= MAX_THUMBS:
+        return
+
+    paths.sort(key=os.path.getmtime)
+
+    for path in paths[:len(paths) - MAX_THUMBS]:
+        os.remove(path)
+
+
+def _probe(path: str) -> Dict[str, Any]:
+    info = {'duration': 0, 'width': 0, 'height': 0, 'codec': '', 'mime_type': ''}
+
+    try:
+        parser = createParser(path)
+
+        if parser is None:
+            return info
+
+        with parser:
+            metadata = extractMetadata(parser)
+
+    except Exception as p_e:
+        LOG.error(f"{path} : {p_e}")
+        return info
+
+    if metadata is None:
+        return info
+
+    # containers keep video details in sub groups
+    groups = [metadata]
+
+    if hasattr(metadata, 'iterGroups'):
+        groups.extend(metadata.iterGroups())
+
+    for meta in groups:
+        for name in ('width', 'height', 'mime_type'):
+            if not info[name] and meta.has(name):
+                info[name] = meta.get(name)
+
+        if not info['duration'] and meta.has('duration'):
+            info['duration'] = meta.get('duration').seconds
+
+        if not info['codec'] and meta.has('compression'):
+            info['codec'] = str(meta.get('compression'))
+
+    return info
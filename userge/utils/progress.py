@@ -28,16 +28,16 @@ async def progress(current: int,
     diff = now - start
 
     if diff % 10 < 0.5 or current == total:
-        percentage = current * 100 // total
-        speed = current // diff
-        time_to_completion = (total - current) // speed
+        percentage = current * 100 // total if total else 0
+        speed = current // diff if diff else 0
+        time_to_completion = (total - current) // speed if total and speed else 0
         time_to_completion = time_formatter(seconds=int(time_to_completion))
         progress_str = "Progress :: {}%\n".format(int(percentage))
 
         out = progress_str + "{0}\n{1} of {2}\nSpeed: {3}/s\nETA: {4}\n".format(
             ud_type,
             humanbytes(current),
-            humanbytes(total),
+            humanbytes(total) or "unknown",
             humanbytes(speed),
             time_to_completion if time_to_completion != '' else "0 s"
         )
@@ -0,0 +1,67 @@
+# Copyright (C) 2020 by UsergeTeam@Github, < https://github.com/UsergeTeam >.
+#
+# This file is part of < https://github.com/UsergeTeam/Userge > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/uaudith/Userge/blob/master/LICENSE >
+#
+# All rights reserved.
+
+
+import os
+import hashlib
+from typing import BinaryIO, Tuple
+
+from .config import Config
+
+SPLIT_EXT = ".split.json"
+SPLIT_PATH = os.path.join(Config.DOWN_PATH, ".split")
+CHUNK_SIZE = 1024 * 1024
+
+
+def write_part(path: str,
+               offset: int,
+               length: int,
+               part_path: str,
+               file_hash: object) -> Tuple[int, str]:
+    """
+    Copy `length` bytes from `offset` of the file to `part_path`.
+    Updates `file_hash` with the copied bytes and returns size and sha256 of the part.
+    """
+
+    part_hash = hashlib.sha256()
+    size = 0
+
+    with open(path, 'rb') as s_f, open(part_path, 'wb') as p_f:
+        s_f.seek(offset)
+
+        while size < length:
+            chunk = s_f.read(min(CHUNK_SIZE, length - size))
+
+            if not chunk:
+                break
+
+            p_f.write(chunk)
+            part_hash.update(chunk)
+            file_hash.update(chunk)
+            size += len(chunk)
+
+    return size, part_hash.hexdigest()
+
+
+def append_part(part_path: str, out_file: BinaryIO, file_hash: object) -> Tuple[int, str]:
+    """
+    Append the part to `out_file`.
+    Updates `file_hash` with the appended bytes and returns size and sha256 of the part.
+    """
+
+    part_hash = hashlib.sha256()
+    size = 0
+
+    with open(part_path, 'rb') as p_f:
+        for chunk in iter(lambda: p_f.read(CHUNK_SIZE), b''):
+            out_file.write(chunk)
+            part_hash.update(chunk)
+            file_hash.update(chunk)
+            size += len(chunk)
+
+    return size, part_hash.hexdigest()
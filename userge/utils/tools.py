@@ -9,7 +9,8 @@
 
 import asyncio
 import shlex
-from os.path import isfile, relpath
+import hashlib
+from os.path import isfile, relpath, exists
 from glob import glob
 from .logger import logging
 
@@ -41,6 +42,16 @@ def time_formatter(seconds: int) -> str:
     return tmp[:-2]
 
 
+def hash_file(path: str, algorithm: str = 'sha256', chunk_size: int = 1024 * 1024) -> str:
+    hash_obj = hashlib.new(algorithm)
+
+    with open(path, 'rb') as h_f:
+        for chunk in iter(lambda: h_f.read(chunk_size), b''):
+            hash_obj.update(chunk)
+
+    return hash_obj.hexdigest()
+
+
 async def runcmd(cmd: str):
     args = shlex.split(cmd)
 
@@ -56,11 +67,11 @@ async def runcmd(cmd: str):
             process.pid)
 
 
-async def take_screen_shot(video_file: str, duration: int):
+async def take_screen_shot(video_file: str, duration: int, thumb_image_path: str = ''):
     LOG.info(f'[[[Extracting a frame from {video_file} ||| Video duration => {duration}]]]')
 
     ttl = duration // 2
-    thumb_image_path = f"{video_file}.jpg"
+    thumb_image_path = thumb_image_path or f"{video_file}.jpg"
     command = f"ffmpeg -ss {ttl} -i '{video_file}' -vframes 1 '{thumb_image_path}'"
 
     _, err, _, _ = await runcmd(command)
@@ -68,7 +79,7 @@ async def take_screen_shot(video_file: str, duration: int):
     if err:
         LOG.error(err)
 
-    return thumb_image_path if thumb_image_path else None
+    return thumb_image_path if exists(thumb_image_path) else None
 
 
 class SafeDict(dict):